@@ -12,6 +12,9 @@ from app.models.question import Question
 from app.models.exam import Exam
 from app.models.answer import Answer
 from app.models.submission import Submission
+from app.models.grading_job import GradingJob
+from app.models.grading_cache import GradingCacheEntry
+from app.models.analytics_rollup import CourseAnalyticsRollup, TopicAnalyticsRollup, ExamAnalyticsRollup, ErrorTypeRollup
 
 # this is the Alembic Config object, which provides access to the .ini file values
 config = context.config
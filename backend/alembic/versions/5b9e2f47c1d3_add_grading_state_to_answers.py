@@ -0,0 +1,46 @@
+"""Add grading state to answers
+
+Revision ID: 5b9e2f47c1d3
+Revises: cac2d793b4ae
+Create Date: 2026-10-18 14:05:21.604117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b9e2f47c1d3'
+down_revision: Union[str, Sequence[str], None] = 'cac2d793b4ae'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+answer_grading_status = sa.Enum('pending', 'graded', 'failed', name='answer_grading_status')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    answer_grading_status.create(op.get_bind(), checkfirst=True)
+    op.add_column('answers', sa.Column('awarded_marks', sa.Float(), nullable=True))
+    op.add_column('answers', sa.Column('grading_status', answer_grading_status, server_default='pending', nullable=False))
+    op.create_index(op.f('ix_answers_grading_status'), 'answers', ['grading_status'], unique=False)
+
+    # Answers of already graded submissions were committed together with their submission.
+    op.execute(
+        """
+        UPDATE answers
+        SET grading_status = CASE WHEN error_type = 'system_error' THEN 'failed' ELSE 'graded' END::answer_grading_status
+        FROM submissions
+        WHERE submissions.id = answers.submission_id AND submissions.overall_score IS NOT NULL
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_answers_grading_status'), table_name='answers')
+    op.drop_column('answers', 'grading_status')
+    op.drop_column('answers', 'awarded_marks')
+    answer_grading_status.drop(op.get_bind(), checkfirst=True)
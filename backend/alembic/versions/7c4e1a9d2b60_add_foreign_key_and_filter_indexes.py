@@ -0,0 +1,69 @@
+"""Add foreign key and filter indexes
+
+Revision ID: 7c4e1a9d2b60
+Revises: 5b9e2f47c1d3
+Create Date: 2026-10-18 16:42:09.318520
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c4e1a9d2b60'
+down_revision: Union[str, Sequence[str], None] = '5b9e2f47c1d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (index name, table, columns)
+INDEXES = [
+    (op.f('ix_submissions_exam_id'), 'submissions', ['exam_id']),
+    (op.f('ix_answers_submission_id'), 'answers', ['submission_id']),
+    (op.f('ix_answers_question_id'), 'answers', ['question_id']),
+    (op.f('ix_questions_exam_id'), 'questions', ['exam_id']),
+    (op.f('ix_exams_topic_id'), 'exams', ['topic_id']),
+    (op.f('ix_course_schedule_course_id'), 'course_schedule', ['course_id']),
+    (op.f('ix_course_schedule_end_date'), 'course_schedule', ['end_date']),
+    (op.f('ix_courses_teacher_id'), 'courses', ['teacher_id']),
+    ('ix_enrollment_course_id', 'enrollment', ['course_id']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Not available when generating SQL offline (--sql); the constraint itself will fail then
+    duplicates = 0 if op.get_context().as_sql else op.get_bind().execute(sa.text(
+        """
+        SELECT count(*) FROM (
+            SELECT student_id, exam_id FROM submissions
+            GROUP BY student_id, exam_id HAVING count(*) > 1
+        ) AS duplicated
+        """
+    )).scalar()
+    if duplicates:
+        raise RuntimeError(
+            f"{duplicates} (student_id, exam_id) pairs have more than one submission. "
+            "Remove the extra submissions before adding uq_submissions_student_id_exam_id."
+        )
+
+    # CONCURRENTLY keeps the tables writable while the indexes build; it cannot run in a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index(
+            'ix_submissions_ungraded', 'submissions', ['exam_id', 'submitted_at', 'id'], unique=False,
+            postgresql_where=sa.text('overall_score IS NULL'), postgresql_concurrently=True, if_not_exists=True,
+        )
+
+    # Its index also serves lookups by student_id, which therefore gets no index of its own
+    op.create_unique_constraint('uq_submissions_student_id_exam_id', 'submissions', ['student_id', 'exam_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_submissions_student_id_exam_id', 'submissions', type_='unique')
+    op.drop_index('ix_submissions_ungraded', table_name='submissions', postgresql_where=sa.text('overall_score IS NULL'))
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
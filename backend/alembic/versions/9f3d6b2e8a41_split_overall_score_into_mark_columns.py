@@ -0,0 +1,61 @@
+"""Split overall_score into mark columns
+
+Revision ID: 9f3d6b2e8a41
+Revises: 7c4e1a9d2b60
+Create Date: 2026-10-18 18:20:47.205163
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9f3d6b2e8a41'
+down_revision: Union[str, Sequence[str], None] = '7c4e1a9d2b60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('submissions', sa.Column('earned_marks', sa.Float(), nullable=True))
+    op.add_column('submissions', sa.Column('total_marks', sa.Float(), nullable=True))
+
+    # A JSON null was never a grade; those rows stay ungraded (NULL marks)
+    op.execute(
+        """
+        UPDATE submissions
+        SET earned_marks = (overall_score->>0)::double precision,
+            total_marks = (overall_score->>1)::double precision
+        WHERE jsonb_typeof(overall_score) = 'array'
+        """
+    )
+
+    op.drop_index('ix_submissions_ungraded', table_name='submissions', postgresql_where=sa.text('overall_score IS NULL'))
+    op.drop_column('submissions', 'overall_score')
+    op.create_index(
+        'ix_submissions_ungraded', 'submissions', ['exam_id', 'submitted_at', 'id'], unique=False,
+        postgresql_where=sa.text('total_marks IS NULL'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column('submissions', sa.Column('overall_score', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+    op.execute(
+        """
+        UPDATE submissions
+        SET overall_score = jsonb_build_array(earned_marks, total_marks)
+        WHERE total_marks IS NOT NULL
+        """
+    )
+    op.drop_index('ix_submissions_ungraded', table_name='submissions', postgresql_where=sa.text('total_marks IS NULL'))
+    op.create_index(
+        'ix_submissions_ungraded', 'submissions', ['exam_id', 'submitted_at', 'id'], unique=False,
+        postgresql_where=sa.text('overall_score IS NULL'),
+    )
+    op.drop_column('submissions', 'total_marks')
+    op.drop_column('submissions', 'earned_marks')
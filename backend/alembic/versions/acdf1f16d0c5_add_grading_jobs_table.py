@@ -0,0 +1,54 @@
+"""Add grading_jobs table
+
+Revision ID: acdf1f16d0c5
+Revises: 1825d50a1ea1
+Create Date: 2026-10-18 10:02:11.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'acdf1f16d0c5'
+down_revision: Union[str, Sequence[str], None] = '1825d50a1ea1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('grading_jobs',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('status', sa.Enum('queued', 'running', 'completed', 'failed', name='grading_job_status'), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.Column('done', sa.Integer(), nullable=False),
+    sa.Column('failed', sa.Integer(), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('exam_id', sa.UUID(), nullable=True),
+    sa.Column('requested_by_id', sa.UUID(), nullable=True),
+    sa.ForeignKeyConstraint(['exam_id'], ['exams.id'], ),
+    sa.ForeignKeyConstraint(['requested_by_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_grading_jobs_status'), 'grading_jobs', ['status'], unique=False)
+    op.create_index(op.f('ix_grading_jobs_exam_id'), 'grading_jobs', ['exam_id'], unique=False)
+    op.create_index(
+        'ix_grading_jobs_active_exam_id', 'grading_jobs', ['exam_id'], unique=True,
+        postgresql_where=sa.text("status IN ('queued', 'running')"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_grading_jobs_active_exam_id', table_name='grading_jobs', postgresql_where=sa.text("status IN ('queued', 'running')"))
+    op.drop_index(op.f('ix_grading_jobs_exam_id'), table_name='grading_jobs')
+    op.drop_index(op.f('ix_grading_jobs_status'), table_name='grading_jobs')
+    op.drop_table('grading_jobs')
+    sa.Enum(name='grading_job_status').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,118 @@
+"""Add analytics rollup tables
+
+Revision ID: b81c4f07d9e2
+Revises: 9f3d6b2e8a41
+Create Date: 2026-10-18 20:11:36.748212
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b81c4f07d9e2'
+down_revision: Union[str, Sequence[str], None] = '9f3d6b2e8a41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _score_totals():
+    return [
+        sa.Column('submissions', sa.Integer(), nullable=False),
+        sa.Column('graded_submissions', sa.Integer(), nullable=False),
+        sa.Column('earned_marks', sa.Float(), nullable=False),
+        sa.Column('total_marks', sa.Float(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    ]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('course_analytics_rollups',
+    sa.Column('course_id', sa.UUID(), nullable=False),
+    *_score_totals(),
+    sa.ForeignKeyConstraint(['course_id'], ['courses.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('course_id')
+    )
+    op.create_table('topic_analytics_rollups',
+    sa.Column('topic_id', sa.UUID(), nullable=False),
+    sa.Column('course_id', sa.UUID(), nullable=False),
+    *_score_totals(),
+    sa.ForeignKeyConstraint(['course_id'], ['courses.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['topic_id'], ['course_schedule.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('topic_id')
+    )
+    op.create_index(op.f('ix_topic_analytics_rollups_course_id'), 'topic_analytics_rollups', ['course_id'], unique=False)
+    op.create_table('exam_analytics_rollups',
+    sa.Column('exam_id', sa.UUID(), nullable=False),
+    sa.Column('topic_id', sa.UUID(), nullable=False),
+    sa.Column('course_id', sa.UUID(), nullable=False),
+    *_score_totals(),
+    sa.ForeignKeyConstraint(['course_id'], ['courses.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['exam_id'], ['exams.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['topic_id'], ['course_schedule.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('exam_id')
+    )
+    op.create_index(op.f('ix_exam_analytics_rollups_course_id'), 'exam_analytics_rollups', ['course_id'], unique=False)
+    op.create_table('error_type_rollups',
+    sa.Column('course_id', sa.UUID(), nullable=False),
+    sa.Column('error_type', sa.String(), nullable=False),
+    sa.Column('answers', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['course_id'], ['courses.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('course_id', 'error_type')
+    )
+
+    # Backfill from existing submissions; same totals as `analytics_rollup_service rebuild`
+    op.execute(
+        """
+        INSERT INTO exam_analytics_rollups (exam_id, topic_id, course_id, submissions, graded_submissions, earned_marks, total_marks)
+        SELECT exams.id, exams.topic_id, course_schedule.course_id,
+               count(submissions.id), count(submissions.total_marks),
+               coalesce(sum(submissions.earned_marks), 0), coalesce(sum(submissions.total_marks), 0)
+        FROM exams
+        JOIN submissions ON submissions.exam_id = exams.id
+        JOIN course_schedule ON exams.topic_id = course_schedule.id
+        GROUP BY exams.id, exams.topic_id, course_schedule.course_id
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO topic_analytics_rollups (topic_id, course_id, submissions, graded_submissions, earned_marks, total_marks)
+        SELECT topic_id, course_id, sum(submissions), sum(graded_submissions), sum(earned_marks), sum(total_marks)
+        FROM exam_analytics_rollups
+        GROUP BY topic_id, course_id
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO course_analytics_rollups (course_id, submissions, graded_submissions, earned_marks, total_marks)
+        SELECT course_id, sum(submissions), sum(graded_submissions), sum(earned_marks), sum(total_marks)
+        FROM exam_analytics_rollups
+        GROUP BY course_id
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO error_type_rollups (course_id, error_type, answers)
+        SELECT course_schedule.course_id, answers.error_type, count(answers.id)
+        FROM answers
+        JOIN submissions ON answers.submission_id = submissions.id
+        JOIN exams ON submissions.exam_id = exams.id
+        JOIN course_schedule ON exams.topic_id = course_schedule.id
+        WHERE submissions.total_marks IS NOT NULL AND answers.error_type IS NOT NULL
+        GROUP BY course_schedule.course_id, answers.error_type
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('error_type_rollups')
+    op.drop_index(op.f('ix_exam_analytics_rollups_course_id'), table_name='exam_analytics_rollups')
+    op.drop_table('exam_analytics_rollups')
+    op.drop_index(op.f('ix_topic_analytics_rollups_course_id'), table_name='topic_analytics_rollups')
+    op.drop_table('topic_analytics_rollups')
+    op.drop_table('course_analytics_rollups')
@@ -0,0 +1,37 @@
+"""Add grading_cache table
+
+Revision ID: cac2d793b4ae
+Revises: acdf1f16d0c5
+Create Date: 2026-10-18 11:14:37.902115
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'cac2d793b4ae'
+down_revision: Union[str, Sequence[str], None] = 'acdf1f16d0c5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('grading_cache',
+    sa.Column('cache_key', sa.String(length=64), nullable=False),
+    sa.Column('model', sa.String(), nullable=False),
+    sa.Column('feedback', sa.JSON(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('exam_id', sa.UUID(), nullable=True),
+    sa.PrimaryKeyConstraint('cache_key')
+    )
+    op.create_index(op.f('ix_grading_cache_exam_id'), 'grading_cache', ['exam_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_grading_cache_exam_id'), table_name='grading_cache')
+    op.drop_table('grading_cache')
@@ -0,0 +1,49 @@
+"""Add keyset pagination indexes
+
+Revision ID: d4a7e2c91f35
+Revises: b81c4f07d9e2
+Create Date: 2026-10-18 22:05:47.512903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a7e2c91f35'
+down_revision: Union[str, Sequence[str], None] = 'b81c4f07d9e2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (index name, table, columns)
+INDEXES = [
+    ('ix_submissions_exam_id_submitted_at', 'submissions', ['exam_id', 'submitted_at', 'id']),
+    ('ix_submissions_student_id_submitted_at', 'submissions', ['student_id', 'submitted_at', 'id']),
+    ('ix_courses_course_name_id', 'courses', ['course_name', 'id']),
+]
+
+# Superseded by the indexes above, which lead with the same column
+REPLACED = [
+    (op.f('ix_submissions_exam_id'), 'submissions', ['exam_id']),
+    (op.f('ix_courses_course_name'), 'courses', ['course_name']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY keeps the tables writable while the indexes build; it cannot run in a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True, if_not_exists=True)
+        for name, table, _ in REPLACED:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, columns in REPLACED:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True, if_not_exists=True)
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
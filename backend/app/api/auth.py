@@ -2,46 +2,67 @@
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 
 from app.schemas import user as user_schema
 from app.schemas import token as token_schema
 from app.services import user_service
+from app.services.password_hasher import PasswordHasherBusy, password_hasher
 from app.core import security
 from app.api import deps
 from app.core.config import settings
 
 router = APIRouter()
 
+# bcrypt runs on the password hasher's bounded pool; when it is saturated,
+# clients are told to come back rather than queued behind the burst.
+def _hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many sign-ins in progress. Please try again in a moment.",
+        headers={"Retry-After": "1"},
+    )
+
 @router.post("/register", response_model=user_schema.User)
-def register_user(
+async def register_user(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     user_in: user_schema.UserCreate,
 ):
     """
     Create a new user.
     """
-    user = user_service.get_user_by_email(db, email=user_in.email)
+    user = await user_service.get_user_by_email_async(db, email=user_in.email)
     if user:
         raise HTTPException(
             status_code=400,
             detail="The user with this email already exists in the system.",
         )
-    user = user_service.create_user(db=db, user=user_in)
+    # Don't hold a pooled connection while waiting for a hash worker
+    await db.close()
+    try:
+        user = await user_service.create_user_async(db=db, user=user_in)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
     return user
 
 @router.post("/login", response_model=token_schema.Token)
-def login_for_access_token(
-    db: Session = Depends(deps.get_db),
+async def login_for_access_token(
+    db: AsyncSession = Depends(deps.get_async_db),
     form_data: OAuth2PasswordRequestForm = Depends(),
 ):
     """
     OAuth2 compatible token login, get an access token for future requests.
     """
-    user = user_service.get_user_by_email(db, email=form_data.username)
-    if not user or not security.verify_password(form_data.password, user.hashed_password):
+    user = await user_service.get_user_by_email_async(db, email=form_data.username)
+    # Don't hold a pooled connection while waiting for a hash worker; the user stays loaded
+    await db.close()
+    try:
+        password_ok = user is not None and await password_hasher.verify(form_data.password, user.hashed_password)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -49,7 +70,7 @@ def login_for_access_token(
         )
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = security.create_access_token(
-        subject=user.id, expires_delta=access_token_expires
+        subject=user.id, expires_delta=access_token_expires, role=user.role
     )
     return {
         "access_token": access_token,
@@ -1,12 +1,12 @@
 # app/api/courses.py
 
 from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List
 import uuid
 
 from app.api import deps
-from app.models.user import User
 from app.schemas import course as course_schema
 from app.services import ai_service, course_service
 
@@ -16,7 +16,7 @@ router = APIRouter()
 def get_my_courses(
     *,
     db: Session = Depends(deps.get_db),
-    current_teacher: User = Depends(deps.get_current_teacher),
+    current_teacher: deps.CurrentUser = Depends(deps.get_current_teacher),
 ):
     """
     Retrieve all courses created by the current teacher. (Teacher only)
@@ -27,8 +27,8 @@ def get_my_courses(
 @router.post("/", response_model=course_schema.Course)
 async def create_course(
     *,
-    db: Session = Depends(deps.get_db),
-    current_teacher: User = Depends(deps.get_current_teacher),
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_teacher: deps.CurrentUser = Depends(deps.get_current_teacher),
     course_name: str = Form(...),
     syllabus_file: UploadFile = File(...)
 ):
@@ -44,8 +44,8 @@ async def create_course(
     schedule_data = await ai_service.generate_schedule_from_syllabus(syllabus_file)
 
     course_in = course_schema.CourseCreate(course_name=course_name)
-    course = course_service.create_course_with_schedule(
-        db=db, course_in=course_in, teacher=current_teacher, schedule_data=schedule_data
+    course = await course_service.create_course_with_schedule_async(
+        db=db, course_in=course_in, teacher_id=current_teacher.id, schedule_data=schedule_data
     )
     return course
 
@@ -54,7 +54,7 @@ def get_course_details(
     *,
     db: Session = Depends(deps.get_db),
     course_id: uuid.UUID,
-    current_teacher: User = Depends(deps.get_current_teacher),
+    current_teacher: deps.CurrentUser = Depends(deps.get_current_teacher),
 ):
     """
     Retrieve details for a specific course created by the current teacher.
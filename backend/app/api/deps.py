@@ -1,17 +1,19 @@
 # app/api/deps.py
 
-from typing import Generator, Annotated
+from typing import AsyncGenerator, Generator, Annotated
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.db.session import SessionLocal
+from app.db.session import AsyncSessionLocal, SessionLocal
 from app.core import security
 from app.core.config import settings
 from app.models.user import User
 from app.schemas.token import TokenData
+from app.services.user_cache import CurrentUser, user_cache
 
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl="/api/auth/login"
@@ -28,63 +30,88 @@ def get_db() -> Generator:
     finally:
         db.close()
 
-def get_current_user(
-    db: Annotated[Session, Depends(get_db)], 
-    token: Annotated[str, Depends(reusable_oauth2)]
-) -> User:
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
     """
-    Dependency to get the current user from a JWT token.
-    Validates the token, extracts the user ID, and fetches the user from the DB.
+    Dependency to get an async database session, for `async def` endpoints.
+    Queries on it never block the event loop.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def _decode_token(token: str) -> TokenData:
     """
+    Validates a JWT token and returns its claims.
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
         )
-        token_data = TokenData(id=payload.get("sub"))
+        token_data = TokenData(id=payload.get("sub"), role=payload.get("role"))
     except (JWTError, ValidationError):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    
+        raise credentials_exception
+
     if token_data.id is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise credentials_exception
+    return token_data
+
+def _resolve_user(db: Session, token: str, role: str | None = None) -> CurrentUser:
+    """
+    The user behind a token, from the user cache or else the DB.
+    With `role`, also ensures the user has it; a token whose role claim differs
+    is refused without any lookup.
+    """
+    token_data = _decode_token(token)
+    forbidden_exception = HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail="The user doesn't have enough privileges for this action.",
+    )
+    if role is not None and token_data.role is not None and token_data.role != role:
+        user_cache.record_role_rejection()
+        raise forbidden_exception
 
-    user = db.query(User).filter(User.id == token_data.id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    return user
+    current_user = user_cache.get(token_data.id)
+    if current_user is None:
+        user = db.query(User).filter(User.id == token_data.id).first()
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        current_user = user_cache.put(user)
+
+    # The stored role wins over the claim, e.g. after a role change
+    if role is not None and current_user.role != role:
+        raise forbidden_exception
+    return current_user
+
+def get_current_user(
+    db: Annotated[Session, Depends(get_db)], 
+    token: Annotated[str, Depends(reusable_oauth2)]
+) -> CurrentUser:
+    """
+    Dependency to get the current user from a JWT token.
+    Validates the token, extracts the user ID, and resolves the user through the user cache.
+    """
+    return _resolve_user(db, token)
 
 def get_current_teacher(
-    current_user: Annotated[User, Depends(get_current_user)],
-) -> User:
+    db: Annotated[Session, Depends(get_db)],
+    token: Annotated[str, Depends(reusable_oauth2)],
+) -> CurrentUser:
     """
     Dependency to ensure the current user is a teacher.
-    Relies on get_current_user and then checks the user's role.
+    Checks the token's role claim first, then the user's stored role.
     """
-    if current_user.role != "teacher":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="The user doesn't have enough privileges for this action.",
-        )
-    return current_user
+    return _resolve_user(db, token, role="teacher")
 
 def get_current_student(
-    current_user: Annotated[User, Depends(get_current_user)],
-) -> User:
+    db: Annotated[Session, Depends(get_db)],
+    token: Annotated[str, Depends(reusable_oauth2)],
+) -> CurrentUser:
     """
     Dependency to ensure the current user is a student.
-    Relies on get_current_user and then checks the user's role.
+    Checks the token's role claim first, then the user's stored role.
     """
-    if current_user.role != "student":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="The user doesn't have enough privileges for this action.",
-        )
-    return current_user
-
+    return _resolve_user(db, token, role="student")
@@ -0,0 +1,39 @@
+# app/api/pagination.py
+
+from dataclasses import dataclass
+from typing import Annotated, List
+
+from fastapi import HTTPException, Query, Response, status
+
+from app.services.pagination import MAX_PAGE_SIZE, Page
+
+# Set on a list response when more rows follow; pass its value back as ?cursor=
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+@dataclass
+class PageParams:
+    limit: int | None
+    cursor: str | None
+
+def get_page_params(
+    limit: Annotated[
+        int | None, Query(ge=1, le=MAX_PAGE_SIZE, description="Rows per page; omit for every row")
+    ] = None,
+    cursor: Annotated[str | None, Query(description=f"The {NEXT_CURSOR_HEADER} header of the previous page")] = None,
+) -> PageParams:
+    """
+    Dependency for the page size and cursor of a keyset-paginated list endpoint.
+    Pagination is opt-in: without `limit`, the endpoint returns every row.
+    """
+    return PageParams(limit=limit, cursor=cursor)
+
+def invalid_cursor() -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor.")
+
+def page_items(response: Response, page: Page) -> List:
+    """
+    The rows of a page, with the cursor of the next page (if any) set on the response.
+    """
+    if page.next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.items
@@ -6,7 +6,6 @@ from typing import Annotated
 import uuid
 
 from app.api import deps
-from app.models.user import User
 from app.schemas import course as course_schema
 from app.services import course_service
 
@@ -18,7 +17,7 @@ def get_public_course_details(
     db: Annotated[Session, Depends(deps.get_db)],
     course_id: uuid.UUID,
     # This just ensures the user is logged in, but doesn't check their role
-    current_user: Annotated[User, Depends(deps.get_current_user)],
+    current_user: Annotated[deps.CurrentUser, Depends(deps.get_current_user)],
 ):
     """
     Retrieve details for a single public course. (Any authenticated user)
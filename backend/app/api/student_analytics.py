@@ -3,7 +3,6 @@ from sqlalchemy.orm import Session
 from typing import Annotated, List
 
 from app.api import deps
-from app.models.user import User
 from app.schemas import analytics as analytics_schema
 from app.services import analytics_service
 
@@ -13,7 +12,7 @@ router = APIRouter()
 def get_upcoming_topics(
     *,
     db: Annotated[Session, Depends(deps.get_db)],
-    current_student: Annotated[User, Depends(deps.get_current_student)],
+    current_student: Annotated[deps.CurrentUser, Depends(deps.get_current_student)],
 ):
     """
     Retrieve upcoming topics for the current student.
@@ -25,7 +24,7 @@ def get_upcoming_topics(
 def get_performance_summary(
     *,
     db: Annotated[Session, Depends(deps.get_db)],
-    current_student: Annotated[User, Depends(deps.get_current_student)],
+    current_student: Annotated[deps.CurrentUser, Depends(deps.get_current_student)],
 ):
     """
     Retrieve a performance summary for the current student, highlighting areas for improvement.
@@ -1,14 +1,14 @@
 # app/api/student_courses.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 from typing import List, Annotated
 import uuid
 
 from app.api import deps
-from app.models.user import User
+from app.api.pagination import PageParams, get_page_params, invalid_cursor, page_items
 from app.schemas import course as course_schema
-from app.services import course_service
+from app.services import course_service, pagination
 
 router = APIRouter()
 
@@ -16,19 +16,27 @@ router = APIRouter()
 def browse_all_courses(
     *,
     db: Annotated[Session, Depends(deps.get_db)],
-    current_user: Annotated[User, Depends(deps.get_current_user)],
+    response: Response,
+    page: Annotated[PageParams, Depends(get_page_params)],
+    current_user: Annotated[deps.CurrentUser, Depends(deps.get_current_user)],
 ):
     """
-    Retrieve all available courses for browsing. (Any authenticated user)
+    Retrieve available courses for browsing, ordered by name. (Any authenticated user)
+    Pass ?limit= to paginate: while more courses follow, the X-Next-Cursor header holds the
+    cursor of the next page.
     """
-    return course_service.get_all_courses(db=db)
+    try:
+        courses = course_service.get_all_courses(db=db, limit=page.limit, cursor=page.cursor)
+    except pagination.InvalidCursor:
+        raise invalid_cursor()
+    return page_items(response, courses)
 
 @router.post("/courses/{course_id}/enroll", response_model=course_schema.Course)
 def enroll_in_course(
     *,
     db: Annotated[Session, Depends(deps.get_db)],
     course_id: uuid.UUID,
-    current_student: Annotated[User, Depends(deps.get_current_student)],
+    current_student: Annotated[deps.CurrentUser, Depends(deps.get_current_student)],
 ):
     """
     Enroll the current student in a course. (Student only)
@@ -38,16 +46,16 @@ def enroll_in_course(
         raise HTTPException(status_code=404, detail="Course not found")
     
     # Check if student is already enrolled
-    if current_student in course.students_enrolled:
+    if course_service.is_student_enrolled(db=db, course_id=course.id, student_id=current_student.id):
         raise HTTPException(status_code=400, detail="Already enrolled in this course")
 
-    return course_service.enroll_student_in_course(db=db, student=current_student, course=course)
+    return course_service.enroll_student_in_course(db=db, student_id=current_student.id, course=course)
     
 @router.get("/my-courses", response_model=List[course_schema.Course])
 def get_my_enrolled_courses(
     *,
     db: Annotated[Session, Depends(deps.get_db)],
-    current_student: Annotated[User, Depends(deps.get_current_student)],
+    current_student: Annotated[deps.CurrentUser, Depends(deps.get_current_student)],
 ):
     """
     Retrieve all courses the current student is enrolled in. (Student only)
@@ -59,7 +67,7 @@ def get_enrolled_course_dashboard(
     *,
     db: Annotated[Session, Depends(deps.get_db)],
     course_id: uuid.UUID,
-    current_student: Annotated[User, Depends(deps.get_current_student)],
+    current_student: Annotated[deps.CurrentUser, Depends(deps.get_current_student)],
 ):
     """
     Retrieve the full details and schedule for a single course the student is enrolled in.
@@ -1,15 +1,16 @@
 # app/api/student_exams.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
+from datetime import datetime
 from typing import Annotated, List
 import uuid
 
 from app.api import deps
-from app.models.user import User
+from app.api.pagination import PageParams, get_page_params, invalid_cursor, page_items
 from app.schemas import exam as exam_schema
 from app.schemas import submission as submission_schema
-from app.services import exam_service, submission_service
+from app.services import exam_service, pagination, submission_service
 
 router = APIRouter()
 
@@ -19,16 +20,29 @@ router = APIRouter()
 def get_my_submissions(
     *,
     db: Annotated[Session, Depends(deps.get_db)],
-    current_student: Annotated[User, Depends(deps.get_current_student)],
+    response: Response,
+    page: Annotated[PageParams, Depends(get_page_params)],
+    current_student: Annotated[deps.CurrentUser, Depends(deps.get_current_student)],
+    graded: bool | None = None,
+    submitted_after: datetime | None = None,
+    submitted_before: datetime | None = None,
 ):
     """
-    Retrieve a list of all submissions for the current student.
+    Retrieve the current student's submissions, most recent first, optionally
+    only graded or ungraded ones and within [submitted_after, submitted_before).
     (Student only)
+    Pass ?limit= to paginate: while more submissions follow, the X-Next-Cursor header holds the
+    cursor of the next page.
     """
-    submissions = submission_service.get_submissions_by_student(
-        db=db, student_id=current_student.id
-    )
-    return submissions
+    try:
+        submissions = submission_service.get_submissions_by_student(
+            db=db, student_id=current_student.id,
+            graded=graded, submitted_after=submitted_after, submitted_before=submitted_before,
+            limit=page.limit, cursor=page.cursor,
+        )
+    except pagination.InvalidCursor:
+        raise invalid_cursor()
+    return page_items(response, submissions)
 
 # --- Existing Endpoints ---
 
@@ -37,7 +51,7 @@ def get_my_submission_details(
     *,
     db: Annotated[Session, Depends(deps.get_db)],
     submission_id: uuid.UUID,
-    current_student: Annotated[User, Depends(deps.get_current_student)],
+    current_student: Annotated[deps.CurrentUser, Depends(deps.get_current_student)],
 ):
     """
     Retrieve a specific graded submission belonging to the current student.
@@ -59,7 +73,7 @@ def submit_exam(
     db: Annotated[Session, Depends(deps.get_db)],
     exam_id: uuid.UUID,
     submission_in: submission_schema.SubmissionCreate,
-    current_student: Annotated[User, Depends(deps.get_current_student)],
+    current_student: Annotated[deps.CurrentUser, Depends(deps.get_current_student)],
 ):
     """
     Submit answers for a specific exam.
@@ -68,7 +82,7 @@ def submit_exam(
     try:
         submission = submission_service.create_submission(
             db=db,
-            student=current_student,
+            student_id=current_student.id,
             exam_id=exam_id,
             submission_in=submission_in
         )
@@ -83,7 +97,7 @@ def get_published_exams_in_course(
     *,
     db: Annotated[Session, Depends(deps.get_db)],
     course_id: uuid.UUID,
-    current_student: Annotated[User, Depends(deps.get_current_student)],
+    current_student: Annotated[deps.CurrentUser, Depends(deps.get_current_student)],
 ):
     """
     Retrieve all published exams for a specific course the student is enrolled in.
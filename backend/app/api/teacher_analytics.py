@@ -1,10 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from typing import Annotated
 import uuid
 
 from app.api import deps
-from app.models.user import User
 from app.schemas import analytics as analytics_schema
 from app.services import analytics_service
 
@@ -15,7 +14,7 @@ def get_course_analytics_data(
     *,
     db: Annotated[Session, Depends(deps.get_db)],
     course_id: uuid.UUID,
-    current_teacher: Annotated[User, Depends(deps.get_current_user)],
+    current_teacher: Annotated[deps.CurrentUser, Depends(deps.get_current_user)],
 ):
     """
     Retrieve comprehensive analytics for a specific course.
@@ -28,3 +27,43 @@ def get_course_analytics_data(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Course not found or you do not have permission to access it.")
     
     return analytics
+
+@router.get("/exams/{exam_id}/analytics/distribution", response_model=analytics_schema.ExamDistribution)
+def get_exam_score_distribution(
+    *,
+    db: Annotated[Session, Depends(deps.get_db)],
+    exam_id: uuid.UUID,
+    bins: Annotated[int, Query(ge=1, le=100)] = 10,
+    current_teacher: Annotated[deps.CurrentUser, Depends(deps.get_current_user)],
+):
+    """
+    Score histogram, quartiles and standard deviation of an exam's graded
+    submissions, with difficulty and discrimination indices per question.
+    (Teacher only)
+    """
+    distribution = analytics_service.get_exam_distribution(
+        db=db, exam_id=exam_id, teacher_id=current_teacher.id, bins=bins
+    )
+    if not distribution:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Exam not found or you do not have permission to access it.")
+    return distribution
+
+@router.get("/topics/{topic_id}/analytics/distribution", response_model=analytics_schema.TopicDistribution)
+def get_topic_score_distribution(
+    *,
+    db: Annotated[Session, Depends(deps.get_db)],
+    topic_id: uuid.UUID,
+    bins: Annotated[int, Query(ge=1, le=100)] = 10,
+    current_teacher: Annotated[deps.CurrentUser, Depends(deps.get_current_user)],
+):
+    """
+    Score histogram, quartiles and standard deviation of a topic's graded
+    submissions, overall and per exam.
+    (Teacher only)
+    """
+    distribution = analytics_service.get_topic_distribution(
+        db=db, topic_id=topic_id, teacher_id=current_teacher.id, bins=bins
+    )
+    if not distribution:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Topic not found or you do not have permission to access it.")
+    return distribution
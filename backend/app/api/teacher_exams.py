@@ -1,14 +1,18 @@
 # app/api/teacher_exams.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import Annotated, List
+from datetime import datetime
+from typing import Annotated, List, Literal
 import uuid
 
 from app.api import deps
-from app.models.user import User
+from app.api.pagination import PageParams, get_page_params, invalid_cursor, page_items
 from app.schemas import exam as exam_schema, submission as submission_schema, question as question_schema
-from app.services import ai_service, exam_service, submission_service
+from app.schemas import grading_job as grading_job_schema
+from app.services import ai_service, exam_service, submission_service, grading_job_service, pagination
+from app.services.grading_worker import grading_worker
 
 router = APIRouter()
 
@@ -17,19 +21,22 @@ def get_exam_questions(
     *,
     db: Annotated[Session, Depends(deps.get_db)],
     exam_id: uuid.UUID,
-    current_teacher: Annotated[User, Depends(deps.get_current_teacher)],
+    current_teacher: Annotated[deps.CurrentUser, Depends(deps.get_current_teacher)],
 ):
-    exam = exam_service.get_exam(db=db, exam_id=exam_id)
-    if not exam:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Exam not found",
+    try:
+        exam = exam_service.get_exam_for_teacher(
+            db=db, exam_id=exam_id, teacher_id=current_teacher.id, with_questions=True
         )
-    if exam.topic.course.teacher_id != current_teacher.id:
+    except PermissionError:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to access this exam",
         )
+    if not exam:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Exam not found",
+        )
     return exam.questions
 
 @router.put("/questions/{question_id}", response_model=question_schema.Question)
@@ -38,19 +45,22 @@ def update_question(
     db: Annotated[Session, Depends(deps.get_db)],
     question_id: uuid.UUID,
     question_update: question_schema.QuestionUpdate,
-    current_teacher: Annotated[User, Depends(deps.get_current_teacher)],
+    current_teacher: Annotated[deps.CurrentUser, Depends(deps.get_current_teacher)],
 ):
-    question = exam_service.get_question(db=db, question_id=question_id)
-    if not question:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Question not found",
+    try:
+        question = exam_service.get_question_for_teacher(
+            db=db, question_id=question_id, teacher_id=current_teacher.id
         )
-    if question.exam.topic.course.teacher_id != current_teacher.id:
+    except PermissionError:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to modify this question",
         )
+    if not question:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Question not found",
+        )
     
     updated_question = exam_service.update_question(
         db=db, 
@@ -65,19 +75,20 @@ def add_question(
     db: Annotated[Session, Depends(deps.get_db)],
     exam_id: uuid.UUID,
     question_create: question_schema.QuestionCreate,
-    current_teacher: Annotated[User, Depends(deps.get_current_teacher)],
+    current_teacher: Annotated[deps.CurrentUser, Depends(deps.get_current_teacher)],
 ):
-    exam = exam_service.get_exam(db=db, exam_id=exam_id)
+    try:
+        exam = exam_service.get_exam_for_teacher(db=db, exam_id=exam_id, teacher_id=current_teacher.id)
+    except PermissionError:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to modify this exam",
+        )
     if not exam:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Exam not found",
         )
-    if exam.topic.course.teacher_id!= current_teacher.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to modify this exam",
-        )
     
     # Create and return the new question
     new_question = exam_service.create_question(
@@ -92,20 +103,23 @@ def delete_question(
     *,
     db: Annotated[Session, Depends(deps.get_db)],
     question_id: uuid.UUID,
-    current_teacher: Annotated[User, Depends(deps.get_current_teacher)],
+    current_teacher: Annotated[deps.CurrentUser, Depends(deps.get_current_teacher)],
 ):
     """Delete a specific question."""
-    question = exam_service.get_question(db=db, question_id=question_id)
-    if not question:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Question not found",
+    try:
+        question = exam_service.get_question_for_teacher(
+            db=db, question_id=question_id, teacher_id=current_teacher.id
         )
-    if question.exam.topic.course.teacher_id != current_teacher.id:
+    except PermissionError:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to delete this question",
         )
+    if not question:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Question not found",
+        )
     
     db.delete(question)
     db.commit()
@@ -123,7 +137,7 @@ def get_my_exam_details(
     *,
     db: Annotated[Session, Depends(deps.get_db)],
     exam_id: uuid.UUID,
-    current_teacher: Annotated[User, Depends(deps.get_current_teacher)],
+    current_teacher: Annotated[deps.CurrentUser, Depends(deps.get_current_teacher)],
 ):
     """
     Retrieve details for a specific exam created by the current teacher.
@@ -140,14 +154,24 @@ def get_my_exam_details(
 def get_my_exams(
     *,
     db: Annotated[Session, Depends(deps.get_db)],
-    current_teacher: Annotated[User, Depends(deps.get_current_teacher)],
+    response: Response,
+    page: Annotated[PageParams, Depends(get_page_params)],
+    current_teacher: Annotated[deps.CurrentUser, Depends(deps.get_current_teacher)],
+    exam_status: Annotated[Literal["draft", "published"] | None, Query(alias="status")] = None,
 ):
     """
-    Retrieve all exams created by the current teacher.
+    Retrieve the exams created by the current teacher, ordered by title.
     (Teacher only)
+    Pass ?limit= to paginate: while more exams follow, the X-Next-Cursor header holds the
+    cursor of the next page.
     """
-    exams = exam_service.get_exams_by_teacher(db=db, teacher_id=current_teacher.id)
-    return exams
+    try:
+        exams = exam_service.get_exams_by_teacher(
+            db=db, teacher_id=current_teacher.id, status=exam_status, limit=page.limit, cursor=page.cursor
+        )
+    except pagination.InvalidCursor:
+        raise invalid_cursor()
+    return page_items(response, exams)
 
 @router.patch("/exams/{exam_id}", response_model=exam_schema.Exam)
 def update_exam_details(
@@ -155,7 +179,7 @@ def update_exam_details(
     db: Annotated[Session, Depends(deps.get_db)],
     exam_id: uuid.UUID,
     exam_in: exam_schema.ExamUpdate,
-    current_teacher: Annotated[User, Depends(deps.get_current_teacher)],
+    current_teacher: Annotated[deps.CurrentUser, Depends(deps.get_current_teacher)],
 ):
     """
     Update an exam's details, such as adding grading rules or publishing it.
@@ -173,67 +197,107 @@ def update_exam_details(
 @router.post("/topics/{topic_id}/generate-exam", response_model=exam_schema.Exam)
 async def generate_draft_exam_for_topic(
     *,
-    db: Annotated[Session, Depends(deps.get_db)],
+    db: Annotated[AsyncSession, Depends(deps.get_async_db)],
     topic_id: uuid.UUID,
-    current_teacher: Annotated[User, Depends(deps.get_current_teacher)],
+    current_teacher: Annotated[deps.CurrentUser, Depends(deps.get_current_teacher)],
 ):
     """
     Generates a new draft exam with 10 AI-generated questions for a specific course topic.
     (Teacher only)
     """
-    topic = exam_service.get_topic_by_id_and_teacher(
+    topic = await exam_service.get_topic_by_id_and_teacher_async(
         db=db, topic_id=topic_id, teacher_id=current_teacher.id
     )
     if not topic:
         raise HTTPException(status_code=404, detail="Topic not found or you do not have permission to access it.")
 
+    # Don't hold a pooled connection while waiting for the AI service; the topic and its course stay loaded
+    await db.close()
     question_texts = await ai_service.generate_exam_questions(
         course_name=topic.course.course_name,
         topic_name=topic.topic_name
     )
 
-    exam = exam_service.create_exam_draft(
+    exam = await exam_service.create_exam_draft_async(
         db=db, topic=topic, question_texts=question_texts
     )
     return exam
 
-@router.post("/exams/{exam_id}/grade-all", response_model=dict)
-async def grade_all_exam_submissions(
+@router.post(
+    "/exams/{exam_id}/grade-all",
+    response_model=grading_job_schema.GradingJobEnqueued,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+def grade_all_exam_submissions(
     *,
     db: Annotated[Session, Depends(deps.get_db)],
     exam_id: uuid.UUID,
-    current_teacher: Annotated[User, Depends(deps.get_current_teacher)],
+    current_teacher: Annotated[deps.CurrentUser, Depends(deps.get_current_teacher)],
 ):
     """
-    Triggers the AI grading process for all ungraded submissions of a specific exam.
-    This is a long-running operation. (Teacher only)
+    Queues the AI grading process for all ungraded submissions of a specific exam.
+    Returns immediately; poll the returned job for progress. (Teacher only)
     """
     exam_check = exam_service.get_exam_by_id_and_teacher(
         db=db, exam_id=exam_id, teacher_id=current_teacher.id
     )
     if not exam_check:
         raise HTTPException(status_code=404, detail="Exam not found or you do not have permission to access it.")
+    if not exam_check.grading_rules:
+        raise HTTPException(status_code=400, detail="Grading rules have not been set for this exam.")
 
-    try:
-        num_graded = await submission_service.grade_all_submissions_for_exam(db=db, exam_id=exam_id)
-        return {"message": f"Successfully graded {num_graded} new submission(s)."}
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"An unexpected error occurred during grading: {e}")
+    job = grading_job_service.create_grading_job(
+        db=db, exam_id=exam_id, requested_by_id=current_teacher.id
+    )
+    grading_worker.notify()
+    return {
+        "message": "Grading has started. Scores will appear as submissions are graded.",
+        "job": job,
+    }
+
+@router.get("/grading-jobs/{job_id}", response_model=grading_job_schema.GradingJob)
+def get_grading_job(
+    *,
+    db: Annotated[Session, Depends(deps.get_db)],
+    job_id: uuid.UUID,
+    current_teacher: Annotated[deps.CurrentUser, Depends(deps.get_current_teacher)],
+):
+    """
+    Retrieve the status and progress of a grading job.
+    (Teacher only)
+    """
+    job = grading_job_service.get_grading_job_by_id_and_teacher(
+        db=db, job_id=job_id, teacher_id=current_teacher.id
+    )
+    if not job:
+        raise HTTPException(status_code=404, detail="Grading job not found or you do not have permission to access it.")
+    return job
 
 @router.get("/exams/{exam_id}/submissions", response_model=List[submission_schema.SubmissionForTeacher])
 def get_submissions_for_exam(
     *,
     db: Annotated[Session, Depends(deps.get_db)],
     exam_id: uuid.UUID,
-    current_teacher: Annotated[User, Depends(deps.get_current_teacher)],
+    response: Response,
+    page: Annotated[PageParams, Depends(get_page_params)],
+    current_teacher: Annotated[deps.CurrentUser, Depends(deps.get_current_teacher)],
+    graded: bool | None = None,
+    submitted_after: datetime | None = None,
+    submitted_before: datetime | None = None,
 ):
     """
-    Retrieve all student submissions for a specific exam.
+    Retrieve the student submissions for a specific exam, most recent first,
+    optionally only graded or ungraded ones and within [submitted_after, submitted_before).
     (Teacher only)
+    Pass ?limit= to paginate: while more submissions follow, the X-Next-Cursor header holds the
+    cursor of the next page.
     """
-    submissions = submission_service.get_submissions_by_exam_and_teacher(
-        db=db, exam_id=exam_id, teacher_id=current_teacher.id
-    )
-    return submissions
+    try:
+        submissions = submission_service.get_submissions_by_exam_and_teacher(
+            db=db, exam_id=exam_id, teacher_id=current_teacher.id,
+            graded=graded, submitted_after=submitted_after, submitted_before=submitted_before,
+            limit=page.limit, cursor=page.cursor,
+        )
+    except pagination.InvalidCursor:
+        raise invalid_cursor()
+    return page_items(response, submissions)
@@ -5,9 +5,45 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    # Derived from DATABASE_URL (asyncpg / aiosqlite) unless set explicitly
+    ASYNC_DATABASE_URL: str | None = None
+    # Connection pools: the sync and async engines each get one of this size
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    # How long a checkout may wait for a free connection before failing
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    # Connections older than this are replaced; -1 keeps them forever
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    # Test each connection on checkout (one extra round-trip); recycling alone is cheaper
+    DB_POOL_PRE_PING: bool = True
+    # Log a warning when a checkout had to wait at least this long
+    DB_POOL_WAIT_WARN_SECONDS: float = 1.0
+    # Per-request statement counts and DB time, aggregated per route (app.db.query_stats)
+    QUERY_STATS_ENABLED: bool = True
+    # Report them in X-DB-Query-Count / X-DB-Query-Time-Ms response headers; for debugging
+    QUERY_STATS_HEADERS: bool = False
+    # Statements at least this slow are logged, with parameters redacted; 0 disables
+    SLOW_QUERY_THRESHOLD_MS: float = 200.0
+    # Requests issuing more statements than this are logged as likely N+1s; 0 disables
+    QUERY_COUNT_WARN_THRESHOLD: int = 50
+    # Prometheus metrics at /metrics; see app.core.metrics for multiple workers
+    METRICS_ENABLED: bool = True
+    # How often each process copies its pool stats into the metrics
+    METRICS_REFRESH_SECONDS: float = 5.0
     SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
+    # Authenticated users are cached in-process, so most requests skip the users lookup.
+    # A role change or deletion takes effect after the TTL unless the entry is invalidated.
+    AUTH_USER_CACHE_ENABLED: bool = True
+    AUTH_USER_CACHE_TTL_SECONDS: float = 60.0
+    AUTH_USER_CACHE_MAX_SIZE: int = 10000
+    # bcrypt runs on its own thread pool; None uses one worker per CPU
+    PASSWORD_HASH_WORKERS: int | None = None
+    # Hash operations admitted at once (running or queued); logins beyond this get a 503
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    # An operation that waited this long for a worker is dropped and its login gets a 503
+    PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS: float = 5.0
     GEMINI_API_KEY: str
     POSTGRES_USER: str
     POSTGRES_PASSWORD: str
@@ -15,6 +51,77 @@ class Settings(BaseSettings):
     POSTGRES_HOST: str
     POSTGRES_PORT: int
 
+    # LLM client
+    # "gemini", or "fake" for the offline stand-in in app.services.fake_llm
+    LLM_PROVIDER: str = "gemini"
+    GEMINI_MODEL: str = "gemini-2.5-flash-preview-05-20"
+    # Point at a fake server (python -m app.services.fake_llm) to load-test over HTTP
+    GEMINI_BASE_URL: str = "https://generativelanguage.googleapis.com/v1beta"
+    LLM_HTTP2: bool = True
+    LLM_MAX_CONNECTIONS: int = 64
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 32
+    LLM_KEEPALIVE_EXPIRY_SECONDS: float = 60.0
+    LLM_TIMEOUT_SECONDS: float = 90.0
+    LLM_CONNECT_TIMEOUT_SECONDS: float = 10.0
+    # How long a request may wait for a free pooled connection
+    LLM_POOL_TIMEOUT_SECONDS: float = 30.0
+    # Provider quotas shared by every LLM call in this process; 0 disables a budget
+    LLM_REQUESTS_PER_MINUTE: int = 1000
+    LLM_TOKENS_PER_MINUTE: int = 1000000
+    # Adaptive concurrency: halves on 429/503, grows by ~1 per round of successes
+    LLM_CONCURRENCY_INITIAL: int = 8
+    LLM_CONCURRENCY_MIN: int = 1
+    LLM_CONCURRENCY_MAX: int = 64
+    # Retries of transient failures (timeouts, 429, 5xx) with full-jitter exponential backoff
+    LLM_RETRY_MAX_ATTEMPTS: int = 4
+    LLM_RETRY_BASE_DELAY_SECONDS: float = 0.5
+    LLM_RETRY_MAX_DELAY_SECONDS: float = 20.0
+    # Retries allowed per first attempt, so an outage cannot multiply traffic
+    LLM_RETRY_BUDGET_RATIO: float = 0.2
+    # Consecutive outage failures that open the circuit breaker, and how long it stays open
+    LLM_BREAKER_FAILURE_THRESHOLD: int = 10
+    LLM_BREAKER_RECOVERY_SECONDS: float = 30.0
+
+    # Fake LLM (LLM_PROVIDER="fake" or the standalone fake server)
+    # Latency distribution: "constant", "uniform" (mean +/- spread*mean) or "lognormal" (sigma = spread)
+    FAKE_LLM_LATENCY: str = "lognormal"
+    FAKE_LLM_LATENCY_MEAN_SECONDS: float = 0.5
+    FAKE_LLM_LATENCY_SPREAD: float = 0.5
+    # Share of requests answered with 503 / 429
+    FAKE_LLM_ERROR_RATE: float = 0.0
+    FAKE_LLM_RATE_LIMIT_RATE: float = 0.0
+    # Requests beyond this many in flight get a 429, like a provider quota; 0 disables it
+    FAKE_LLM_MAX_CONCURRENCY: int = 0
+    FAKE_LLM_SEED: int = 0
+
+    # AI grading
+    # Upper bound on LLM requests in flight during a single grading run.
+    GRADING_MAX_CONCURRENCY: int = 16
+    # Ungraded submissions loaded (and kept in memory) at a time during a grading run
+    GRADING_SUBMISSION_BATCH_SIZE: int = 200
+    # Longest a grading run waits in total for an open circuit breaker before giving up
+    GRADING_MAX_PAUSE_SECONDS: float = 900.0
+    # Grade answers that match after case/whitespace normalization only once per question
+    GRADING_DEDUP_ENABLED: bool = True
+    # When set (e.g. 0.9), also merge near-identical answers by MinHash similarity
+    GRADING_DEDUP_SIMILARITY_THRESHOLD: float | None = None
+    # Answers to the same question packed into one grading request; 1 grades answers one by one
+    GRADING_BATCH_SIZE: int = 10
+    # Budget of answer text per batched request; larger batches are split
+    GRADING_BATCH_MAX_CHARS: int = 30000
+    # Reuse stored results for identical (question, answer, rules, marks, model) inputs
+    GRADING_CACHE_ENABLED: bool = True
+    # Entries kept in the in-process LRU in front of the grading_cache table; 0 disables it
+    GRADING_CACHE_LRU_SIZE: int = 10000
+
+    # Background grading jobs
+    # Set to False on API workers when grading runs in a separate worker process.
+    GRADING_WORKER_ENABLED: bool = True
+    GRADING_WORKER_POLL_SECONDS: float = 5.0
+    GRADING_JOB_HEARTBEAT_SECONDS: float = 2.0
+    # A running job without a heartbeat for this long is requeued.
+    GRADING_JOB_STALE_SECONDS: int = 300
+
     # model_config = SettingsConfigDict(env_file=".env")
     model_config = SettingsConfigDict(
         env_file=os.path.join(os.path.dirname(__file__), '..', '..', '..', '.env')
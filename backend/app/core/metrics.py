@@ -0,0 +1,234 @@
+# app/core/metrics.py
+
+"""
+Prometheus metrics for the API, the database pools, LLM calls and the grading
+queue, served at /metrics.
+
+With several uvicorn workers, point PROMETHEUS_MULTIPROC_DIR at an empty
+directory (cleared before every start) in each worker's environment. Each
+process then writes its samples there, and /metrics aggregates all of them
+whichever worker serves the scrape. Without it, /metrics reports this process only.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+from app.core.config import settings
+from app.db.query_stats import route_template
+from app.db.session import SessionLocal, pool_stats
+
+logger = logging.getLogger(__name__)
+
+# prometheus_client picks its storage when first imported, from this variable
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+# --- HTTP ---
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Time to serve an HTTP request, by route template",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "HTTP requests being served", multiprocess_mode="livesum"
+)
+
+# --- Database connection pools (copied from pool_stats() by refresh_pool_metrics) ---
+
+DB_POOL_SIZE = Gauge("db_pool_size", "Configured pool size", ["pool"], multiprocess_mode="livesum")
+DB_POOL_CONNECTIONS = Gauge(
+    "db_pool_connections", "Pooled connections by state", ["pool", "state"], multiprocess_mode="livesum"
+)
+DB_POOL_CHECKOUTS = Counter("db_pool_checkouts", "Connection checkouts", ["pool"])
+DB_POOL_WAITS = Counter("db_pool_waits", "Checkouts that had to wait for a free connection", ["pool"])
+DB_POOL_WAIT_SECONDS = Counter("db_pool_wait_seconds", "Time spent waiting for a free connection", ["pool"])
+DB_POOL_TIMEOUTS = Counter("db_pool_timeouts", "Checkouts that gave up waiting", ["pool"])
+
+_POOL_COUNTERS = {
+    "checkouts": DB_POOL_CHECKOUTS,
+    "waits": DB_POOL_WAITS,
+    "wait_seconds_total": DB_POOL_WAIT_SECONDS,
+    "timeouts": DB_POOL_TIMEOUTS,
+}
+
+# --- LLM ---
+
+LLM_REQUEST_SECONDS = Histogram(
+    "llm_request_duration_seconds",
+    "Time for an LLM call including retries, by operation (grade, feedback, schedule, questions)",
+    ["operation", "outcome"],
+    buckets=(0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0, 120.0),
+)
+LLM_ERRORS = Counter("llm_errors", "Failed LLM calls, by operation and error", ["operation", "error"])
+LLM_TOKENS = Counter("llm_tokens", "Tokens reported by the provider, by operation", ["operation", "kind"])
+
+# usageMetadata fields of a generateContent response
+_TOKEN_FIELDS = {"prompt": "promptTokenCount", "completion": "candidatesTokenCount", "total": "totalTokenCount"}
+
+def record_llm_call(
+    operation: str, seconds: float, *, usage: Dict[str, Any] | None = None, error: str | None = None
+) -> None:
+    LLM_REQUEST_SECONDS.labels(operation, "error" if error else "ok").observe(seconds)
+    if error:
+        LLM_ERRORS.labels(operation, error).inc()
+    for kind, field in _TOKEN_FIELDS.items():
+        count = (usage or {}).get(field)
+        if count:
+            LLM_TOKENS.labels(operation, kind).inc(count)
+
+# --- Pool refresh ---
+
+_pool_counters_seen: Dict[Tuple[str, str], float] = {}
+
+def refresh_pool_metrics() -> None:
+    """
+    Copies this process's pool stats into the metrics. Counters advance by the
+    change since the last refresh.
+    """
+    for pool, stats in pool_stats().items():
+        DB_POOL_SIZE.labels(pool).set(stats["size"])
+        for state in ("checked_out", "checked_in", "overflow"):
+            DB_POOL_CONNECTIONS.labels(pool, state).set(stats[state])
+        for name, counter in _POOL_COUNTERS.items():
+            seen = _pool_counters_seen.get((pool, name), 0)
+            if stats[name] > seen:
+                counter.labels(pool).inc(stats[name] - seen)
+            _pool_counters_seen[(pool, name)] = stats[name]
+
+async def refresh_periodically() -> None:
+    """
+    Keeps the pool metrics of this process current, so a scrape served by
+    another worker still sees them.
+    """
+    while True:
+        try:
+            refresh_pool_metrics()
+        except Exception:
+            logger.exception("Refreshing pool metrics failed")
+        await asyncio.sleep(settings.METRICS_REFRESH_SECONDS)
+
+# --- Grading queue (queried at scrape time: it is shared by every process) ---
+
+class GradingQueueCollector:
+    def collect(self):
+        from app.services import grading_job_service
+
+        try:
+            with SessionLocal() as db:
+                depth = grading_job_service.get_queue_depth(db)
+                oldest_queued_at = grading_job_service.get_oldest_queued_at(db)
+        except Exception:
+            logger.exception("Reading the grading queue for /metrics failed")
+            return
+
+        jobs = GaugeMetricFamily("grading_jobs", "Grading jobs waiting or running", labels=["status"])
+        for status, count in depth.items():
+            jobs.add_metric([status], count)
+        yield jobs
+
+        age = 0.0
+        if oldest_queued_at is not None:
+            if oldest_queued_at.tzinfo is None:
+                # SQLite drops the time zone; timestamps are stored in UTC
+                oldest_queued_at = oldest_queued_at.replace(tzinfo=timezone.utc)
+            age = max(0.0, (datetime.now(timezone.utc) - oldest_queued_at).total_seconds())
+        yield GaugeMetricFamily(
+            "grading_queue_oldest_job_age_seconds", "How long the oldest queued grading job has waited", value=age
+        )
+
+# --- LLM retries and circuit breaker (read at scrape time from the serving process) ---
+
+_BREAKER_STATES = ("closed", "open", "half_open")
+
+class LLMResilienceCollector:
+    def collect(self):
+        from app.services.llm_resilience import llm_resilience
+
+        breaker = llm_resilience.breaker
+        state = GaugeMetricFamily(
+            "llm_circuit_breaker_state", "1 for the current state of the LLM circuit breaker", labels=["state"]
+        )
+        for name in _BREAKER_STATES:
+            state.add_metric([name], 1 if breaker.state == name else 0)
+        yield state
+        yield CounterMetricFamily("llm_circuit_breaker_opened", "Times the LLM circuit breaker opened",
+            value=breaker.times_opened)
+        yield CounterMetricFamily("llm_circuit_breaker_rejected_calls",
+            "LLM calls refused without being sent because the breaker was open", value=breaker.rejected_calls)
+        yield CounterMetricFamily("llm_calls", "LLM calls made through the retry policy", value=llm_resilience.calls)
+        yield CounterMetricFamily("llm_retries", "Retried LLM call attempts", value=llm_resilience.retries)
+        yield CounterMetricFamily("llm_retry_budget_exhausted",
+            "Retries skipped because the retry budget was spent", value=llm_resilience.budget_exhausted)
+        yield CounterMetricFamily("llm_give_ups", "Retryable LLM failures given up on once attempts or the retry budget ran out",
+            value=llm_resilience.give_ups)
+
+_queue_registry = CollectorRegistry(auto_describe=False)
+_queue_registry.register(GradingQueueCollector())
+_queue_registry.register(LLMResilienceCollector())
+
+def render() -> Tuple[bytes, str]:
+    """
+    The exposition text for a scrape, and its content type.
+    """
+    refresh_pool_metrics()
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry) + generate_latest(_queue_registry), CONTENT_TYPE_LATEST
+
+def mark_process_dead() -> None:
+    """
+    Drops this process's live gauges (in-flight requests, pool connections) on shutdown.
+    """
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
+
+class MetricsMiddleware:
+    """
+    Records in-flight requests and request latency by method, route template and status.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            HTTP_REQUEST_SECONDS.labels(scope["method"], route_template(scope), str(status)).observe(
+                time.perf_counter() - started
+            )
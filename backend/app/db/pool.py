@@ -0,0 +1,103 @@
+# app/db/pool.py
+
+import logging
+import time
+from typing import Any, Dict
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class PoolStats:
+    """
+    Counters for one connection pool. A checkout "waits" when every connection,
+    overflow included, was already in use when it was requested.
+    """
+
+    def __init__(self):
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.timeouts = 0
+        self.overflow_events = 0
+
+    def record_wait(self, seconds: float) -> None:
+        self.waits += 1
+        self.wait_seconds_total += seconds
+        self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+
+class _InstrumentedPoolMixin:
+    """
+    Times every checkout of a QueuePool. Saturation shows up as waits (and, past
+    DB_POOL_TIMEOUT_SECONDS, timeouts); bursts above pool_size as overflow events.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        at_capacity = self._max_overflow > -1 and self.checkedout() >= self.size() + self._max_overflow
+        overflow_before = self.overflow()
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.timeouts += 1
+            self.stats.record_wait(time.perf_counter() - started)
+            raise
+
+        self.stats.checkouts += 1
+        if at_capacity:
+            waited = time.perf_counter() - started
+            self.stats.record_wait(waited)
+            if waited >= settings.DB_POOL_WAIT_WARN_SECONDS:
+                logger.warning(
+                    "Waited %.2fs for a database connection (pool size %d, max overflow %d)",
+                    waited, self.size(), self._max_overflow,
+                )
+        if self.overflow() > max(overflow_before, 0):
+            self.stats.overflow_events += 1
+        return connection
+
+    def stats_dict(self) -> Dict[str, Any]:
+        return {
+            "size": self.size(),
+            "checked_out": self.checkedout(),
+            "checked_in": self.checkedin(),
+            "overflow": max(self.overflow(), 0),
+            "checkouts": self.stats.checkouts,
+            "waits": self.stats.waits,
+            "wait_seconds_total": round(self.stats.wait_seconds_total, 4),
+            "wait_seconds_max": round(self.stats.wait_seconds_max, 4),
+            "timeouts": self.stats.timeouts,
+            "overflow_events": self.stats.overflow_events,
+        }
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_options() -> Dict[str, Any]:
+    """
+    Pool configuration shared by the sync and async engines. Each engine has its
+    own pool, so one process may open up to 2 x (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+    connections; multiply by the number of workers to size against max_connections.
+    """
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
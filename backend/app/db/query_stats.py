@@ -0,0 +1,183 @@
+# app/db/query_stats.py
+
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+QUERY_COUNT_HEADER = "X-DB-Query-Count"
+QUERY_TIME_HEADER = "X-DB-Query-Time-Ms"
+
+# Slow statements are logged up to this many characters
+_STATEMENT_LOG_CHARS = 2000
+
+@dataclass
+class RequestQueryStats:
+    """
+    Statements issued while serving one request, on either engine.
+    """
+    queries: int = 0
+    seconds: float = 0.0
+    slow_queries: int = 0
+
+# Set by QueryStatsMiddleware for the duration of a request. Sync endpoints run in
+# a copy of the request's context and async sessions propagate it into their
+# greenlets, so both see the same object. Statements outside a request (the
+# grading worker, CLIs) are only subject to the slow-query log.
+_current_request: ContextVar[RequestQueryStats | None] = ContextVar("current_request_query_stats", default=None)
+
+def _redact(parameters: Any) -> Any:
+    """
+    Bound parameters with every value replaced by its type name, so logs show
+    the shape of a statement's input but never its data.
+    """
+    if isinstance(parameters, dict):
+        return {name: _redact(value) for name, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_redact(value) for value in parameters]
+    return f"<{type(parameters).__name__}>"
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = time.perf_counter() - conn.info["query_started_at"].pop()
+    request_stats = _current_request.get()
+    slow = settings.SLOW_QUERY_THRESHOLD_MS > 0 and elapsed * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS
+    if request_stats is not None:
+        request_stats.queries += 1
+        request_stats.seconds += elapsed
+        request_stats.slow_queries += slow
+    if slow:
+        logger.warning(
+            "Slow query (%.1f ms): %s; parameters: %s",
+            elapsed * 1000, statement[:_STATEMENT_LOG_CHARS], _redact(parameters),
+        )
+
+def _handle_error(exception_context) -> None:
+    # A failed statement never reaches after_cursor_execute
+    started = exception_context.connection.info.get("query_started_at") if exception_context.connection else None
+    if started:
+        started.pop()
+
+def install(engine: Engine) -> None:
+    """
+    Hooks statement counting and timing into an engine (for an async engine, pass
+    its sync_engine).
+    """
+    if not settings.QUERY_STATS_ENABLED:
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class RouteQueryStats:
+    """
+    Statement counts and DB time aggregated per route template, so a route whose
+    statement count grows with its data (an N+1) stands out.
+    """
+
+    def __init__(self):
+        self._routes: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, route: str, stats: RequestQueryStats) -> None:
+        with self._lock:
+            totals = self._routes.setdefault(route, {
+                "requests": 0, "queries": 0, "queries_max": 0, "db_seconds": 0.0, "db_seconds_max": 0.0,
+                "slow_queries": 0,
+            })
+            totals["requests"] += 1
+            totals["queries"] += stats.queries
+            totals["queries_max"] = max(totals["queries_max"], stats.queries)
+            totals["db_seconds"] += stats.seconds
+            totals["db_seconds_max"] = max(totals["db_seconds_max"], stats.seconds)
+            totals["slow_queries"] += stats.slow_queries
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """
+        One entry per route, the routes issuing the most statements first.
+        """
+        with self._lock:
+            routes = {route: dict(totals) for route, totals in self._routes.items()}
+        return sorted((
+            {
+                "route": route,
+                "requests": totals["requests"],
+                "queries_per_request": round(totals["queries"] / totals["requests"], 2),
+                "queries_max": totals["queries_max"],
+                "db_ms_per_request": round(totals["db_seconds"] * 1000 / totals["requests"], 2),
+                "db_ms_max": round(totals["db_seconds_max"] * 1000, 2),
+                "slow_queries": totals["slow_queries"],
+            }
+            for route, totals in routes.items()
+        ), key=lambda entry: entry["queries_per_request"], reverse=True)
+
+route_query_stats = RouteQueryStats()
+
+def route_template(scope) -> str:
+    """
+    The path template of the route that served a request, e.g.
+    /api/teacher/exams/{exam_id}, so requests aggregate per endpoint rather than per URL.
+    """
+    if scope.get("route") is None:
+        return "unmatched"
+    # The matched route only knows its path relative to its router, so rebuild
+    # the full template by putting each path parameter back into the path.
+    names = {str(value): name for name, value in scope.get("path_params", {}).items()}
+    return "/".join(
+        f"{{{names[segment]}}}" if segment in names else segment
+        for segment in scope["path"].split("/")
+    )
+
+class QueryStatsMiddleware:
+    """
+    Counts the statements and DB time of each HTTP request, records them per
+    route, warns about requests above QUERY_COUNT_WARN_THRESHOLD and, with
+    QUERY_STATS_HEADERS, reports them in response headers.
+
+    Statements issued after the response has started (streamed bodies,
+    background tasks) count towards the route but not the headers.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.QUERY_STATS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats()
+        token = _current_request.set(stats)
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start" and settings.QUERY_STATS_HEADERS:
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (QUERY_COUNT_HEADER.lower().encode(), str(stats.queries).encode()),
+                    (QUERY_TIME_HEADER.lower().encode(), f"{stats.seconds * 1000:.2f}".encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _current_request.reset(token)
+            route = route_template(scope)
+            route_query_stats.record(route, stats)
+            if 0 < settings.QUERY_COUNT_WARN_THRESHOLD < stats.queries:
+                logger.warning(
+                    "%s %s issued %d statements (%.1f ms in the database)",
+                    scope["method"], route, stats.queries, stats.seconds * 1000,
+                )
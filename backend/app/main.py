@@ -1,10 +1,44 @@
 # app/main.py
 
-from fastapi import FastAPI
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from app.api.pagination import NEXT_CURSOR_HEADER
 from app.api.router import api_router
+from app.core import metrics
+from app.core.config import settings
+from app.db.query_stats import QueryStatsMiddleware, route_query_stats
+from app.db.session import async_engine
+from app.services import llm_client, llm_provider
+from app.services.grading_worker import grading_worker
+from app.services.password_hasher import password_hasher
+from app.services.user_cache import user_cache
 
-app = FastAPI(title="Shikshak API")
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await llm_client.start_llm_client()
+    # Background grading runs alongside the API unless a dedicated worker process is used
+    if settings.GRADING_WORKER_ENABLED:
+        grading_worker.start()
+    metrics_refresher = asyncio.create_task(metrics.refresh_periodically()) if settings.METRICS_ENABLED else None
+    yield
+    if metrics_refresher:
+        metrics_refresher.cancel()
+        metrics.mark_process_dead()
+    await grading_worker.stop()
+    await llm_provider.close_llm_provider()
+    await llm_client.close_llm_client()
+    await async_engine.dispose()
+    password_hasher.shutdown()
+    logger.info("User cache: %s", user_cache.stats())
+    logger.info("Password hasher: %s", password_hasher.stats())
+    logger.info("Queries per route: %s", route_query_stats.stats())
+
+app = FastAPI(title="Shikshak API", lifespan=lifespan)
 
 # CORS (Cross-Origin Resource Sharing)
 app.add_middleware(
@@ -13,8 +47,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Lets the frontend read the cursor of the next page of a list
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
+# Statement counts and DB time per request and per route
+app.add_middleware(QueryStatsMiddleware)
+
+if settings.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+
+    @app.get("/metrics", include_in_schema=False)
+    def read_metrics():
+        content, content_type = metrics.render()
+        return Response(content=content, media_type=content_type)
+
 app.include_router(api_router, prefix="/api")
 
 @app.get("/", tags=["Root"])
@@ -0,0 +1,49 @@
+# app/models/analytics_rollup.py
+
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer, String
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+# Running totals behind the teacher dashboards, maintained by analytics_rollup_service
+# as submissions are created and graded. They can always be rebuilt from the raw tables.
+
+class _ScoreTotals:
+    # Every submission, graded or not
+    submissions = Column(Integer, nullable=False, default=0)
+    graded_submissions = Column(Integer, nullable=False, default=0)
+    # Sums over graded submissions
+    earned_marks = Column(Float, nullable=False, default=0)
+    total_marks = Column(Float, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class CourseAnalyticsRollup(_ScoreTotals, Base):
+    __tablename__ = "course_analytics_rollups"
+
+    course_id = Column(UUID(as_uuid=True), ForeignKey("courses.id", ondelete="CASCADE"), primary_key=True)
+
+
+class TopicAnalyticsRollup(_ScoreTotals, Base):
+    __tablename__ = "topic_analytics_rollups"
+
+    topic_id = Column(UUID(as_uuid=True), ForeignKey("course_schedule.id", ondelete="CASCADE"), primary_key=True)
+    course_id = Column(UUID(as_uuid=True), ForeignKey("courses.id", ondelete="CASCADE"), nullable=False, index=True)
+
+
+class ExamAnalyticsRollup(_ScoreTotals, Base):
+    __tablename__ = "exam_analytics_rollups"
+
+    exam_id = Column(UUID(as_uuid=True), ForeignKey("exams.id", ondelete="CASCADE"), primary_key=True)
+    topic_id = Column(UUID(as_uuid=True), ForeignKey("course_schedule.id", ondelete="CASCADE"), nullable=False)
+    course_id = Column(UUID(as_uuid=True), ForeignKey("courses.id", ondelete="CASCADE"), nullable=False, index=True)
+
+
+class ErrorTypeRollup(Base):
+    __tablename__ = "error_type_rollups"
+
+    course_id = Column(UUID(as_uuid=True), ForeignKey("courses.id", ondelete="CASCADE"), primary_key=True)
+    error_type = Column(String, primary_key=True)
+    # Answers of graded submissions with this error type
+    answers = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
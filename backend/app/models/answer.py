@@ -1,7 +1,7 @@
 # app/models/answer.py
 
 import uuid
-from sqlalchemy import Column, ForeignKey, Text, String
+from sqlalchemy import Column, Enum, Float, ForeignKey, Text, String
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from app.db.base import Base
@@ -15,10 +15,19 @@ class Answer(Base):
     # AI-populated fields (will be null initially)
     feedback = Column(Text, nullable=True)
     error_type = Column(String, nullable=True) # e.g., conceptual, procedural
+    awarded_marks = Column(Float, nullable=True)
+    # Committed as soon as the answer is graded, so an interrupted run resumes where it stopped
+    grading_status = Column(
+        Enum("pending", "graded", "failed", name="answer_grading_status"),
+        nullable=False,
+        default="pending",
+        server_default="pending",
+        index=True,
+    )
 
     # Foreign Keys
-    submission_id = Column(UUID(as_uuid=True), ForeignKey("submissions.id"))
-    question_id = Column(UUID(as_uuid=True), ForeignKey("questions.id"))
+    submission_id = Column(UUID(as_uuid=True), ForeignKey("submissions.id"), index=True)
+    question_id = Column(UUID(as_uuid=True), ForeignKey("questions.id"), index=True)
 
     # Relationships
     submission = relationship("Submission", back_populates="answers")
@@ -1,7 +1,7 @@
 # app/models/course.py
 
 import uuid
-from sqlalchemy import Column, String, ForeignKey
+from sqlalchemy import Column, String, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from app.db.base import Base
@@ -11,8 +11,8 @@ class Course(Base):
     __tablename__ = "courses"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    course_name = Column(String, index=True, nullable=False)
-    teacher_id = Column(UUID(as_uuid=True), ForeignKey("users.id"))
+    course_name = Column(String, nullable=False)
+    teacher_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), index=True)
     
     # Existing relationships
     teacher = relationship("User", back_populates="courses_taught")
@@ -25,3 +25,8 @@ class Course(Base):
         back_populates="courses_enrolled"
     )
 
+    __table_args__ = (
+        # The course catalogue pages through courses by name; id breaks ties
+        Index("ix_courses_course_name_id", "course_name", "id"),
+    )
+
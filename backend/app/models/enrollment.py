@@ -1,6 +1,6 @@
 # app/models/enrollment.py
 
-from sqlalchemy import Table, Column, ForeignKey
+from sqlalchemy import Table, Column, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from app.db.base import Base
 
@@ -10,5 +10,7 @@ enrollment = Table(
     'enrollment',
     Base.metadata,
     Column('student_id', UUID(as_uuid=True), ForeignKey('users.id'), primary_key=True),
-    Column('course_id', UUID(as_uuid=True), ForeignKey('courses.id'), primary_key=True)
+    Column('course_id', UUID(as_uuid=True), ForeignKey('courses.id'), primary_key=True),
+    # The primary key leads with student_id; lookups by course need their own index
+    Index('ix_enrollment_course_id', 'course_id'),
 )
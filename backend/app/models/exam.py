@@ -14,7 +14,7 @@ class Exam(Base):
     status = Column(Enum("draft", "published", name="exam_status"), nullable=False, default="draft")
     grading_rules = Column(Text, nullable=True) 
 
-    topic_id = Column(UUID(as_uuid=True), ForeignKey("course_schedule.id"))
+    topic_id = Column(UUID(as_uuid=True), ForeignKey("course_schedule.id"), index=True)
 
     # Relationships
     topic = relationship("CourseSchedule", back_populates="exams")
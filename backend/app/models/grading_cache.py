@@ -0,0 +1,20 @@
+# app/models/grading_cache.py
+
+from sqlalchemy import Column, DateTime, String, JSON
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+class GradingCacheEntry(Base):
+    __tablename__ = "grading_cache"
+
+    # sha256 of (model, question_text, answer_text, grading_rules, marks)
+    cache_key = Column(String(64), primary_key=True)
+    model = Column(String, nullable=False)
+    # The AIFeedback returned by the model, as JSON
+    feedback = Column(JSON, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Exam the entry was produced for; used to drop entries when its grading rules change.
+    # Not a foreign key so deleting an exam never has to wait on the cache.
+    exam_id = Column(UUID(as_uuid=True), nullable=True, index=True)
@@ -0,0 +1,50 @@
+# app/models/grading_job.py
+
+import uuid
+from sqlalchemy import Column, ForeignKey, DateTime, Integer, Text, Enum, Index
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+class GradingJob(Base):
+    __tablename__ = "grading_jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    status = Column(
+        Enum("queued", "running", "completed", "failed", name="grading_job_status"),
+        nullable=False,
+        default="queued",
+        index=True,
+    )
+
+    # Progress, counted in submissions
+    total = Column(Integer, nullable=False, default=0)
+    done = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    # Refreshed by the worker while the job runs; a stale heartbeat means the worker died.
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+
+    # Foreign Keys
+    exam_id = Column(UUID(as_uuid=True), ForeignKey("exams.id"), index=True)
+    requested_by_id = Column(UUID(as_uuid=True), ForeignKey("users.id"))
+
+    # Relationships
+    exam = relationship("Exam")
+    requested_by = relationship("User")
+
+    __table_args__ = (
+        # At most one queued or running job per exam, even when two grade-all requests race
+        Index(
+            "ix_grading_jobs_active_exam_id",
+            "exam_id",
+            unique=True,
+            postgresql_where=status.in_(("queued", "running")),
+            sqlite_where=status.in_(("queued", "running")),
+        ),
+    )
@@ -11,7 +11,7 @@ class Question(Base):
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     question_text = Column(Text, nullable=False)
-    exam_id = Column(UUID(as_uuid=True), ForeignKey("exams.id"))
+    exam_id = Column(UUID(as_uuid=True), ForeignKey("exams.id"), index=True)
 
     # Relationships
     exam = relationship("Exam", back_populates="questions")
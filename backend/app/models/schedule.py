@@ -12,8 +12,8 @@ class CourseSchedule(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     topic_name = Column(String, nullable=False)
     topic_description = Column(Text)
-    end_date = Column(Date, nullable=False)
-    course_id = Column(UUID(as_uuid=True), ForeignKey("courses.id"))
+    end_date = Column(Date, nullable=False, index=True)
+    course_id = Column(UUID(as_uuid=True), ForeignKey("courses.id"), index=True)
 
     # Existing relationship
     course = relationship("Course", back_populates="schedule")
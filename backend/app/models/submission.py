@@ -1,7 +1,7 @@
 # app/models/submission.py
 
 import uuid
-from sqlalchemy import Column, ForeignKey, DateTime, Float, Text, JSON
+from sqlalchemy import Column, ForeignKey, DateTime, Float, Index, Text, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -14,11 +14,12 @@ class Submission(Base):
     submitted_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # AI-populated fields (will be null initially)
-    # overall_score stores [earned_marks, total_marks] as JSON
-    overall_score = Column(JSON, nullable=True)
+    earned_marks = Column(Float, nullable=True)
+    total_marks = Column(Float, nullable=True)
     overall_feedback = Column(Text, nullable=True)
 
     # Foreign Keys
+    # Lookups by student or exam use the leading column of the indexes below
     student_id = Column(UUID(as_uuid=True), ForeignKey("users.id"))
     exam_id = Column(UUID(as_uuid=True), ForeignKey("exams.id"))
 
@@ -26,3 +27,27 @@ class Submission(Base):
     student = relationship("User", back_populates="submissions")
     exam = relationship("Exam", back_populates="submissions")
     answers = relationship("Answer", back_populates="submission", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        # One submission per student and exam, enforced even when two requests race
+        UniqueConstraint("student_id", "exam_id", name="uq_submissions_student_id_exam_id"),
+        # Submission lists page through an exam's or a student's rows newest first
+        Index("ix_submissions_exam_id_submitted_at", "exam_id", "submitted_at", "id"),
+        Index("ix_submissions_student_id_submitted_at", "student_id", "submitted_at", "id"),
+        # Grading reads an exam's ungraded submissions oldest first; graded rows drop out of the index
+        Index(
+            "ix_submissions_ungraded",
+            "exam_id", "submitted_at", "id",
+            postgresql_where=total_marks.is_(None),
+            sqlite_where=total_marks.is_(None),
+        ),
+    )
+
+    @property
+    def overall_score(self):
+        """
+        The [earned_marks, total_marks] pair the API has always serialized, or None if ungraded.
+        """
+        if self.total_marks is None:
+            return None
+        return [self.earned_marks, self.total_marks]
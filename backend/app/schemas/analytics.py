@@ -26,6 +26,52 @@ class CourseAnalytics(BaseModel):
     class Config:
         from_attributes = True
 
+# --- Score distributions (scores are percentages of the marks available) ---
+
+class Histogram(BaseModel):
+    # bins + 1 edges over 0-100; the last bin includes 100
+    bin_edges: List[float]
+    counts: List[int]
+
+class ScoreDistribution(BaseModel):
+    count: int
+    mean: Optional[float] = None
+    std: Optional[float] = None
+    min: Optional[float] = None
+    q1: Optional[float] = None
+    median: Optional[float] = None
+    q3: Optional[float] = None
+    max: Optional[float] = None
+    histogram: Histogram
+
+class QuestionStatistics(BaseModel):
+    question_id: uuid.UUID
+    question_text: str
+    marks: int
+    answers: int
+    # Mean share of the question's marks earned, 0-1 (higher is easier)
+    difficulty: Optional[float] = None
+    # Difficulty among the top 27% of submissions minus the bottom 27%, -1 to 1
+    discrimination: Optional[float] = None
+    item_rest_correlation: Optional[float] = None
+
+class ExamDistribution(BaseModel):
+    exam_id: uuid.UUID
+    title: str
+    scores: ScoreDistribution
+    questions: List[QuestionStatistics] = []
+
+class ExamScoreDistribution(BaseModel):
+    exam_id: uuid.UUID
+    title: str
+    scores: ScoreDistribution
+
+class TopicDistribution(BaseModel):
+    topic_id: uuid.UUID
+    topic_name: str
+    scores: ScoreDistribution
+    exams: List[ExamScoreDistribution] = []
+
 class TopicPerformance(BaseModel):
     topic_id: uuid.UUID
     topic_name: str
@@ -21,3 +21,10 @@ class AIFeedback(BaseModel):
         ...,
         description="The primary type of error made. 'correct' if the answer is good."
     )
+
+# One element of a batched grading response; the model echoes the answer_id it was given.
+class AIBatchFeedbackItem(AIFeedback):
+    answer_id: str = Field(
+        ...,
+        description="The answer_id of the student answer this feedback is for, copied exactly from the input."
+    )
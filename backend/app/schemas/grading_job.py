@@ -0,0 +1,27 @@
+# app/schemas/grading_job.py
+
+import uuid
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Literal, Optional
+
+class GradingJob(BaseModel):
+    id: uuid.UUID
+    exam_id: uuid.UUID
+    status: Literal["queued", "running", "completed", "failed"]
+    # Progress is counted in submissions
+    total: int
+    done: int
+    failed: int
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+# Returned by the grade-all endpoint once the job has been queued
+class GradingJobEnqueued(BaseModel):
+    message: str
+    job: GradingJob
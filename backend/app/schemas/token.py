@@ -2,6 +2,7 @@
 
 from pydantic import BaseModel
 import uuid
+from typing import Literal
 
 class Token(BaseModel):
     access_token: str
@@ -9,3 +10,5 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     id: uuid.UUID | None = None
+    # Absent from tokens issued before the claim was added
+    role: Literal["teacher", "student"] | None = None
@@ -1,33 +1,81 @@
 # app/services/ai_service.py
 
+import asyncio
 import httpx
 import json
+import logging
 import pdfplumber
+import re
+import time
 from fastapi import HTTPException, UploadFile
+from app.core import metrics
 from app.core.config import settings
 from datetime import date
 from typing import List, Dict, Any
+from uuid import UUID
 
-from app.schemas.feedback import AIFeedback
+from app.schemas.feedback import AIFeedback, AIBatchFeedbackItem
+from app.services import llm_provider
+from app.services.grading_cache import grading_cache
+from app.services.llm_resilience import CircuitOpenError, llm_resilience
+from app.services.llm_throttle import estimate_tokens, llm_throttle
 
-# --- New Grading Functions ---
+logger = logging.getLogger(__name__)
 
-async def grade_single_answer(
-    question_text: str,
-    answer_text: str,
-    grading_rules: str,
-    marks: float
-) -> AIFeedback:
+# How providers word a 400 for a prompt over the model's input limit, e.g. Gemini's
+# "The input token count (…) exceeds the maximum number of tokens allowed (…)"
+_INPUT_TOO_LARGE = re.compile(
+    r"token count .* exceeds|exceeds the maximum number of tokens|maximum context length|too many tokens"
+    r"|context_length_exceeded|prompt is too long",
+    re.IGNORECASE,
+)
+
+async def _generate_content(payload: Dict[str, Any], operation: str) -> Dict[str, Any]:
     """
-    Calls Gemini API to grade a single student answer based on the teacher's rules.
-    This function enforces a strict JSON output using a response schema.
+    Sends a generateContent request to the configured LLM provider.
+
+    Transient failures are retried with backoff behind a circuit breaker, and each
+    attempt is admitted by the process-wide rate and concurrency limits.
+    Raises httpx.RequestError / httpx.HTTPStatusError once retries are exhausted,
+    or CircuitOpenError while the provider is considered down.
+    Latency, token usage and errors are recorded in the metrics under `operation`.
     """
-    api_url = (
-        f"https://generativelanguage.googleapis.com/v1beta/"
-        f"models/gemini-2.5-flash-preview-05-20:generateContent?key={settings.GEMINI_API_KEY}"
-    )
+    started = time.perf_counter()
+    try:
+        result = await llm_resilience.call(lambda: _send_generate_content(payload))
+    except Exception as e:
+        metrics.record_llm_call(operation, time.perf_counter() - started, error=_error_label(e))
+        raise
+    metrics.record_llm_call(operation, time.perf_counter() - started, usage=result.get("usageMetadata"))
+    return result
+
+def _error_label(error: Exception) -> str:
+    if isinstance(error, httpx.HTTPStatusError):
+        return f"http_{error.response.status_code}"
+    if isinstance(error, CircuitOpenError):
+        return "circuit_open"
+    if isinstance(error, httpx.TimeoutException):
+        return "timeout"
+    if isinstance(error, httpx.RequestError):
+        return "transport"
+    return type(error).__name__
+
+async def _send_generate_content(payload: Dict[str, Any]) -> Dict[str, Any]:
+    provider = llm_provider.get_llm_provider()
+    async with llm_throttle.slot(estimate_tokens(payload)) as slot:
+        try:
+            result = await provider.generate_content(payload)
+        except httpx.HTTPStatusError as e:
+            slot.observe(e.response.status_code)
+            raise
+        slot.observe(200)
+        slot.record_usage(result.get("usageMetadata", {}).get("totalTokenCount"))
+        return result
 
-    system_prompt = f"""
+# --- New Grading Functions ---
+
+def _grading_system_prompt(grading_rules: str, marks: float) -> str:
+    return f"""
     You are an expert AI teaching assistant. Your task is to grade a student's answer for a subjective exam question.
     - You will be given the Question, the Student's Answer, the Teacher's Grading Rules, and the total marks for the question.
     - Adhere strictly to the Teacher's Grading Rules when evaluating the answer.
@@ -42,6 +90,47 @@ async def grade_single_answer(
     Total Marks for this Question: {marks}
     """
 
+def _grading_cache_key(question_text: str, answer_text: str, grading_rules: str, marks: float) -> str:
+    return grading_cache.make_key(
+        question_text=question_text,
+        answer_text=answer_text,
+        grading_rules=grading_rules,
+        marks=marks,
+        model=llm_provider.get_llm_provider().model,
+    )
+
+async def grade_single_answer(
+    question_text: str,
+    answer_text: str,
+    grading_rules: str,
+    marks: float,
+    exam_id: UUID | None = None,
+) -> AIFeedback:
+    """
+    Calls Gemini API to grade a single student answer based on the teacher's rules.
+    This function enforces a strict JSON output using a response schema.
+
+    Results are cached by content, so identical answers to the same question under
+    the same rules are only sent to the model once.
+    """
+    cache_key = None
+    if settings.GRADING_CACHE_ENABLED:
+        cache_key = _grading_cache_key(question_text, answer_text, grading_rules, marks)
+        cached = await _cache_get(cache_key)
+        if cached is not None:
+            return cached
+
+    feedback = await _request_single_grade(question_text, answer_text, grading_rules, marks)
+
+    if cache_key is not None:
+        await _cache_put(cache_key, feedback, exam_id)
+    return feedback
+
+async def _request_single_grade(
+    question_text: str, answer_text: str, grading_rules: str, marks: float
+) -> AIFeedback:
+    system_prompt = _grading_system_prompt(grading_rules, marks)
+
     user_prompt = f"""
     Question: "{question_text}"
     Student's Answer: "{answer_text}"
@@ -57,11 +146,7 @@ async def grade_single_answer(
     }
 
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(api_url, json=payload, timeout=90.0)
-            response.raise_for_status()
-            
-        result = response.json()
+        result = await _generate_content(payload, "grade")
         content_text = result['candidates'][0]['content']['parts'][0]['text']
         feedback_data = json.loads(content_text)
         
@@ -72,9 +157,204 @@ async def grade_single_answer(
         raise HTTPException(status_code=502, detail=f"AI service communication error: {e}")
     except (json.JSONDecodeError, KeyError, IndexError) as e:
         raise HTTPException(status_code=500, detail=f"Failed to parse AI feedback response: {e}")
+    except CircuitOpenError:
+        # Not a grading failure: the caller should wait and retry later
+        raise
     except Exception as e:
          raise HTTPException(status_code=500, detail=f"An unexpected error occurred during AI grading: {e}")
 
+async def grade_answer_batch(
+    question_text: str,
+    answers: Dict[str, str],
+    grading_rules: str,
+    marks: float,
+    exam_id: UUID | None = None,
+) -> Dict[str, AIFeedback | Exception]:
+    """
+    Grades several answers to the same question with as few Gemini calls as possible.
+
+    `answers` maps a caller-chosen key to the answer text. Answers are packed into
+    requests of at most GRADING_BATCH_SIZE answers and GRADING_BATCH_MAX_CHARS of
+    answer text; the response schema is a list of AIFeedback objects keyed by answer_id.
+    A request rejected as too large is split in half and retried. Answers missing from
+    a response, or in a response that cannot be parsed, are graded one at a time.
+
+    Returns the feedback for every key, or the exception that prevented grading it.
+    """
+    results: Dict[str, AIFeedback | Exception] = {}
+    pending: Dict[str, str] = {}
+    cache_keys: Dict[str, str] = {}
+    cached: Dict[str, AIFeedback] = {}
+    if settings.GRADING_CACHE_ENABLED:
+        cache_keys = {
+            key: _grading_cache_key(question_text, answer_text, grading_rules, marks)
+            for key, answer_text in answers.items()
+        }
+        cached = await _cache_get_many(list(cache_keys.values()))
+    for key, answer_text in answers.items():
+        if key in cache_keys and cache_keys[key] in cached:
+            results[key] = cached[cache_keys[key]]
+        else:
+            pending[key] = answer_text
+
+    chunks = _chunk_answers(pending)
+    chunk_results = await asyncio.gather(*(
+        _grade_answer_chunk(question_text, chunk, grading_rules, marks)
+        for chunk in chunks
+    ))
+    fresh: Dict[str, AIFeedback] = {}
+    for chunk_result in chunk_results:
+        for key, feedback in chunk_result.items():
+            results[key] = feedback
+            if key in cache_keys and isinstance(feedback, AIFeedback):
+                fresh[cache_keys[key]] = feedback
+    await _cache_put_many(fresh, exam_id)
+    return results
+
+def _chunk_answers(answers: Dict[str, str]) -> List[Dict[str, str]]:
+    chunks: List[Dict[str, str]] = []
+    current: Dict[str, str] = {}
+    current_chars = 0
+    for key, answer_text in answers.items():
+        if current and (
+            len(current) >= settings.GRADING_BATCH_SIZE
+            or current_chars + len(answer_text) > settings.GRADING_BATCH_MAX_CHARS
+        ):
+            chunks.append(current)
+            current, current_chars = {}, 0
+        current[key] = answer_text
+        current_chars += len(answer_text)
+    if current:
+        chunks.append(current)
+    return chunks
+
+def _is_input_too_large(error: httpx.HTTPStatusError) -> bool:
+    """
+    Whether the provider refused a request because its prompt is too large, as
+    opposed to any other bad request (invalid key, schema or content).
+    """
+    if error.response.status_code == 413:
+        return True
+    if error.response.status_code != 400:
+        return False
+    try:
+        body = error.response.text
+    except httpx.ResponseNotRead:
+        return False
+    return bool(_INPUT_TOO_LARGE.search(body))
+
+async def _grade_answer_chunk(
+    question_text: str,
+    answers: Dict[str, str],
+    grading_rules: str,
+    marks: float,
+) -> Dict[str, AIFeedback | Exception]:
+    if len(answers) == 1:
+        (key, answer_text), = answers.items()
+        try:
+            return {key: await _request_single_grade(question_text, answer_text, grading_rules, marks)}
+        except Exception as e:
+            return {key: e}
+
+    # Short positional ids keep the prompt small; they are mapped back to the caller's keys.
+    local_ids = {f"a{i}": key for i, key in enumerate(answers, start=1)}
+    system_prompt = _grading_system_prompt(grading_rules, marks) + """
+    You will be given several students' answers to the same question, each with an answer_id.
+    Grade each answer independently of the others and return one feedback object per answer,
+    with its answer_id copied exactly.
+    """
+    user_prompt = f"""
+    Question: "{question_text}"
+    Students' Answers:
+    {json.dumps([{"answer_id": local_id, "answer": answers[key]} for local_id, key in local_ids.items()], ensure_ascii=False)}
+    """
+
+    payload = {
+        "contents": [{"parts": [{"text": user_prompt}]}],
+        "systemInstruction": {"parts": [{"text": system_prompt}]},
+        "generationConfig": {
+            "responseMimeType": "application/json",
+            "responseSchema": {"type": "array", "items": AIBatchFeedbackItem.model_json_schema()}
+        }
+    }
+
+    try:
+        result = await _generate_content(payload, "grade")
+    except httpx.HTTPStatusError as e:
+        if _is_input_too_large(e):
+            # Over the model's input limit; halve and retry. Any other 400 would fail the same way.
+            keys = list(answers)
+            halves = await asyncio.gather(*(
+                _grade_answer_chunk(question_text, {k: answers[k] for k in part}, grading_rules, marks)
+                for part in (keys[:len(keys) // 2], keys[len(keys) // 2:])
+            ))
+            return {**halves[0], **halves[1]}
+        error = HTTPException(status_code=502, detail=f"AI service communication error: {e}")
+        return {key: error for key in answers}
+    except httpx.RequestError as e:
+        error = HTTPException(status_code=502, detail=f"AI service communication error: {e}")
+        return {key: error for key in answers}
+
+    graded: Dict[str, AIFeedback | Exception] = {}
+    try:
+        content_text = result['candidates'][0]['content']['parts'][0]['text']
+        items = json.loads(content_text)
+        if not isinstance(items, list):
+            raise ValueError("LLM returned malformed data, not a list.")
+    except (json.JSONDecodeError, KeyError, IndexError, ValueError) as e:
+        logger.warning("Unparseable batch grading response, grading %d answers singly: %s", len(answers), e)
+        items = []
+
+    for item in items:
+        try:
+            parsed = AIBatchFeedbackItem(**item)
+        except Exception:
+            continue
+        key = local_ids.get(parsed.answer_id)
+        if key is not None and key not in graded:
+            graded[key] = AIFeedback(**parsed.model_dump(exclude={"answer_id"}))
+
+    missing = [key for key in answers if key not in graded]
+    if missing:
+        fallbacks = await asyncio.gather(
+            *(_request_single_grade(question_text, answers[key], grading_rules, marks) for key in missing),
+            return_exceptions=True,
+        )
+        graded.update(zip(missing, fallbacks))
+    return graded
+
+async def _cache_get(cache_key: str) -> AIFeedback | None:
+    try:
+        return await grading_cache.get(cache_key)
+    except Exception as e:
+        logger.warning("Grading cache lookup failed: %s", e)
+        return None
+
+async def _cache_get_many(cache_keys: List[str]) -> Dict[str, AIFeedback]:
+    try:
+        return await grading_cache.get_many(cache_keys)
+    except Exception as e:
+        logger.warning("Grading cache lookup failed: %s", e)
+        return {}
+
+async def _cache_put_many(entries: Dict[str, AIFeedback], exam_id: UUID | None) -> None:
+    if not entries:
+        return
+    try:
+        await grading_cache.put_many(
+            entries, exam_id=exam_id, model=llm_provider.get_llm_provider().model
+        )
+    except Exception as e:
+        logger.warning("Failed to store grading results in cache: %s", e)
+
+async def _cache_put(cache_key: str, feedback: AIFeedback, exam_id: UUID | None) -> None:
+    try:
+        await grading_cache.put(
+            cache_key, feedback, exam_id=exam_id, model=llm_provider.get_llm_provider().model
+        )
+    except Exception as e:
+        logger.warning("Failed to store grading result in cache: %s", e)
+
 
 async def generate_overall_feedback(
     graded_answers: List[Dict[str, Any]],
@@ -82,11 +362,9 @@ async def generate_overall_feedback(
 ) -> str:
     """
     Calls Gemini API to generate summary feedback for an entire exam submission.
+    Falls back to a generic message on failure, except while the circuit breaker
+    is open, when CircuitOpenError is raised so grading can be resumed later.
     """
-    api_url = (
-        f"https://generativelanguage.googleapis.com/v1beta/"
-        f"models/gemini-2.5-flash-preview-05-20:generateContent?key={settings.GEMINI_API_KEY}"
-    )
     
     system_prompt = """
     You are an encouraging and insightful AI teaching assistant.
@@ -136,13 +414,11 @@ async def generate_overall_feedback(
     }
 
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(api_url, json=payload, timeout=90.0)
-            response.raise_for_status()
-        
-        result = response.json()
+        result = await _generate_content(payload, "feedback")
         return result['candidates'][0]['content']['parts'][0]['text']
 
+    except CircuitOpenError:
+        raise
     except Exception:
         # If summary generation fails, return a generic message instead of crashing.
         return "Your submission has been graded. Please review the feedback for each question."
@@ -165,11 +441,6 @@ async def generate_schedule_from_syllabus(file: UploadFile) -> List[Dict]:
             detail="Could not extract text from PDF. The file might be empty or image-based."
         )
 
-    api_url = (
-        f"https://generativelanguage.googleapis.com/v1beta/"
-        f"models/gemini-2.5-flash-preview-05-20:generateContent?key={settings.GEMINI_API_KEY}"
-    )
-
     current_date = date.today().strftime("%Y-%m-%d")
 
     system_prompt = f"""
@@ -187,9 +458,9 @@ async def generate_schedule_from_syllabus(file: UploadFile) -> List[Dict]:
     }
 
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(api_url, json=payload, timeout=60.0)
-            response.raise_for_status()
+        result = await _generate_content(payload, "schedule")
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except (httpx.RequestError, httpx.HTTPStatusError) as e:
         raise HTTPException(
             status_code=502,
@@ -197,7 +468,6 @@ async def generate_schedule_from_syllabus(file: UploadFile) -> List[Dict]:
         )
 
     try:
-        result = response.json()
         content_text = result['candidates'][0]['content']['parts'][0]['text']
         if content_text.startswith("```json"):
             content_text = content_text.removeprefix("```json").removesuffix("```").strip()
@@ -222,11 +492,6 @@ async def generate_exam_questions(course_name: str, topic_name: str) -> List[str
     """
     Calls Gemini API to generate 10 subjective exam questions for a given topic.
     """
-    api_url = (
-        f"https://generativelanguage.googleapis.com/v1beta/"
-        f"models/gemini-2.5-flash-preview-05-20:generateContent?key={settings.GEMINI_API_KEY}"
-    )
-
     system_prompt = f"""
     You are a university-level academic assistant. Your task is to create a 10-question subjective, open-ended exam for the course '{course_name}' focusing specifically on the topic '{topic_name}'.
     - The questions should encourage critical thinking and detailed explanations, not simple one-word answers.
@@ -241,9 +506,9 @@ async def generate_exam_questions(course_name: str, topic_name: str) -> List[str
     }
 
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(api_url, json=payload, timeout=90.0)
-            response.raise_for_status()
+        result = await _generate_content(payload, "questions")
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except (httpx.RequestError, httpx.HTTPStatusError) as e:
         raise HTTPException(
             status_code=502,
@@ -251,7 +516,6 @@ async def generate_exam_questions(course_name: str, topic_name: str) -> List[str
         )
 
     try:
-        result = response.json()
         content_text = result['candidates'][0]['content']['parts'][0]['text']
         if content_text.startswith("```json"):
             content_text = content_text.removeprefix("```json").removesuffix("```").strip()
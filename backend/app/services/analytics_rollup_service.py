@@ -0,0 +1,278 @@
+# app/services/analytics_rollup_service.py
+
+"""
+Incrementally maintained analytics totals per exam, topic, course and error type.
+
+Creating a submission adds one to its exam, topic and course rows; grading it
+adds its marks and its answers' error types, in the same transaction that stores
+the grade. Dashboards then read a handful of rows instead of aggregating answers.
+
+Rows can drift if data is changed outside those paths (deleted questions, manual
+fixes), so the totals can be checked against, and rebuilt from, the raw tables:
+
+    python -m app.services.analytics_rollup_service check [--course-id ID]
+    python -m app.services.analytics_rollup_service rebuild [--course-id ID]
+
+Rebuild while no grading is running: increments made during a rebuild are lost.
+"""
+
+import argparse
+import json
+import logging
+import sys
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+from uuid import UUID
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.analytics_rollup import (
+    CourseAnalyticsRollup,
+    ErrorTypeRollup,
+    ExamAnalyticsRollup,
+    TopicAnalyticsRollup,
+)
+from app.models.answer import Answer
+from app.models.exam import Exam
+from app.models.schedule import CourseSchedule
+from app.models.submission import Submission
+
+logger = logging.getLogger(__name__)
+
+_UPSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+_SCORE_COUNTERS = ("submissions", "graded_submissions", "earned_marks", "total_marks")
+_COUNTERS = {
+    ExamAnalyticsRollup: _SCORE_COUNTERS,
+    TopicAnalyticsRollup: _SCORE_COUNTERS,
+    CourseAnalyticsRollup: _SCORE_COUNTERS,
+    ErrorTypeRollup: ("answers",),
+}
+
+# Floating point sums are compared with this tolerance
+_MARKS_TOLERANCE = 1e-6
+
+@dataclass(frozen=True)
+class RollupScope:
+    """
+    The rows a submission counts towards.
+    """
+    exam_id: UUID
+    topic_id: UUID
+    course_id: UUID
+
+    @classmethod
+    def for_exam(cls, exam: Exam) -> "RollupScope | None":
+        """Needs exam.topic loaded; None for an exam without a topic."""
+        if exam.topic is None:
+            return None
+        return cls(exam_id=exam.id, topic_id=exam.topic_id, course_id=exam.topic.course_id)
+
+async def get_scope_async(db: AsyncSession, exam: Exam) -> RollupScope | None:
+    course_id = await db.scalar(select(CourseSchedule.course_id).where(CourseSchedule.id == exam.topic_id))
+    if course_id is None:
+        return None
+    return RollupScope(exam_id=exam.id, topic_id=exam.topic_id, course_id=course_id)
+
+def _increment(dialect: str, model, keys: Dict[str, Any], deltas: Dict[str, Any]):
+    """
+    INSERT ... ON CONFLICT DO UPDATE that adds `deltas` to the row identified by
+    the primary key columns in `keys`, creating it if needed.
+    """
+    try:
+        upsert = _UPSERTS[dialect]
+    except KeyError:
+        raise NotImplementedError(f"Analytics rollups do not support the {dialect!r} dialect")
+    table = model.__table__
+    statement = upsert(table).values(**keys, **deltas)
+    primary_key = [column.name for column in table.primary_key.columns]
+    return statement.on_conflict_do_update(
+        index_elements=primary_key,
+        set_={
+            **{name: table.c[name] + statement.excluded[name] for name in deltas},
+            "updated_at": func.now(),
+        },
+    )
+
+def _score_increments(dialect: str, scope: RollupScope, deltas: Dict[str, Any]) -> list:
+    # Always exam, topic, course, then error types in name order: concurrent
+    # transactions lock the rows in the same order and cannot deadlock.
+    return [
+        _increment(dialect, ExamAnalyticsRollup,
+                   {"exam_id": scope.exam_id, "topic_id": scope.topic_id, "course_id": scope.course_id}, deltas),
+        _increment(dialect, TopicAnalyticsRollup, {"topic_id": scope.topic_id, "course_id": scope.course_id}, deltas),
+        _increment(dialect, CourseAnalyticsRollup, {"course_id": scope.course_id}, deltas),
+    ]
+
+def record_submission(db: Session, scope: RollupScope) -> None:
+    """
+    Counts a new submission, in the caller's transaction.
+    """
+    for statement in _score_increments(db.bind.dialect.name, scope, {"submissions": 1}):
+        db.execute(statement)
+
+async def record_graded_submission_async(
+    db: AsyncSession, scope: RollupScope, *, earned_marks: float, total_marks: float, error_types: Counter
+) -> None:
+    """
+    Adds a graded submission's marks and error types, in the caller's transaction.
+    """
+    dialect = db.bind.dialect.name
+    statements = _score_increments(dialect, scope, {
+        "graded_submissions": 1, "earned_marks": earned_marks, "total_marks": total_marks,
+    })
+    statements += [
+        _increment(dialect, ErrorTypeRollup, {"course_id": scope.course_id, "error_type": error_type}, {"answers": count})
+        for error_type, count in sorted(error_types.items())
+    ]
+    for statement in statements:
+        await db.execute(statement)
+
+# --- Reads ---
+
+def get_course_totals(db: Session, *, course_id: UUID) -> CourseAnalyticsRollup | None:
+    return db.get(CourseAnalyticsRollup, course_id)
+
+def get_graded_topic_totals(db: Session, *, course_id: UUID) -> List[Tuple[TopicAnalyticsRollup, str]]:
+    """
+    (totals, topic name) for every topic of the course with at least one graded submission.
+    """
+    return (
+        db.query(TopicAnalyticsRollup, CourseSchedule.topic_name)
+        .join(CourseSchedule, TopicAnalyticsRollup.topic_id == CourseSchedule.id)
+        .filter(TopicAnalyticsRollup.course_id == course_id, TopicAnalyticsRollup.graded_submissions > 0)
+        .all()
+    )
+
+def get_error_type_counts(db: Session, *, course_id: UUID) -> List[ErrorTypeRollup]:
+    return (
+        db.query(ErrorTypeRollup)
+        .filter(ErrorTypeRollup.course_id == course_id, ErrorTypeRollup.answers > 0)
+        .order_by(ErrorTypeRollup.answers.desc())
+        .all()
+    )
+
+# --- Rebuild and consistency check ---
+
+def _expected_rows(db: Session, course_id: UUID | None) -> Dict[type, Dict[tuple, Dict[str, Any]]]:
+    """
+    The rollup rows as they should be, aggregated from submissions and answers.
+    Keyed by model, then by primary key.
+    """
+    exam_totals = (
+        select(
+            Exam.id, Exam.topic_id, CourseSchedule.course_id,
+            func.count(Submission.id),
+            func.count(Submission.total_marks),
+            func.coalesce(func.sum(Submission.earned_marks), 0),
+            func.coalesce(func.sum(Submission.total_marks), 0),
+        )
+        .join(Submission, Submission.exam_id == Exam.id)
+        .join(CourseSchedule, Exam.topic_id == CourseSchedule.id)
+        .group_by(Exam.id, Exam.topic_id, CourseSchedule.course_id)
+    )
+    error_totals = (
+        select(CourseSchedule.course_id, Answer.error_type, func.count(Answer.id))
+        .join(Submission, Answer.submission_id == Submission.id)
+        .join(Exam, Submission.exam_id == Exam.id)
+        .join(CourseSchedule, Exam.topic_id == CourseSchedule.id)
+        .where(Submission.total_marks.isnot(None), Answer.error_type.isnot(None))
+        .group_by(CourseSchedule.course_id, Answer.error_type)
+    )
+    if course_id is not None:
+        exam_totals = exam_totals.where(CourseSchedule.course_id == course_id)
+        error_totals = error_totals.where(CourseSchedule.course_id == course_id)
+
+    rows: Dict[type, Dict[tuple, Dict[str, Any]]] = {model: {} for model in _COUNTERS}
+
+    def add(model, keys: Dict[str, Any], totals: Dict[str, Any]) -> None:
+        primary_key = tuple(keys[column.name] for column in model.__table__.primary_key.columns)
+        row = rows[model].setdefault(primary_key, {**keys, **{name: 0 for name in totals}})
+        for name, value in totals.items():
+            row[name] += value
+
+    for exam_id, topic_id, row_course_id, submissions, graded, earned, total in db.execute(exam_totals):
+        totals = {"submissions": submissions, "graded_submissions": graded, "earned_marks": earned, "total_marks": total}
+        add(ExamAnalyticsRollup, {"exam_id": exam_id, "topic_id": topic_id, "course_id": row_course_id}, totals)
+        add(TopicAnalyticsRollup, {"topic_id": topic_id, "course_id": row_course_id}, totals)
+        add(CourseAnalyticsRollup, {"course_id": row_course_id}, totals)
+    for row_course_id, error_type, answers in db.execute(error_totals):
+        rows[ErrorTypeRollup][(row_course_id, error_type)] = {
+            "course_id": row_course_id, "error_type": error_type, "answers": answers,
+        }
+    return rows
+
+def _stored_rows(db: Session, model, course_id: UUID | None) -> Dict[tuple, Any]:
+    query = db.query(model)
+    if course_id is not None:
+        query = query.filter(model.course_id == course_id)
+    primary_key = [column.name for column in model.__table__.primary_key.columns]
+    return {tuple(getattr(row, name) for name in primary_key): row for row in query}
+
+def check(db: Session, *, course_id: UUID | None = None) -> List[Dict[str, Any]]:
+    """
+    Compares the rollups with the raw tables and returns one entry per row that
+    differs, is missing or should not exist. An empty list means consistent.
+    """
+    mismatches = []
+    for model, expected_rows in _expected_rows(db, course_id).items():
+        counters = _COUNTERS[model]
+        stored_rows = _stored_rows(db, model, course_id)
+        for key in expected_rows.keys() | stored_rows.keys():
+            # A missing row and a row of zeros mean the same thing
+            wanted = {name: expected_rows[key][name] if key in expected_rows else 0 for name in counters}
+            actual = {name: getattr(stored_rows[key], name) if key in stored_rows else 0 for name in counters}
+            if any(abs(actual[name] - wanted[name]) > _MARKS_TOLERANCE for name in counters):
+                mismatches.append({
+                    "table": model.__tablename__,
+                    "key": [str(part) for part in key],
+                    "expected": wanted,
+                    "actual": actual,
+                })
+    return mismatches
+
+def rebuild(db: Session, *, course_id: UUID | None = None) -> Dict[str, int]:
+    """
+    Replaces the rollup rows (of one course, or all) with totals aggregated from
+    the raw tables, in one transaction. Returns the number of rows written per table.
+    """
+    expected = _expected_rows(db, course_id)
+    written = {}
+    for model, rows in expected.items():
+        statement = delete(model)
+        if course_id is not None:
+            statement = statement.where(model.course_id == course_id)
+        db.execute(statement)
+        if rows:
+            db.execute(model.__table__.insert(), list(rows.values()))
+        written[model.__tablename__] = len(rows)
+    db.commit()
+    logger.info("Rebuilt analytics rollups%s: %s", f" for course {course_id}" if course_id else "", written)
+    return written
+
+def main() -> None:
+    from app.db.session import SessionLocal
+    # Every mapped class must be imported before the mappers can be configured
+    from app.models import question, user  # noqa: F401
+
+    parser = argparse.ArgumentParser(description="Check or rebuild the analytics rollup tables.")
+    parser.add_argument("command", choices=("check", "rebuild"))
+    parser.add_argument("--course-id", type=UUID, default=None, help="limit to one course")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        if args.command == "rebuild":
+            print(json.dumps(rebuild(db, course_id=args.course_id), indent=2))
+            return
+        mismatches = check(db, course_id=args.course_id)
+    print(json.dumps(mismatches, indent=2, default=str))
+    if mismatches:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
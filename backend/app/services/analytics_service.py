@@ -1,106 +1,202 @@
 # app/services/analytics_service.py
 
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func
+from sqlalchemy.orm import Session
+from sqlalchemy import case, func, literal, select
 from uuid import UUID
 from typing import List, Dict
 from datetime import date, timedelta
 
+import numpy as np
+
 from app.models.course import Course
 from app.models.schedule import CourseSchedule
 from app.models.exam import Exam
+from app.models.question import Question
 from app.models.submission import Submission
 from app.models.answer import Answer
 from app.models.enrollment import enrollment
+from app.services import analytics_rollup_service, exam_service, score_statistics
 
 def get_course_analytics(db: Session, *, course_id: UUID, teacher_id: UUID):
     """
     Calculates and retrieves comprehensive analytics for a specific course,
     ensuring the request is made by the course's teacher.
+
+    Reads the totals kept by analytics_rollup_service, so the cost depends on the
+    number of topics and error types, not on the number of answers.
     """
-    # 1. Verify ownership and get the course with its topics and enrollments
-    course = db.query(Course).options(
-        joinedload(Course.students_enrolled),
-        joinedload(Course.schedule)
+    # 1. Verify ownership and count enrollments
+    course = db.query(
+        Course.id,
+        Course.course_name,
+        select(func.count())
+        .select_from(enrollment)
+        .where(enrollment.c.course_id == Course.id)
+        .scalar_subquery()
+        .label("total_enrollment"),
     ).filter(Course.id == course_id, Course.teacher_id == teacher_id).first()
 
     if not course:
         return None
 
-    # 2. Get all submissions related to this course by joining through topics and exams
-    submissions = db.query(Submission).join(Exam).join(CourseSchedule).filter(
-        CourseSchedule.course_id == course_id
-    ).options(joinedload(Submission.answers)).all()
+    # 2. Overall course total score and marks, from graded submissions only
+    course_totals = analytics_rollup_service.get_course_totals(db, course_id=course_id)
+    total_submissions = course_totals.submissions if course_totals else 0
+    if course_totals and course_totals.graded_submissions and course_totals.total_marks > 0:
+        average_course_score = [course_totals.earned_marks, course_totals.total_marks]
+    else:
+        average_course_score = None
 
-    total_submissions = len(submissions)
-    total_enrollment = len(course.students_enrolled)
-    
-    if total_submissions == 0:
-        return {
-            "course_id": course.id, "course_name": course.course_name,
-            "total_enrollment": total_enrollment, "total_submissions": 0,
-            "average_course_score": None, "most_misunderstood_topics": [],
-            "common_error_types": []
+    # 3. Analytics per topic with graded submissions
+    topic_analytics = [
+        {
+            "topic_id": totals.topic_id,
+            "topic_name": topic_name,
+            "average_score": [totals.earned_marks, totals.total_marks],
         }
+        for totals, topic_name in analytics_rollup_service.get_graded_topic_totals(db, course_id=course_id)
+    ]
 
-    # 3. Calculate overall course total score and marks
-    total_earned = 0
-    total_possible = 0
-    for submission in submissions:
-        if submission.overall_score is not None:
-            earned, possible = submission.overall_score
-            total_earned += earned
-            total_possible += possible
-
-    average_course_score = [total_earned, total_possible] if total_possible > 0 else None
-
-    # 4. Calculate analytics per topic
-    topic_scores: Dict[UUID, List[List[int]]] = {}
-    for sub in submissions:
-        if sub.exam and sub.exam.topic_id and sub.overall_score is not None:
-            topic_id = sub.exam.topic_id
-            if topic_id not in topic_scores:
-                topic_scores[topic_id] = []
-            topic_scores[topic_id].append(sub.overall_score)
-    
-    topic_analytics = []
-    for topic in course.schedule:
-        scores = topic_scores.get(topic.id)
-        if scores:
-            total_earned = sum(score[0] for score in scores)
-            total_possible = sum(score[1] for score in scores)
-            avg_score = [total_earned, total_possible]
-        else:
-            avg_score = None
-        topic_analytics.append({
-            "topic_id": topic.id, "topic_name": topic.topic_name, "average_score": avg_score
-        })
-
-    # Sort to find the most misunderstood (lowest average score, ignoring topics with no submissions)
-    most_misunderstood_topics = sorted(
-        [t for t in topic_analytics if t['average_score'] is not None], 
-        key=lambda x: x['average_score']
-    )[:3] # Get top 3
-
-    # 5. Calculate common error types across all answers in the course
-    error_type_counts = db.query(
-        Answer.error_type, func.count(Answer.error_type)
-    ).join(Submission).join(Exam).join(CourseSchedule).filter(
-        CourseSchedule.course_id == course_id,
-        Answer.error_type.isnot(None)
-    ).group_by(Answer.error_type).order_by(func.count(Answer.error_type).desc()).all()
-
-    common_error_types = [{"error_type": et, "count": count} for et, count in error_type_counts]
+    # Sort to find the most misunderstood (lowest average score)
+    most_misunderstood_topics = sorted(topic_analytics, key=lambda x: x['average_score'])[:3] # Get top 3
+
+    # 4. Common error types across all graded answers in the course
+    common_error_types = [
+        {"error_type": row.error_type, "count": row.answers}
+        for row in analytics_rollup_service.get_error_type_counts(db, course_id=course_id)
+    ]
 
     return {
         "course_id": course.id, "course_name": course.course_name,
-        "total_enrollment": total_enrollment,
+        "total_enrollment": course.total_enrollment,
         "total_submissions": total_submissions,
         "average_course_score": average_course_score,
         "most_misunderstood_topics": most_misunderstood_topics,
         "common_error_types": common_error_types,
     }
 
+# --- Score Distributions ---
+
+def _fetch_columns(db: Session, statement) -> np.ndarray:
+    """
+    Runs a Core statement and returns its rows as a 2-D object array.
+
+    Reads the driver's tuples directly: no Row object or type conversion per row,
+    so ids come back as the driver returns them (strings) rather than uuid.UUID.
+    """
+    result = db.connection().execute(statement)
+    try:
+        rows = result.cursor.fetchall()
+    finally:
+        result.close()
+    return np.array(rows, dtype=object).reshape(len(rows), len(statement.selected_columns))
+
+def get_exam_distribution(db: Session, *, exam_id: UUID, teacher_id: UUID, bins: int = 10):
+    """
+    Score distribution of an exam's graded submissions, plus difficulty and
+    discrimination of each question. Answers are fetched as columns in one query
+    and analysed with NumPy.
+    """
+    exam = exam_service.get_exam_by_id_and_teacher(db=db, exam_id=exam_id, teacher_id=teacher_id)
+    if not exam:
+        return None
+
+    questions = db.execute(
+        select(Question.id, Question.question_text, Question.marks)
+        .where(Question.exam_id == exam_id)
+        .order_by(Question.id)
+    ).all()
+    rows = _fetch_columns(db, (
+        select(
+            Answer.submission_id,
+            # Position of the question in `questions`, so no per-row id mapping is needed
+            case({question.id: i for i, question in enumerate(questions)}, value=Answer.question_id, else_=-1)
+            if questions else literal(-1),
+            Answer.awarded_marks,
+            Submission.earned_marks,
+            Submission.total_marks,
+        )
+        .join(Submission, Answer.submission_id == Submission.id)
+        .where(Submission.exam_id == exam_id, Submission.total_marks.isnot(None))
+        .order_by(Answer.submission_id)
+    ))
+    submission_ids = rows[:, 0]
+    question_codes = rows[:, 1].astype(int)
+    # NULL awarded marks (answers graded before they were stored) become NaN
+    awarded, earned, total = rows[:, 2:].astype(float).T
+
+    # Rows are ordered by submission: a new submission starts wherever the id changes
+    starts = np.r_[True, submission_ids[1:] != submission_ids[:-1]] if len(rows) else np.empty(0, dtype=bool)
+    first_answer = np.flatnonzero(starts)
+    submission_codes = np.cumsum(starts) - 1
+    scores = score_statistics.percentages(earned[first_answer], total[first_answer])
+
+    # Share of each question's marks earned, as a (submissions x questions) matrix
+    marks = np.array([question.marks or 1 for question in questions], dtype=float)
+    known = question_codes >= 0
+    item_scores = np.full((first_answer.size, len(questions)), np.nan)
+    item_scores[submission_codes[known], question_codes[known]] = awarded[known] / marks[question_codes[known]]
+    item_stats = score_statistics.question_statistics(item_scores)
+
+    return {
+        "exam_id": exam.id,
+        "title": exam.title,
+        "scores": score_statistics.distribution(scores, bins),
+        "questions": [
+            {
+                "question_id": question.id,
+                "question_text": question.question_text,
+                "marks": question.marks,
+                "answers": int(item_stats["answers"][i]),
+                "difficulty": difficulty,
+                "discrimination": discrimination,
+                "item_rest_correlation": correlation,
+            }
+            for i, (question, difficulty, discrimination, correlation) in enumerate(zip(
+                questions,
+                score_statistics.as_numbers(item_stats["difficulty"]),
+                score_statistics.as_numbers(item_stats["discrimination"]),
+                score_statistics.as_numbers(item_stats["item_rest_correlation"]),
+            ))
+        ],
+    }
+
+def get_topic_distribution(db: Session, *, topic_id: UUID, teacher_id: UUID, bins: int = 10):
+    """
+    Score distribution of a topic's graded submissions, overall and per exam.
+    """
+    topic = exam_service.get_topic_by_id_and_teacher(db=db, topic_id=topic_id, teacher_id=teacher_id)
+    if not topic:
+        return None
+
+    exams = db.execute(select(Exam.id, Exam.title).where(Exam.topic_id == topic_id).order_by(Exam.title)).all()
+    rows = _fetch_columns(db, (
+        select(
+            case({exam.id: i for i, exam in enumerate(exams)}, value=Submission.exam_id, else_=-1)
+            if exams else literal(-1),
+            Submission.earned_marks,
+            Submission.total_marks,
+        )
+        .join(Exam, Submission.exam_id == Exam.id)
+        .where(Exam.topic_id == topic_id, Submission.total_marks.isnot(None))
+    ))
+    exam_codes = rows[:, 0].astype(int)
+    earned, total = rows[:, 1:].astype(float).T
+
+    scored = total > 0
+    scores = score_statistics.percentages(earned, total)
+    per_exam = score_statistics.grouped_distributions(exam_codes[scored], scores, len(exams), bins)
+
+    return {
+        "topic_id": topic.id,
+        "topic_name": topic.topic_name,
+        "scores": score_statistics.distribution(scores, bins),
+        "exams": [
+            {"exam_id": exam.id, "title": exam.title, "scores": exam_scores}
+            for exam, exam_scores in zip(exams, per_exam)
+        ],
+    }
+
 # --- New Student Analytics Functions ---
 
 def get_student_upcoming_topics(db: Session, *, student_id: UUID) -> List[Dict]:
@@ -0,0 +1,115 @@
+# app/services/answer_dedup.py
+
+import hashlib
+import random
+import re
+from collections import defaultdict
+from typing import Callable, Dict, Hashable, Iterable, List, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+
+_WHITESPACE = re.compile(r"\s+")
+
+# MinHash parameters: 64 permutations split into 16 LSH bands of 4 rows.
+# Pairs with Jaccard similarity around 0.8 and above almost always share a band.
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16
+SHINGLE_SIZE = 5
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(20240611)  # fixed seed: signatures must be stable across runs
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(NUM_PERMUTATIONS)
+]
+
+def normalize_answer(text: str) -> str:
+    """
+    Case-folds an answer and collapses all runs of whitespace, so answers that
+    differ only in case or spacing compare equal.
+    """
+    return _WHITESPACE.sub(" ", text).strip().casefold()
+
+def _shingles(text: str) -> set[str]:
+    if len(text) <= SHINGLE_SIZE:
+        return {text}
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+def minhash_signature(text: str) -> Tuple[int, ...]:
+    """
+    MinHash signature of the character shingles of an (already normalized) text.
+    """
+    hashes = [
+        int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big")
+        for s in _shingles(text)
+    ]
+    return tuple(
+        min((a * h + b) % _MERSENNE_PRIME for h in hashes)
+        for a, b in _PERMUTATIONS
+    )
+
+def estimated_similarity(sig_a: Sequence[int], sig_b: Sequence[int]) -> float:
+    """Estimated Jaccard similarity of two MinHash signatures."""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+def _merge_similar(texts: List[str], threshold: float) -> List[List[int]]:
+    """
+    Clusters texts around representatives. In input order, each text joins the
+    most similar representative whose estimated similarity reaches `threshold`,
+    or becomes a representative itself. Membership is only ever judged against
+    the representative, so similarity does not chain: A near B and B near C
+    never puts C with A unless C is near A too.
+    Candidate representatives come from LSH buckets, so this stays near-linear in the number of texts.
+    """
+    rows = NUM_PERMUTATIONS // LSH_BANDS
+    signatures = [minhash_signature(t) for t in texts]
+    # LSH bucket -> representatives that hash into it
+    buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = defaultdict(list)
+    clusters: Dict[int, List[int]] = {}
+
+    for idx, sig in enumerate(signatures):
+        bands = [(band, sig[band * rows:(band + 1) * rows]) for band in range(LSH_BANDS)]
+        best, best_similarity = None, 0.0
+        for candidate in sorted({rep for key in bands for rep in buckets.get(key, ())}):
+            similarity = estimated_similarity(sig, signatures[candidate])
+            if similarity >= threshold and (best is None or similarity > best_similarity):
+                best, best_similarity = candidate, similarity
+        if best is not None:
+            clusters[best].append(idx)
+            continue
+        clusters[idx] = [idx]
+        for key in bands:
+            buckets[key].append(idx)
+    return list(clusters.values())
+
+def group_answers(
+    items: Iterable[T],
+    *,
+    question_key: Callable[[T], Hashable],
+    text_key: Callable[[T], str],
+    similarity_threshold: float | None = None,
+) -> List[List[T]]:
+    """
+    Groups answers that can share one grade.
+
+    Answers are first grouped per question by their normalized text. When
+    `similarity_threshold` is set, groups of the same question whose MinHash
+    similarity reaches the threshold are merged as well. Groups keep input order,
+    so the first item of each group is a stable representative.
+    """
+    exact: Dict[Tuple[Hashable, str], List[T]] = {}
+    for item in items:
+        exact.setdefault((question_key(item), normalize_answer(text_key(item))), []).append(item)
+
+    if similarity_threshold is None:
+        return list(exact.values())
+
+    per_question: Dict[Hashable, List[Tuple[str, List[T]]]] = defaultdict(list)
+    for (question_id, normalized), group in exact.items():
+        per_question[question_id].append((normalized, group))
+
+    groups: List[List[T]] = []
+    for entries in per_question.values():
+        for cluster in _merge_similar([normalized for normalized, _ in entries], similarity_threshold):
+            groups.append([item for idx in sorted(cluster) for item in entries[idx][1]])
+    return groups
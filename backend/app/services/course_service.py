@@ -1,14 +1,17 @@
 # app/services/course_service.py
 
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload
+from datetime import date
 from uuid import UUID
 
 from app.models.user import User
 from app.models.course import Course
+from app.models.enrollment import enrollment
 from app.models.schedule import CourseSchedule
 from app.schemas.course import CourseCreate
-from sqlalchemy.orm import Session, joinedload
-from uuid import UUID
+from app.services.pagination import Page, keyset_page
 
 # --- New Function ---
 def get_public_course_by_id(db: Session, *, course_id: UUID) -> Course | None:
@@ -24,11 +27,15 @@ def get_public_course_by_id(db: Session, *, course_id: UUID) -> Course | None:
 
 # --- Student-Focused Functions ---
 
-def get_all_courses(db: Session) -> list[Course]:
+def get_all_courses(
+    db: Session, *, limit: int | None = None, cursor: str | None = None
+) -> Page[Course]:
     """
-    Retrieves all courses, eagerly loading teacher info to prevent extra DB queries.
+    Retrieves a page of courses ordered by name, eagerly loading teacher info to
+    prevent extra DB queries.
     """
-    return db.query(Course).options(joinedload(Course.teacher)).all()
+    query = db.query(Course).options(joinedload(Course.teacher))
+    return keyset_page(query, keys=[Course.course_name, Course.id], descending=False, limit=limit, cursor=cursor)
 
 def get_course_by_id(db: Session, course_id: UUID) -> Course | None:
     """
@@ -36,12 +43,21 @@ def get_course_by_id(db: Session, course_id: UUID) -> Course | None:
     """
     return db.query(Course).filter(Course.id == course_id).first()
 
-def enroll_student_in_course(db: Session, *, student: User, course: Course) -> Course:
+def is_student_enrolled(db: Session, *, course_id: UUID, student_id: UUID) -> bool:
+    """
+    Checks a single enrollment row, without loading the course's student list.
     """
-    Appends a student to a course's enrollment list and saves to the DB.
+    return db.query(
+        db.query(enrollment)
+        .filter(enrollment.c.course_id == course_id, enrollment.c.student_id == student_id)
+        .exists()
+    ).scalar()
+
+def enroll_student_in_course(db: Session, *, student_id: UUID, course: Course) -> Course:
     """
-    student.courses_enrolled.append(course)
-    db.add(student)
+    Adds a student to a course's enrollment list and saves to the DB.
+    """
+    db.execute(enrollment.insert().values(student_id=student_id, course_id=course.id))
     db.commit()
     db.refresh(course)
     return course
@@ -93,25 +109,32 @@ def get_course_by_id_and_teacher(db: Session, *, course_id: UUID, teacher_id: UU
         .first()
     )
 
-def create_course_with_schedule(
-    db: Session, *, course_in: CourseCreate, teacher: User, schedule_data: list[dict]
+async def create_course_with_schedule_async(
+    db: AsyncSession, *, course_in: CourseCreate, teacher_id: UUID, schedule_data: list[dict]
 ) -> Course:
     """
     Creates a new course and its associated schedule in the database.
+    Returns the course with its teacher and schedule loaded.
     """
-    db_course = Course(course_name=course_in.course_name, teacher_id=teacher.id)
+    db_course = Course(course_name=course_in.course_name, teacher_id=teacher_id)
     db.add(db_course)
-    db.commit()
+    await db.flush()
 
     for topic in schedule_data:
-        db_topic = CourseSchedule(
+        end_date = topic.get("end_date")
+        db.add(CourseSchedule(
             course_id=db_course.id,
             topic_name=topic.get("topic_name"),
             topic_description=topic.get("topic_description"),
-            end_date=topic.get("end_date")
-        )
-        db.add(db_topic)
-    
-    db.commit()
-    db.refresh(db_course)
-    return db_course
\ No newline at end of file
+            # Unlike psycopg2, asyncpg does not coerce strings to dates
+            end_date=date.fromisoformat(end_date) if isinstance(end_date, str) else end_date
+        ))
+
+    await db.commit()
+    result = await db.execute(
+        select(Course)
+        .options(selectinload(Course.teacher), selectinload(Course.schedule))
+        .where(Course.id == db_course.id)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalar_one()
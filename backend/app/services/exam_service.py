@@ -1,6 +1,8 @@
 # app/services/exam_service.py
 
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload
 from uuid import UUID
 from typing import List
 
@@ -11,6 +13,8 @@ from app.models.question import Question
 from app.models.enrollment import enrollment
 from app.schemas.exam import ExamUpdate
 from app.schemas.question import QuestionCreate
+from app.services.grading_cache import grading_cache
+from app.services.pagination import Page, keyset_page
 
 # --- New Function ---
 
@@ -49,13 +53,51 @@ def get_published_exams_for_course(db: Session, *, course_id: UUID, student_id:
 
 # --- Existing Teacher-Focused Functions ---
 
-def get_exam(db: Session, exam_id: UUID) -> Exam:
-    """Get an exam by its ID."""
-    return db.query(Exam).filter(Exam.id == exam_id).first()
+def _check_owner(row, teacher_id: UUID, noun: str):
+    """
+    Unpacks a (target, owning teacher id) row from an ownership loader.
+    """
+    if row is None:
+        return None
+    target, owner_id = row
+    if owner_id != teacher_id:
+        raise PermissionError(f"Not authorized to access this {noun}")
+    return target
+
+def get_exam_for_teacher(
+    db: Session, *, exam_id: UUID, teacher_id: UUID, with_questions: bool = False
+) -> Exam | None:
+    """
+    Fetches an exam together with the teacher of its course in one joined query.
+    Returns None if the exam does not exist and raises PermissionError if it
+    belongs to another teacher. With `with_questions`, its questions are loaded
+    in the same query.
+    """
+    query = (
+        db.query(Exam, Course.teacher_id)
+        .outerjoin(Exam.topic)
+        .outerjoin(CourseSchedule.course)
+        .filter(Exam.id == exam_id)
+    )
+    if with_questions:
+        query = query.options(joinedload(Exam.questions))
+    return _check_owner(query.first(), teacher_id, "exam")
 
-def get_question(db: Session, question_id: UUID) -> Question:
-    """Get a question by its ID."""
-    return db.query(Question).filter(Question.id == question_id).first()
+def get_question_for_teacher(db: Session, *, question_id: UUID, teacher_id: UUID) -> Question | None:
+    """
+    Fetches a question together with the teacher of its exam's course in one joined query.
+    Returns None if the question does not exist and raises PermissionError if it
+    belongs to another teacher.
+    """
+    row = (
+        db.query(Question, Course.teacher_id)
+        .outerjoin(Question.exam)
+        .outerjoin(Exam.topic)
+        .outerjoin(CourseSchedule.course)
+        .filter(Question.id == question_id)
+        .first()
+    )
+    return _check_owner(row, teacher_id, "question")
 
 def update_question(
     db: Session,
@@ -85,18 +127,29 @@ def create_question(
     db.refresh(question)
     return question
 
-def get_exams_by_teacher(db: Session, *, teacher_id: UUID) -> List[Exam]:
+def get_exams_by_teacher(
+    db: Session,
+    *,
+    teacher_id: UUID,
+    status: str | None = None,
+    limit: int | None = None,
+    cursor: str | None = None,
+) -> Page[Exam]:
     """
-    Retrieves all exams created by a specific teacher.
+    Retrieves a page of the exams created by a specific teacher, ordered by title,
+    optionally only those with the given status. Questions are loaded for the
+    whole page in one extra query.
     """
-    return (
+    query = (
         db.query(Exam)
         .join(Exam.topic)
         .join(CourseSchedule.course)
         .filter(Course.teacher_id == teacher_id)
-        .order_by(Exam.title)
-        .all()
+        .options(selectinload(Exam.questions))
     )
+    if status is not None:
+        query = query.filter(Exam.status == status)
+    return keyset_page(query, keys=[Exam.title, Exam.id], descending=False, limit=limit, cursor=cursor)
 
 def get_exam_by_id_and_teacher(db: Session, *, exam_id: UUID, teacher_id: UUID) -> Exam | None:
     """
@@ -115,6 +168,9 @@ def update_exam(db: Session, *, db_exam: Exam, exam_in: ExamUpdate) -> Exam:
     Updates an exam record in the database.
     """
     update_data = exam_in.model_dump(exclude_unset=True)
+    if "grading_rules" in update_data and update_data["grading_rules"] != db_exam.grading_rules:
+        # Cached grades were produced under the old rules
+        grading_cache.invalidate_exam(db, db_exam.id)
     for field in update_data:
         setattr(db_exam, field, update_data[field])
     
@@ -160,3 +216,49 @@ def create_exam_draft(
     db.commit()
     db.refresh(db_exam)
     return db_exam
+
+# --- Async variants, for async endpoints ---
+
+async def get_topic_by_id_and_teacher_async(
+    db: AsyncSession, *, topic_id: UUID, teacher_id: UUID
+) -> CourseSchedule | None:
+    """
+    Async variant of get_topic_by_id_and_teacher.
+    """
+    result = await db.execute(
+        select(CourseSchedule)
+        .join(CourseSchedule.course)
+        .where(CourseSchedule.id == topic_id, Course.teacher_id == teacher_id)
+        .options(joinedload(CourseSchedule.course))
+    )
+    return result.scalars().first()
+
+async def create_exam_draft_async(
+    db: AsyncSession, *, topic: CourseSchedule, question_texts: List[str]
+) -> Exam:
+    """
+    Async variant of create_exam_draft. Returns the exam with its questions loaded.
+    """
+    db_exam = Exam(
+        title=f"Draft Exam: {topic.topic_name}",
+        topic_id=topic.id,
+        status="draft"
+    )
+    db.add(db_exam)
+    await db.flush()
+
+    for text in question_texts:
+        db.add(Question(
+            question_text=text,
+            exam_id=db_exam.id,
+            marks=1  # Default marks for AI-generated questions
+        ))
+
+    await db.commit()
+    result = await db.execute(
+        select(Exam)
+        .options(selectinload(Exam.questions))
+        .where(Exam.id == db_exam.id)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalar_one()
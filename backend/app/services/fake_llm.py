@@ -0,0 +1,269 @@
+# app/services/fake_llm.py
+
+"""
+Deterministic stand-in for the Gemini API, for benchmarks and offline development.
+
+In process:   LLM_PROVIDER=fake (configured by the FAKE_LLM_* settings)
+Over HTTP:    python -m app.services.fake_llm --port 8089
+              GEMINI_BASE_URL=http://127.0.0.1:8089/v1beta
+
+Responses are shaped by the request: grading prompts get valid AIFeedback JSON
+(one object, or one per answer_id for batches), syllabus and exam prompts get
+topics or questions, anything else gets a short paragraph. Latency, errors and
+429s are drawn from a generator seeded by FAKE_LLM_SEED and the request body, so
+identical runs see identical behaviour regardless of scheduling order.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+from collections import Counter
+from dataclasses import asdict, dataclass
+from datetime import date, timedelta
+from typing import Any, Dict, List, Tuple
+
+import httpx
+
+from app.core.config import settings
+from app.services.llm_provider import GeminiProvider
+
+LATENCY_DISTRIBUTIONS = ("constant", "uniform", "lognormal")
+
+_MARKS = re.compile(r"Total Marks for this Question:\s*([0-9.]+)")
+_SINGLE_ANSWER = re.compile(r"Student's Answer:\s*\"(.*)\"", re.DOTALL)
+
+@dataclass
+class FakeLLMConfig:
+    latency: str = "lognormal"
+    latency_mean_seconds: float = 0.5
+    latency_spread: float = 0.5
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    max_concurrency: int = 0
+    seed: int = 0
+
+    def __post_init__(self):
+        if self.latency not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"latency must be one of {LATENCY_DISTRIBUTIONS}, got {self.latency!r}")
+
+    @classmethod
+    def from_settings(cls) -> "FakeLLMConfig":
+        return cls(
+            latency=settings.FAKE_LLM_LATENCY,
+            latency_mean_seconds=settings.FAKE_LLM_LATENCY_MEAN_SECONDS,
+            latency_spread=settings.FAKE_LLM_LATENCY_SPREAD,
+            error_rate=settings.FAKE_LLM_ERROR_RATE,
+            rate_limit_rate=settings.FAKE_LLM_RATE_LIMIT_RATE,
+            max_concurrency=settings.FAKE_LLM_MAX_CONCURRENCY,
+            seed=settings.FAKE_LLM_SEED,
+        )
+
+
+class FakeLLM:
+    """
+    Answers generateContent payloads with (status code, JSON body) after a simulated delay.
+    """
+
+    def __init__(self, config: FakeLLMConfig):
+        self.config = config
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.requests = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self._seen: Counter = Counter()
+
+    async def handle(self, payload: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        rng = self._rng_for(payload)
+        self.requests += 1
+        if self.config.max_concurrency and self.in_flight >= self.config.max_concurrency:
+            self.rate_limited += 1
+            return 429, _error_body(429, "RESOURCE_EXHAUSTED", "Too many concurrent requests.")
+
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self._latency(rng))
+            roll = rng.random()
+            if roll < self.config.rate_limit_rate:
+                self.rate_limited += 1
+                return 429, _error_body(429, "RESOURCE_EXHAUSTED", "Resource has been exhausted.")
+            if roll < self.config.rate_limit_rate + self.config.error_rate:
+                self.errors += 1
+                return 503, _error_body(503, "UNAVAILABLE", "The model is overloaded.")
+            return 200, self.respond(payload)
+        finally:
+            self.in_flight -= 1
+
+    def respond(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        user_text = "".join(
+            part.get("text", "")
+            for content in payload.get("contents", [])
+            for part in content.get("parts", [])
+        )
+        system_text = "".join(
+            part.get("text", "") for part in payload.get("systemInstruction", {}).get("parts", [])
+        )
+        text = _response_text(payload.get("generationConfig", {}), system_text, user_text)
+        prompt_tokens = max(1, (len(user_text) + len(system_text)) // 4)
+        output_tokens = max(1, len(text) // 4)
+        return {
+            "candidates": [{
+                "content": {"parts": [{"text": text}], "role": "model"},
+                "finishReason": "STOP",
+            }],
+            "usageMetadata": {
+                "promptTokenCount": prompt_tokens,
+                "candidatesTokenCount": output_tokens,
+                "totalTokenCount": prompt_tokens + output_tokens,
+            },
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "rate_limited": self.rate_limited,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+        }
+
+    def _rng_for(self, payload: Dict[str, Any]) -> random.Random:
+        # Repeats of the same request (retries, re-runs) get the next draw, not the same one.
+        digest = hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+        self._seen[digest] += 1
+        return random.Random(f"{self.config.seed}:{digest}:{self._seen[digest]}")
+
+    def _latency(self, rng: random.Random) -> float:
+        mean, spread = self.config.latency_mean_seconds, self.config.latency_spread
+        if mean <= 0:
+            return 0.0
+        if self.config.latency == "uniform":
+            return max(0.0, rng.uniform(mean * (1 - spread), mean * (1 + spread)))
+        if self.config.latency == "lognormal" and spread > 0:
+            return rng.lognormvariate(math.log(mean) - spread ** 2 / 2, spread)
+        return mean
+
+
+class FakeLLMProvider(GeminiProvider):
+    """
+    Runs FakeLLM in process, behind an httpx mock transport so requests go through
+    the same client code, status handling and JSON decoding as the real provider.
+    """
+
+    def __init__(self, fake: FakeLLM, *, model: str = "fake-llm"):
+        super().__init__(model=model, api_key="fake", base_url="http://fake-llm/v1beta")
+        self.fake = fake
+        self._http = httpx.AsyncClient(transport=httpx.MockTransport(self._handle))
+
+    def _client(self) -> httpx.AsyncClient:
+        return self._http
+
+    async def _handle(self, request: httpx.Request) -> httpx.Response:
+        status_code, body = await self.fake.handle(json.loads(request.content))
+        return httpx.Response(status_code, json=body)
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+
+def _error_body(code: int, status: str, message: str) -> Dict[str, Any]:
+    return {"error": {"code": code, "message": message, "status": status}}
+
+def _stable_fraction(text: str) -> float:
+    """A value in [0, 1] that depends only on the text, so a given answer always earns the same marks."""
+    return int(hashlib.blake2b(text.encode("utf-8"), digest_size=2).hexdigest(), 16) % 11 / 10
+
+def _feedback(answer_text: str, marks: float) -> Dict[str, Any]:
+    fraction = _stable_fraction(answer_text)
+    return {
+        "score": round(fraction * 10),
+        "awarded_marks": round(fraction * marks, 1),
+        "feedback": "Covers the main points." if fraction >= 0.5 else "Misses key concepts of the question.",
+        "error_type": "correct" if fraction >= 0.8 else "conceptual" if fraction < 0.4 else "incomplete",
+    }
+
+def _response_text(generation_config: Dict[str, Any], system_text: str, user_text: str) -> str:
+    marks_match = _MARKS.search(system_text)
+    marks = float(marks_match.group(1)) if marks_match else 1.0
+    schema = generation_config.get("responseSchema")
+
+    if schema and schema.get("type") == "array":
+        answers = json.loads(user_text[user_text.index("["):user_text.rindex("]") + 1])
+        return json.dumps([
+            {"answer_id": item["answer_id"], **_feedback(item.get("answer", ""), marks)}
+            for item in answers
+        ])
+    if schema:
+        answer_match = _SINGLE_ANSWER.search(user_text)
+        return json.dumps(_feedback(answer_match.group(1) if answer_match else user_text, marks))
+    if "topic_name" in system_text:
+        return json.dumps(_schedule(12))
+    if "exam" in system_text and "JSON array" in system_text:
+        return json.dumps([f"Explain concept {i} of this topic with an example." for i in range(1, 11)])
+    return "Good effort overall. Review the feedback on each question and keep practising."
+
+def _schedule(weeks: int) -> List[Dict[str, str]]:
+    start = date.today()
+    return [
+        {
+            "topic_name": f"Topic {week}",
+            "topic_description": f"Week {week} of the syllabus.",
+            "end_date": (start + timedelta(weeks=week)).isoformat(),
+        }
+        for week in range(1, weeks + 1)
+    ]
+
+def create_app(fake: FakeLLM):
+    """
+    A Gemini-compatible HTTP server around `fake`, plus GET /stats.
+    """
+    from fastapi import FastAPI, Request
+    from fastapi.responses import JSONResponse
+
+    app = FastAPI(title="Fake LLM")
+
+    @app.post("/v1beta/models/{model}:generateContent")
+    async def generate_content(model: str, request: Request):
+        status_code, body = await fake.handle(await request.json())
+        return JSONResponse(body, status_code=status_code)
+
+    @app.get("/stats")
+    async def stats():
+        return {"config": asdict(fake.config), **fake.stats()}
+
+    return app
+
+def main() -> None:
+    import uvicorn
+
+    defaults = FakeLLMConfig.from_settings()
+    parser = argparse.ArgumentParser(description="Run a fake Gemini-compatible LLM server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", choices=LATENCY_DISTRIBUTIONS, default=defaults.latency)
+    parser.add_argument("--latency-mean", type=float, default=defaults.latency_mean_seconds)
+    parser.add_argument("--latency-spread", type=float, default=defaults.latency_spread)
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate)
+    parser.add_argument("--rate-limit-rate", type=float, default=defaults.rate_limit_rate)
+    parser.add_argument("--max-concurrency", type=int, default=defaults.max_concurrency)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    args = parser.parse_args()
+
+    fake = FakeLLM(FakeLLMConfig(
+        latency=args.latency,
+        latency_mean_seconds=args.latency_mean,
+        latency_spread=args.latency_spread,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        max_concurrency=args.max_concurrency,
+        seed=args.seed,
+    ))
+    uvicorn.run(create_app(fake), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
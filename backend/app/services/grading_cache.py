@@ -0,0 +1,170 @@
+# app/services/grading_cache.py
+
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Tuple
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.grading_cache import GradingCacheEntry
+from app.schemas.feedback import AIFeedback
+
+logger = logging.getLogger(__name__)
+
+class GradingCache:
+    """
+    Content-addressed cache of AI grading results.
+
+    Entries are keyed by a hash of everything that determines the model's answer,
+    so a hit is always safe to reuse. Postgres is the shared store; a bounded
+    in-process LRU sits in front of it to skip the round-trip for hot keys.
+    """
+
+    def __init__(self, lru_size: int):
+        self.lru_size = lru_size
+        self._lru: "OrderedDict[str, Tuple[UUID | None, AIFeedback]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.lru_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(
+        *, question_text: str, answer_text: str, grading_rules: str, marks: float, model: str
+    ) -> str:
+        raw = json.dumps(
+            [model, question_text, answer_text, grading_rules, float(marks)],
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> AIFeedback | None:
+        return (await self.get_many([key])).get(key)
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, AIFeedback]:
+        """
+        The cached feedback for whichever of `keys` have an entry. Keys missing
+        from the LRU are read from the database in a single query.
+        """
+        found: Dict[str, AIFeedback] = {}
+        remaining = []
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                cached = self._lru.get(key)
+                if cached is not None:
+                    self._lru.move_to_end(key)
+                    self.lru_hits += 1
+                    found[key] = cached[1]
+                else:
+                    remaining.append(key)
+
+        if remaining:
+            rows = await self._db_get_many(remaining)
+            for key, (exam_id, feedback) in rows.items():
+                self._lru_put(key, exam_id, feedback)
+                found[key] = feedback
+            with self._lock:
+                self.db_hits += len(rows)
+                self.misses += len(remaining) - len(rows)
+        return found
+
+    async def put(
+        self, key: str, feedback: AIFeedback, *, exam_id: UUID | None = None, model: str | None = None
+    ) -> None:
+        await self.put_many({key: feedback}, exam_id=exam_id, model=model)
+
+    async def put_many(
+        self, entries: Dict[str, AIFeedback], *, exam_id: UUID | None = None, model: str | None = None
+    ) -> None:
+        """
+        Stores several results in one upsert statement.
+        """
+        if not entries:
+            return
+        for key, feedback in entries.items():
+            self._lru_put(key, exam_id, feedback)
+        await self._db_put_many(entries, exam_id, model or settings.GEMINI_MODEL)
+
+    def invalidate_exam(self, db: Session, exam_id: UUID) -> int:
+        """
+        Drops every entry produced for an exam, in the caller's transaction.
+
+        Other processes keep their LRU copies, but those can never be served for
+        the new rules: the rules are part of the key.
+        """
+        with self._lock:
+            stale_keys = [k for k, (entry_exam_id, _) in self._lru.items() if entry_exam_id == exam_id]
+            for k in stale_keys:
+                del self._lru[k]
+        deleted = (
+            db.query(GradingCacheEntry)
+            .filter(GradingCacheEntry.exam_id == exam_id)
+            .delete(synchronize_session=False)
+        )
+        self.invalidations += 1
+        return deleted
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.lru_hits + self.db_hits + self.misses
+        return {
+            "lru_hits": self.lru_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.lru_hits + self.db_hits) / lookups, 4) if lookups else 0.0,
+            "lru_entries": len(self._lru),
+            "invalidations": self.invalidations,
+        }
+
+    def _lru_put(self, key: str, exam_id: UUID | None, feedback: AIFeedback) -> None:
+        if self.lru_size <= 0:
+            return
+        with self._lock:
+            self._lru[key] = (exam_id, feedback)
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.lru_size:
+                self._lru.popitem(last=False)
+
+    # --- DB helpers, each on its own short-lived async session ---
+
+    @staticmethod
+    async def _db_get_many(keys: List[str]) -> Dict[str, Tuple[UUID | None, AIFeedback]]:
+        async with AsyncSessionLocal() as db:
+            rows = await db.execute(
+                select(GradingCacheEntry.cache_key, GradingCacheEntry.exam_id, GradingCacheEntry.feedback)
+                .where(GradingCacheEntry.cache_key.in_(keys))
+            )
+            return {key: (exam_id, AIFeedback(**feedback)) for key, exam_id, feedback in rows}
+
+    @staticmethod
+    async def _db_put_many(entries: Dict[str, AIFeedback], exam_id: UUID | None, model: str) -> None:
+        async with AsyncSessionLocal() as db:
+            insert = _UPSERTS[db.bind.dialect.name]
+            statement = insert(GradingCacheEntry).values([
+                {"cache_key": key, "model": model, "feedback": feedback.model_dump(), "exam_id": exam_id}
+                for key, feedback in entries.items()
+            ])
+            # Another worker may have stored the same key; the newest result wins, as with merge()
+            statement = statement.on_conflict_do_update(
+                index_elements=[GradingCacheEntry.cache_key],
+                set_={
+                    "model": statement.excluded.model,
+                    "feedback": statement.excluded.feedback,
+                    "exam_id": statement.excluded.exam_id,
+                },
+            )
+            await db.execute(statement)
+            await db.commit()
+
+# INSERT ... ON CONFLICT for the dialects DATABASE_URL may point at
+_UPSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+grading_cache = GradingCache(lru_size=settings.GRADING_CACHE_LRU_SIZE)
@@ -0,0 +1,164 @@
+# app/services/grading_job_service.py
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from typing import Dict
+from uuid import UUID
+from datetime import datetime, timedelta, timezone
+
+from app.core.config import settings
+from app.models.course import Course
+from app.models.schedule import CourseSchedule
+from app.models.exam import Exam
+from app.models.grading_job import GradingJob
+from app.services.grading_scheduler import GradingStats
+
+ACTIVE_STATUSES = ("queued", "running")
+
+def _get_active_job(db: Session, *, exam_id: UUID) -> GradingJob | None:
+    return (
+        db.query(GradingJob)
+        .filter(GradingJob.exam_id == exam_id, GradingJob.status.in_(ACTIVE_STATUSES))
+        .first()
+    )
+
+def create_grading_job(db: Session, *, exam_id: UUID, requested_by_id: UUID) -> GradingJob:
+    """
+    Queues a grading job for an exam.
+    If the exam already has a queued or running job, that job is returned instead.
+    """
+    active_job = _get_active_job(db, exam_id=exam_id)
+    if active_job:
+        return active_job
+
+    db_job = GradingJob(exam_id=exam_id, requested_by_id=requested_by_id, status="queued")
+    db.add(db_job)
+    try:
+        db.commit()
+    except IntegrityError:
+        # A concurrent request queued one first (ix_grading_jobs_active_exam_id)
+        db.rollback()
+        active_job = _get_active_job(db, exam_id=exam_id)
+        if active_job:
+            return active_job
+        raise
+    db.refresh(db_job)
+    return db_job
+
+def get_grading_job_by_id_and_teacher(db: Session, *, job_id: UUID, teacher_id: UUID) -> GradingJob | None:
+    """
+    Retrieves a grading job, but only if its exam belongs to the specified teacher.
+    """
+    return (
+        db.query(GradingJob)
+        .join(GradingJob.exam)
+        .join(Exam.topic)
+        .join(CourseSchedule.course)
+        .filter(GradingJob.id == job_id, Course.teacher_id == teacher_id)
+        .first()
+    )
+
+def claim_next_job(db: Session) -> GradingJob | None:
+    """
+    Atomically moves the oldest queued job to 'running' and returns it.
+    Rows locked by another worker are skipped, so several workers can poll safely.
+    """
+    job = (
+        db.query(GradingJob)
+        .filter(GradingJob.status == "queued")
+        .order_by(GradingJob.created_at.asc())
+        .with_for_update(skip_locked=True)
+        .first()
+    )
+    if not job:
+        return None
+
+    now = datetime.now(timezone.utc)
+    job.status = "running"
+    job.started_at = now
+    job.heartbeat_at = now
+    db.commit()
+    db.refresh(job)
+    return job
+
+def record_progress(db: Session, *, job_id: UUID, stats: GradingStats) -> None:
+    """
+    Copies a running job's progress counters onto its row and refreshes its heartbeat.
+    """
+    db.query(GradingJob).filter(GradingJob.id == job_id).update(
+        {
+            GradingJob.total: stats.total_submissions,
+            GradingJob.done: stats.submissions,
+            GradingJob.failed: stats.failed_submissions,
+            GradingJob.heartbeat_at: datetime.now(timezone.utc),
+        },
+        synchronize_session=False,
+    )
+    db.commit()
+
+def finish_job(db: Session, *, job_id: UUID, stats: GradingStats, error: str | None = None) -> None:
+    """
+    Marks a job as completed, or as failed when an error message is given or
+    the run left submissions ungraded.
+    """
+    if error is None:
+        problems = []
+        if stats.abandoned_submissions:
+            problems.append(
+                f"The AI service stayed unavailable for over {settings.GRADING_MAX_PAUSE_SECONDS:.0f}s, so "
+                f"{stats.abandoned_submissions} of {stats.total_submissions} submission(s) were left ungraded."
+            )
+        if stats.failed_submissions:
+            problems.append(
+                f"{stats.failed_answers} answer(s) in {stats.failed_submissions} of "
+                f"{stats.total_submissions} submission(s) could not be graded."
+            )
+        if problems:
+            error = " ".join(problems + ["Run grading again to retry them."])
+    now = datetime.now(timezone.utc)
+    db.query(GradingJob).filter(GradingJob.id == job_id).update(
+        {
+            GradingJob.status: "failed" if error else "completed",
+            GradingJob.total: stats.total_submissions,
+            GradingJob.done: stats.submissions,
+            GradingJob.failed: stats.failed_submissions,
+            GradingJob.error: error,
+            GradingJob.heartbeat_at: now,
+            GradingJob.finished_at: now,
+        },
+        synchronize_session=False,
+    )
+    db.commit()
+
+def requeue_stale_jobs(db: Session, *, stale_after_seconds: int) -> int:
+    """
+    Puts 'running' jobs whose worker stopped sending heartbeats back in the queue.
+    Returns the number of jobs requeued.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=stale_after_seconds)
+    requeued = (
+        db.query(GradingJob)
+        .filter(GradingJob.status == "running", GradingJob.heartbeat_at < cutoff)
+        .update({GradingJob.status: "queued"}, synchronize_session=False)
+    )
+    db.commit()
+    return requeued
+
+def get_queue_depth(db: Session) -> Dict[str, int]:
+    """
+    Number of queued and running jobs.
+    """
+    counts = dict(
+        db.query(GradingJob.status, func.count(GradingJob.id))
+        .filter(GradingJob.status.in_(ACTIVE_STATUSES))
+        .group_by(GradingJob.status)
+        .all()
+    )
+    return {status: counts.get(status, 0) for status in ACTIVE_STATUSES}
+
+def get_oldest_queued_at(db: Session) -> datetime | None:
+    """
+    When the job that has waited longest in the queue was created.
+    """
+    return db.query(func.min(GradingJob.created_at)).filter(GradingJob.status == "queued").scalar()
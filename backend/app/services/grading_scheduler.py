@@ -0,0 +1,136 @@
+# app/services/grading_scheduler.py
+
+import asyncio
+import heapq
+import itertools
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# Lower values are admitted first. Overall-feedback calls jump ahead of queued
+# answers so a submission is finished as soon as its last answer is graded.
+FEEDBACK_PRIORITY = 0
+ANSWER_PRIORITY = 1
+
+
+@dataclass
+class GradingStats:
+    """
+    Counters collected over a single grading run.
+    """
+    total_submissions: int = 0
+    submissions: int = 0
+    failed_submissions: int = 0
+    answers: int = 0
+    # Answers that still needed a grade when the run started
+    outstanding_answers: int = 0
+    # Distinct answers actually sent for grading after deduplication
+    unique_answers: int = 0
+    failed_answers: int = 0
+    # Answers already graded by an earlier, interrupted run
+    resumed_answers: int = 0
+    llm_calls: int = 0
+    # Times the run waited for the AI service's circuit breaker to recover
+    pauses: int = 0
+    # Submissions left ungraded because the run gave up waiting for the AI service
+    abandoned_submissions: int = 0
+    started_at: float = field(default_factory=time.perf_counter)
+    finished_at: float | None = None
+
+    def finish(self) -> None:
+        self.finished_at = time.perf_counter()
+
+    @property
+    def elapsed_seconds(self) -> float:
+        end = self.finished_at if self.finished_at is not None else time.perf_counter()
+        return end - self.started_at
+
+    @property
+    def answers_per_second(self) -> float:
+        elapsed = self.elapsed_seconds
+        return self.answers / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def dedup_ratio(self) -> float:
+        """Share of answers that reused another answer's grade."""
+        return 1 - self.unique_answers / self.outstanding_answers if self.outstanding_answers else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "total_submissions": self.total_submissions,
+            "submissions": self.submissions,
+            "failed_submissions": self.failed_submissions,
+            "answers": self.answers,
+            "outstanding_answers": self.outstanding_answers,
+            "unique_answers": self.unique_answers,
+            "dedup_ratio": round(self.dedup_ratio, 4),
+            "failed_answers": self.failed_answers,
+            "resumed_answers": self.resumed_answers,
+            "llm_calls": self.llm_calls,
+            "pauses": self.pauses,
+            "abandoned_submissions": self.abandoned_submissions,
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+            "answers_per_second": round(self.answers_per_second, 2),
+        }
+
+
+class GradingScheduler:
+    """
+    A bounded work pool for the LLM calls of a grading run.
+
+    All answers of all ungraded submissions are submitted at once, but at most
+    `max_in_flight` calls are outstanding at any time. Waiting calls are admitted
+    by priority, then in submission order.
+    """
+
+    def __init__(self, max_in_flight: int, stats: GradingStats | None = None):
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1.")
+        self.max_in_flight = max_in_flight
+        self.stats = stats if stats is not None else GradingStats()
+        self._in_flight = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+
+    async def run(
+        self,
+        fn: Callable[..., Awaitable[T]],
+        *args: Any,
+        priority: int = ANSWER_PRIORITY,
+        **kwargs: Any,
+    ) -> T:
+        """
+        Waits for a free slot, then awaits `fn(*args, **kwargs)` inside it.
+        """
+        await self._acquire(priority)
+        try:
+            self.stats.llm_calls += 1
+            return await fn(*args, **kwargs)
+        finally:
+            self._release()
+
+    async def _acquire(self, priority: int) -> None:
+        if self._in_flight < self.max_in_flight and not self._waiters:
+            self._in_flight += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            # The slot may have been handed over just before the cancellation landed.
+            if waiter.done() and not waiter.cancelled():
+                self._release()
+            raise
+
+    def _release(self) -> None:
+        # Hand the slot straight to the next live waiter; only free it if nobody is waiting.
+        while self._waiters:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._in_flight -= 1
@@ -0,0 +1,139 @@
+# app/services/grading_worker.py
+
+import asyncio
+import contextlib
+import logging
+from uuid import UUID
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal, SessionLocal, async_engine
+from app.services import grading_job_service, llm_client, llm_provider, submission_service
+from app.services.grading_scheduler import GradingStats
+
+logger = logging.getLogger(__name__)
+
+class GradingWorker:
+    """
+    Picks queued grading jobs off the `grading_jobs` table and runs them one at a time.
+
+    The worker polls every GRADING_WORKER_POLL_SECONDS and can be woken early with
+    `notify()` when a job is queued by the same process. It runs inside the API
+    process (started from the FastAPI lifespan) or standalone via
+    `python -m app.services.grading_worker`.
+    """
+
+    def __init__(self, poll_interval: float | None = None):
+        self.poll_interval = poll_interval or settings.GRADING_WORKER_POLL_SECONDS
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run_forever(), name="grading-worker")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    def notify(self) -> None:
+        """Wakes the worker so a freshly queued job starts without waiting for the next poll."""
+        self._wakeup.set()
+
+    async def run_forever(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self._requeue_stale_jobs)
+                job = await asyncio.to_thread(self._claim_next_job)
+            except Exception:
+                logger.exception("Grading worker failed to poll for jobs")
+                job = None
+
+            if job is None:
+                self._wakeup.clear()
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                continue
+
+            await self.run_job(*job)
+
+    async def run_job(self, job_id: UUID, exam_id: UUID) -> None:
+        """
+        Grades one exam while a side task mirrors progress onto the job row.
+        """
+        stats = GradingStats()
+        heartbeat = asyncio.create_task(self._report_progress(job_id, stats))
+        error = None
+        db = AsyncSessionLocal()
+        try:
+            await submission_service.grade_all_submissions_for_exam(
+                db=db, exam_id=exam_id, stats=stats
+            )
+        except asyncio.CancelledError:
+            # Leave the job 'running'; its heartbeat goes stale and it is requeued.
+            raise
+        except Exception as e:
+            logger.exception("Grading job %s failed", job_id)
+            error = str(e) or e.__class__.__name__
+        finally:
+            heartbeat.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await heartbeat
+            await db.close()
+
+        stats.finish()
+        await asyncio.to_thread(self._finish_job, job_id, stats, error)
+        logger.info("Grading job %s finished: %s", job_id, stats.as_dict())
+
+    async def _report_progress(self, job_id: UUID, stats: GradingStats) -> None:
+        while True:
+            await asyncio.sleep(settings.GRADING_JOB_HEARTBEAT_SECONDS)
+            try:
+                await asyncio.to_thread(self._record_progress, job_id, stats)
+            except Exception:
+                logger.exception("Failed to record progress for grading job %s", job_id)
+
+    # --- Blocking DB helpers, run in a worker thread ---
+
+    @staticmethod
+    def _claim_next_job() -> tuple[UUID, UUID] | None:
+        with SessionLocal() as db:
+            job = grading_job_service.claim_next_job(db)
+            return (job.id, job.exam_id) if job else None
+
+    @staticmethod
+    def _requeue_stale_jobs() -> None:
+        with SessionLocal() as db:
+            requeued = grading_job_service.requeue_stale_jobs(
+                db, stale_after_seconds=settings.GRADING_JOB_STALE_SECONDS
+            )
+        if requeued:
+            logger.warning("Requeued %d stale grading job(s)", requeued)
+
+    @staticmethod
+    def _record_progress(job_id: UUID, stats: GradingStats) -> None:
+        with SessionLocal() as db:
+            grading_job_service.record_progress(db, job_id=job_id, stats=stats)
+
+    @staticmethod
+    def _finish_job(job_id: UUID, stats: GradingStats, error: str | None) -> None:
+        with SessionLocal() as db:
+            grading_job_service.finish_job(db, job_id=job_id, stats=stats, error=error)
+
+grading_worker = GradingWorker()
+
+async def _run_standalone() -> None:
+    await llm_client.start_llm_client()
+    try:
+        await GradingWorker().run_forever()
+    finally:
+        await llm_provider.close_llm_provider()
+        await llm_client.close_llm_client()
+        await async_engine.dispose()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_run_standalone())
@@ -0,0 +1,51 @@
+# app/services/llm_client.py
+
+import httpx
+
+from app.core.config import settings
+
+# One pooled client for every LLM request made by this process. Reusing it keeps
+# TCP/TLS connections (and HTTP/2 streams) alive between grading calls.
+_client: httpx.AsyncClient | None = None
+
+def _build_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=settings.LLM_HTTP2,
+        limits=httpx.Limits(
+            max_connections=settings.LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        timeout=httpx.Timeout(
+            settings.LLM_TIMEOUT_SECONDS,
+            connect=settings.LLM_CONNECT_TIMEOUT_SECONDS,
+            pool=settings.LLM_POOL_TIMEOUT_SECONDS,
+        ),
+    )
+
+async def start_llm_client() -> None:
+    """
+    Opens the shared client. Called from the FastAPI lifespan on startup.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+
+async def close_llm_client() -> None:
+    """
+    Closes the shared client and its pooled connections. Called on shutdown.
+    """
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+def get_llm_client() -> httpx.AsyncClient:
+    """
+    Returns the shared client, creating it on first use outside the app lifespan
+    (e.g. in the standalone grading worker or scripts).
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
@@ -0,0 +1,96 @@
+# app/services/llm_provider.py
+
+from abc import ABC, abstractmethod
+from typing import Any, Dict
+
+import httpx
+
+from app.core.config import settings
+from app.services import llm_client
+
+class LLMProvider(ABC):
+    """
+    Sends one generateContent request and returns the decoded response body.
+
+    Payloads and responses use the Gemini REST format. Implementations raise
+    httpx.HTTPStatusError for error responses and httpx.RequestError for transport
+    failures, so retries, throttling and the circuit breaker treat every provider alike.
+    """
+
+    # Part of the grading cache key: results from different models are never mixed.
+    model: str
+
+    @abstractmethod
+    async def generate_content(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        ...
+
+    async def aclose(self) -> None:
+        """Releases provider-owned resources. The shared LLM client is closed by the app."""
+
+
+class GeminiProvider(LLMProvider):
+    """
+    Google Gemini over the shared, pooled LLM client.
+
+    GEMINI_BASE_URL can point at any server speaking the same API, such as the
+    local fake in `app.services.fake_llm`.
+    """
+
+    def __init__(self, *, model: str, api_key: str, base_url: str):
+        self.model = model
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+
+    def _client(self) -> httpx.AsyncClient:
+        return llm_client.get_llm_client()
+
+    async def generate_content(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        response = await self._client().post(
+            f"{self.base_url}/models/{self.model}:generateContent",
+            params={"key": self.api_key},
+            json=payload,
+        )
+        response.raise_for_status()
+        return response.json()
+
+
+_provider: LLMProvider | None = None
+
+def _build_provider() -> LLMProvider:
+    if settings.LLM_PROVIDER == "gemini":
+        return GeminiProvider(
+            model=settings.GEMINI_MODEL,
+            api_key=settings.GEMINI_API_KEY,
+            base_url=settings.GEMINI_BASE_URL,
+        )
+    if settings.LLM_PROVIDER == "fake":
+        from app.services.fake_llm import FakeLLM, FakeLLMConfig, FakeLLMProvider
+
+        return FakeLLMProvider(FakeLLM(FakeLLMConfig.from_settings()))
+    raise ValueError(f"Unknown LLM_PROVIDER: {settings.LLM_PROVIDER!r}")
+
+def get_llm_provider() -> LLMProvider:
+    """
+    Returns the provider selected by LLM_PROVIDER, creating it on first use.
+    """
+    global _provider
+    if _provider is None:
+        _provider = _build_provider()
+    return _provider
+
+def set_llm_provider(provider: LLMProvider | None) -> None:
+    """
+    Replaces the process-wide provider, e.g. with a configured fake in a benchmark.
+    Passing None goes back to the one selected by LLM_PROVIDER.
+    """
+    global _provider
+    _provider = provider
+
+async def close_llm_provider() -> None:
+    """
+    Closes the current provider's own resources, if one was created. Called on shutdown.
+    """
+    global _provider
+    if _provider is not None:
+        await _provider.aclose()
+        _provider = None
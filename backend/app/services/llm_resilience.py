@@ -0,0 +1,228 @@
+# app/services/llm_resilience.py
+
+import asyncio
+import email.utils
+import logging
+import random
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+# 429 means "slow down", not "the provider is down"; it is retried but never trips the breaker.
+OUTAGE_STATUS_CODES = (500, 502, 503, 504)
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the provider while the circuit breaker is open."""
+
+def is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in RETRYABLE_STATUS_CODES
+    return isinstance(exc, httpx.RequestError)
+
+def _is_outage(exc: BaseException) -> bool:
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in OUTAGE_STATUS_CODES
+    return isinstance(exc, httpx.RequestError)
+
+def _retry_after_seconds(exc: BaseException) -> float | None:
+    if not isinstance(exc, httpx.HTTPStatusError):
+        return None
+    value = exc.response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        try:
+            when = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class CircuitBreaker:
+    """
+    Classic closed / open / half-open breaker.
+
+    After `failure_threshold` consecutive outage failures the breaker opens and
+    every call fails fast with CircuitOpenError. Once `recovery_seconds` have
+    passed, a single probe call is let through: success closes the breaker, an
+    outage failure or a cancelled probe opens it again, and any other failure
+    (the provider answered, e.g. 429) only frees the slot for the next probe.
+    """
+
+    def __init__(self, *, failure_threshold: int, recovery_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected_calls = 0
+        self._probe_in_flight = False
+
+    def before_call(self) -> bool:
+        """
+        Admits a call or raises CircuitOpenError. Returns True if the call is the
+        half-open probe, whose caller must then report how it ended.
+        """
+        if self.state == "closed":
+            return False
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.recovery_seconds:
+            self.state = "half_open"
+        if self.state == "half_open" and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        self.rejected_calls += 1
+        raise CircuitOpenError("AI service is unavailable; circuit breaker is open.")
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self, exc: BaseException, *, probe: bool = False) -> None:
+        if not _is_outage(exc):
+            # The provider answered but proved nothing about recovery; stay half-open
+            # and let the next call probe.
+            if probe:
+                self._probe_in_flight = False
+            return
+        self.consecutive_failures += 1
+        if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+            self._open()
+        if probe:
+            self._probe_in_flight = False
+
+    def abandon_probe(self) -> None:
+        """
+        The probe was cancelled before it finished: reopen, so a later call probes again.
+        """
+        self._open()
+        self._probe_in_flight = False
+
+    def _open(self) -> None:
+        if self.state != "open":
+            logger.warning("LLM circuit breaker opened after %d failures", self.consecutive_failures)
+            self.times_opened += 1
+        self.state = "open"
+        self.opened_at = time.monotonic()
+
+    def seconds_until_probe(self) -> float:
+        if self.state != "open":
+            return 0.0
+        return max(0.0, self.recovery_seconds - (time.monotonic() - self.opened_at))
+
+
+class RetryBudget:
+    """
+    Caps retries to a fraction of traffic: every first attempt deposits `ratio`
+    and every retry withdraws one, so a full outage cannot multiply load.
+    """
+
+    def __init__(self, *, ratio: float, minimum: float = 10.0, maximum: float = 100.0):
+        self.ratio = ratio
+        self.maximum = maximum
+        self.balance = minimum
+
+    def deposit(self) -> None:
+        self.balance = min(self.maximum, self.balance + self.ratio)
+
+    def try_withdraw(self) -> bool:
+        if self.balance >= 1.0:
+            self.balance -= 1.0
+            return True
+        return False
+
+
+class ResilientCaller:
+    """
+    Retries idempotent LLM calls with full-jitter exponential backoff (honouring
+    Retry-After), within a retry budget, behind a circuit breaker.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_attempts: int,
+        base_delay: float,
+        max_delay: float,
+        budget: RetryBudget,
+        breaker: CircuitBreaker,
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self.breaker = breaker
+        self.calls = 0
+        self.retries = 0
+        self.budget_exhausted = 0
+        self.give_ups = 0
+
+    async def call(self, fn: Callable[[], Awaitable[T]]) -> T:
+        self.calls += 1
+        self.budget.deposit()
+        attempt = 1
+        while True:
+            probe = self.breaker.before_call()
+            try:
+                result = await fn()
+            except Exception as exc:
+                self.breaker.record_failure(exc, probe=probe)
+                if not is_retryable(exc):
+                    raise
+                if attempt >= self.max_attempts:
+                    self.give_ups += 1
+                    raise
+                if not self.budget.try_withdraw():
+                    self.budget_exhausted += 1
+                    self.give_ups += 1
+                    raise
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+                retry_after = _retry_after_seconds(exc)
+                if retry_after is not None:
+                    delay = max(delay, min(retry_after, self.max_delay))
+                self.retries += 1
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                # Cancelled (client gone, shutdown, a sibling task failed): a probe
+                # must not keep its slot, or the breaker stays half-open for good.
+                if probe:
+                    self.breaker.abandon_probe()
+                raise
+            self.breaker.record_success()
+            return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "retry_budget_exhausted": self.budget_exhausted,
+            "give_ups": self.give_ups,
+            "breaker_state": self.breaker.state,
+            "breaker_opened": self.breaker.times_opened,
+            "breaker_rejected_calls": self.breaker.rejected_calls,
+        }
+
+llm_resilience = ResilientCaller(
+    max_attempts=settings.LLM_RETRY_MAX_ATTEMPTS,
+    base_delay=settings.LLM_RETRY_BASE_DELAY_SECONDS,
+    max_delay=settings.LLM_RETRY_MAX_DELAY_SECONDS,
+    budget=RetryBudget(ratio=settings.LLM_RETRY_BUDGET_RATIO),
+    breaker=CircuitBreaker(
+        failure_threshold=settings.LLM_BREAKER_FAILURE_THRESHOLD,
+        recovery_seconds=settings.LLM_BREAKER_RECOVERY_SECONDS,
+    ),
+)
@@ -0,0 +1,215 @@
+# app/services/llm_throttle.py
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict
+
+from app.core.config import settings
+
+# Responses that mean "slow down" rather than "this request is wrong"
+THROTTLE_STATUS_CODES = (429, 503)
+
+class TokenBucket:
+    """
+    Refills `rate_per_minute` units per minute up to one minute's worth of burst.
+    Waiters are served in arrival order. A rate of 0 disables the bucket.
+    """
+
+    def __init__(self, rate_per_minute: float):
+        self.rate_per_minute = rate_per_minute
+        self.capacity = float(rate_per_minute)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock: asyncio.Lock | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self.wait_seconds = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate_per_minute > 0
+
+    async def acquire(self, amount: float = 1) -> None:
+        if not self.enabled:
+            return
+        # A request bigger than the whole budget still goes through once the bucket is full.
+        amount = min(amount, self.capacity)
+        async with self._get_lock():
+            while True:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                shortfall = amount - self._tokens
+                delay = shortfall * 60.0 / self.rate_per_minute
+                self.wait_seconds += delay
+                await asyncio.sleep(delay)
+
+    def adjust(self, amount: float) -> None:
+        """
+        Debits (or refunds, if negative) units after the fact, e.g. once the real
+        token usage of a request is known. The balance may go negative.
+        """
+        if not self.enabled:
+            return
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens - amount)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._updated_at
+        self._updated_at = now
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate_per_minute / 60.0)
+
+    def _get_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._loop is not loop:
+            self._lock, self._loop = asyncio.Lock(), loop
+        return self._lock
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD limit on concurrent requests.
+
+    Each success raises the limit by 1/limit (about +1 per round of requests);
+    a throttling response multiplies it by `decrease_factor`. Throttles reported by
+    requests admitted before the last decrease are ignored, so one burst of 429s
+    only backs off once.
+    """
+
+    def __init__(
+        self,
+        *,
+        initial: int,
+        minimum: int,
+        maximum: int,
+        decrease_factor: float = 0.5,
+    ):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = float(max(minimum, min(initial, maximum)))
+        self.decrease_factor = decrease_factor
+        self.in_flight = 0
+        self.decreases = 0
+        self._condition: asyncio.Condition | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    async def acquire(self) -> int:
+        """
+        Waits for room under the current limit. Returns the generation to pass back to `release`.
+        """
+        condition = self._get_condition()
+        async with condition:
+            await condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+            return self.decreases
+
+    async def release(self, generation: int, *, throttled: bool = False, succeeded: bool = False) -> None:
+        condition = self._get_condition()
+        async with condition:
+            self.in_flight -= 1
+            if throttled:
+                if generation == self.decreases:
+                    self.limit = max(self.minimum, self.limit * self.decrease_factor)
+                    self.decreases += 1
+            elif succeeded:
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            condition.notify_all()
+
+    def _get_condition(self) -> asyncio.Condition:
+        loop = asyncio.get_running_loop()
+        if self._condition is None or self._loop is not loop:
+            self._condition, self._loop = asyncio.Condition(), loop
+        return self._condition
+
+
+class RequestSlot:
+    """
+    Handed to the caller for the duration of one request so it can report the outcome.
+    """
+
+    def __init__(self, estimated_tokens: int):
+        self.estimated_tokens = estimated_tokens
+        self.status_code: int | None = None
+        self.actual_tokens: int | None = None
+
+    def observe(self, status_code: int) -> None:
+        self.status_code = status_code
+
+    def record_usage(self, total_tokens: int | None) -> None:
+        self.actual_tokens = total_tokens
+
+
+class LLMThrottle:
+    """
+    Process-wide admission control for LLM requests: requests/min and tokens/min
+    budgets plus an adaptive concurrency limit.
+    """
+
+    def __init__(
+        self,
+        *,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        concurrency_initial: int,
+        concurrency_min: int,
+        concurrency_max: int,
+    ):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.concurrency = AdaptiveConcurrencyLimiter(
+            initial=concurrency_initial, minimum=concurrency_min, maximum=concurrency_max
+        )
+        self.throttled_responses = 0
+
+    @asynccontextmanager
+    async def slot(self, estimated_tokens: int) -> AsyncIterator[RequestSlot]:
+        await self.requests.acquire(1)
+        await self.tokens.acquire(estimated_tokens)
+        generation = await self.concurrency.acquire()
+
+        slot = RequestSlot(estimated_tokens)
+        try:
+            yield slot
+        finally:
+            throttled = slot.status_code in THROTTLE_STATUS_CODES
+            if throttled:
+                self.throttled_responses += 1
+            if slot.actual_tokens is not None:
+                self.tokens.adjust(slot.actual_tokens - estimated_tokens)
+            await self.concurrency.release(
+                generation,
+                throttled=throttled,
+                succeeded=slot.status_code is not None and slot.status_code < 400,
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "concurrency_limit": round(self.concurrency.limit, 2),
+            "in_flight": self.concurrency.in_flight,
+            "concurrency_decreases": self.concurrency.decreases,
+            "throttled_responses": self.throttled_responses,
+            "request_wait_seconds": round(self.requests.wait_seconds, 3),
+            "token_wait_seconds": round(self.tokens.wait_seconds, 3),
+        }
+
+def estimate_tokens(payload: Dict[str, Any]) -> int:
+    """
+    Rough prompt size for budgeting before the request is sent: ~4 characters per token.
+    """
+    chars = 0
+    for content in payload.get("contents", []):
+        for part in content.get("parts", []):
+            chars += len(part.get("text", ""))
+    for part in payload.get("systemInstruction", {}).get("parts", []):
+        chars += len(part.get("text", ""))
+    return max(1, chars // 4)
+
+llm_throttle = LLMThrottle(
+    requests_per_minute=settings.LLM_REQUESTS_PER_MINUTE,
+    tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE,
+    concurrency_initial=settings.LLM_CONCURRENCY_INITIAL,
+    concurrency_min=settings.LLM_CONCURRENCY_MIN,
+    concurrency_max=settings.LLM_CONCURRENCY_MAX,
+)
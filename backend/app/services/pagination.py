@@ -0,0 +1,93 @@
+# app/services/pagination.py
+
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Generic, List, Sequence, TypeVar
+from uuid import UUID
+
+from sqlalchemy import bindparam, tuple_
+from sqlalchemy.orm import Query
+
+T = TypeVar("T")
+
+MAX_PAGE_SIZE = 500
+
+class InvalidCursor(ValueError):
+    """
+    Raised for a cursor that was not issued by the list it is passed to.
+    """
+
+@dataclass
+class Page(Generic[T]):
+    """
+    One page of a keyset-paginated list. `next_cursor` is None on the last page.
+    """
+    items: List[T]
+    next_cursor: str | None
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = json.dumps([value.isoformat() if isinstance(value, datetime) else str(value) for value in values])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, keys: Sequence[Any]) -> List[Any]:
+    """
+    The sort key values a cursor holds, converted to the Python types of `keys`.
+    """
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        raw_values = json.loads(payload)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor("Malformed cursor.")
+    if not isinstance(raw_values, list) or len(raw_values) != len(keys):
+        raise InvalidCursor("Malformed cursor.")
+
+    values = []
+    for key, raw in zip(keys, raw_values):
+        python_type = key.type.python_type
+        try:
+            if python_type is datetime:
+                values.append(datetime.fromisoformat(raw))
+            elif python_type is UUID:
+                values.append(UUID(raw))
+            else:
+                values.append(python_type(raw))
+        except (TypeError, ValueError):
+            raise InvalidCursor("Malformed cursor.")
+    return values
+
+def keyset_page(
+    query: Query, *, keys: Sequence[Any], descending: bool, limit: int | None, cursor: str | None
+) -> Page:
+    """
+    Orders `query` by `keys` (the last of which must be unique, e.g. the primary
+    key) and returns the `limit` rows following `cursor`, or all of them when
+    `limit` is None.
+
+    Each page starts where the previous one ended, by comparing the sort key
+    instead of skipping rows with OFFSET, so later pages cost the same as the
+    first (given an index on the keys) and rows inserted meanwhile neither
+    repeat nor go missing.
+    """
+    if cursor:
+        after = [
+            bindparam(None, value, type_=key.type)
+            for key, value in zip(keys, decode_cursor(cursor, keys))
+        ]
+        row_key = tuple_(*keys)
+        query = query.filter(row_key < tuple_(*after) if descending else row_key > tuple_(*after))
+    ordering = [key.desc() if descending else key.asc() for key in keys]
+
+    query = query.order_by(*ordering)
+    if limit is None:
+        return Page(items=query.all(), next_cursor=None)
+
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return Page(items=rows, next_cursor=None)
+    rows = rows[:limit]
+    last = rows[-1]
+    return Page(items=rows, next_cursor=encode_cursor([getattr(last, key.key) for key in keys]))
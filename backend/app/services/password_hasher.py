@@ -0,0 +1,128 @@
+# app/services/password_hasher.py
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict
+
+from app.core import security
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Recent timings kept per series for the latency percentiles
+LATENCY_SAMPLES = 2048
+
+class PasswordHasherBusy(Exception):
+    """
+    Raised when a hash operation is refused or abandoned because the pool is saturated.
+    """
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a dedicated, size-limited thread pool.
+
+    bcrypt releases the GIL, so the workers use separate cores while the event
+    loop, and the threadpool serving sync endpoints, stay free. At most
+    `max_pending` operations are admitted (running or queued); beyond that, and
+    for operations that waited longer than `queue_timeout_seconds` for a worker,
+    callers get PasswordHasherBusy instead of an unbounded queue.
+    """
+
+    def __init__(self, *, workers: int, max_pending: int, queue_timeout_seconds: float):
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.expired = 0
+        self._latencies: Dict[str, Deque[float]] = {
+            series: deque(maxlen=LATENCY_SAMPLES) for series in ("queue_wait", "verify", "hash")
+        }
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run("verify", security.verify_password, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", security.get_password_hash, password)
+
+    async def _run(self, operation: str, function: Callable[..., Any], *args: Any) -> Any:
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise PasswordHasherBusy(f"{self.pending} password hash operations already pending")
+            self.pending += 1
+
+        submitted_at = time.perf_counter()
+
+        def job() -> Any:
+            started_at = time.perf_counter()
+            waited = started_at - submitted_at
+            self._record("queue_wait", waited)
+            # The caller has likely given up by now; skip the expensive part
+            if waited > self.queue_timeout_seconds:
+                with self._lock:
+                    self.expired += 1
+                raise PasswordHasherBusy(f"waited {waited:.2f}s for a password hash worker")
+            result = function(*args)
+            self._record(operation, time.perf_counter() - started_at)
+            return result
+
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self._get_executor(), job)
+        finally:
+            with self._lock:
+                self.pending -= 1
+        with self._lock:
+            self.completed += 1
+        return result
+
+    def _record(self, series: str, seconds: float) -> None:
+        with self._lock:
+            self._latencies[series].append(seconds)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+            return self._executor
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            samples = {series: sorted(values) for series, values in self._latencies.items()}
+            counters = {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "expired": self.expired,
+            }
+        return {**counters, **{f"{series}_ms": _percentiles(values) for series, values in samples.items()}}
+
+def _percentiles(sorted_seconds: list) -> Dict[str, float | None]:
+    def at(share: float) -> float | None:
+        if not sorted_seconds:
+            return None
+        index = min(len(sorted_seconds) - 1, int(share * len(sorted_seconds)))
+        return round(sorted_seconds[index] * 1000, 2)
+    return {"p50": at(0.5), "p95": at(0.95), "p99": at(0.99), "max": at(1.0)}
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    queue_timeout_seconds=settings.PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS,
+)
@@ -0,0 +1,111 @@
+# app/services/score_statistics.py
+
+"""
+Vectorized score statistics over column arrays, for the distribution analytics.
+
+Scores are percentages of the marks available (0-100). Everything here works on
+whole NumPy arrays; callers fetch the columns in one query and never build ORM
+objects.
+"""
+
+from typing import Any, Dict, List
+
+import numpy as np
+
+# Share of students in each of the upper and lower groups of the discrimination index
+DISCRIMINATION_GROUP_SHARE = 0.27
+
+def _number(value) -> float | None:
+    """A JSON-friendly float, or None for NaN (e.g. the spread of a single score)."""
+    value = float(value)
+    return None if np.isnan(value) else round(value, 4)
+
+def percentages(earned: np.ndarray, total: np.ndarray) -> np.ndarray:
+    """
+    earned / total as a percentage; submissions worth zero marks are dropped.
+    """
+    earned = np.asarray(earned, dtype=float)
+    total = np.asarray(total, dtype=float)
+    scored = total > 0
+    return earned[scored] / total[scored] * 100
+
+def distribution(scores: np.ndarray, bins: int) -> Dict[str, Any]:
+    """
+    Count, mean, population standard deviation, five-number summary and a
+    histogram of `bins` equal-width bins over 0-100.
+    """
+    counts, edges = np.histogram(np.clip(scores, 0, 100), bins=bins, range=(0, 100))
+    summary = {
+        "count": int(scores.size),
+        "mean": None, "std": None, "min": None, "q1": None, "median": None, "q3": None, "max": None,
+        "histogram": {"bin_edges": [round(float(edge), 4) for edge in edges], "counts": counts.tolist()},
+    }
+    if scores.size:
+        minimum, q1, median, q3, maximum = np.percentile(scores, [0, 25, 50, 75, 100])
+        summary.update(
+            mean=_number(scores.mean()), std=_number(scores.std()),
+            min=_number(minimum), q1=_number(q1), median=_number(median), q3=_number(q3), max=_number(maximum),
+        )
+    return summary
+
+def grouped_distributions(group_codes: np.ndarray, scores: np.ndarray, groups: int, bins: int) -> List[Dict[str, Any]]:
+    """
+    distribution() for each group, where group_codes[i] in [0, groups) is the
+    group of scores[i]. Sorts once and slices, rather than masking per group.
+    """
+    order = np.argsort(group_codes, kind="stable")
+    boundaries = np.searchsorted(group_codes[order], np.arange(groups + 1))
+    sorted_scores = scores[order]
+    return [distribution(sorted_scores[boundaries[g]:boundaries[g + 1]], bins) for g in range(groups)]
+
+def question_statistics(item_scores: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Classical item analysis of a (submissions x questions) matrix of the share of
+    each question's marks earned (0-1), NaN where a submission has no graded answer.
+
+    difficulty:            mean share of marks earned (higher is easier)
+    discrimination:        difficulty among the top 27% of submissions by total
+                           score minus that among the bottom 27%
+    item_rest_correlation: Pearson correlation of the item with the total of the
+                           other items (corrected point-biserial)
+    """
+    submissions, questions = item_scores.shape
+    answered = ~np.isnan(item_scores)
+    filled = np.where(answered, item_scores, 0.0)
+    answers = answered.sum(axis=0)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        difficulty = filled.sum(axis=0) / answers
+
+        totals = filled.sum(axis=1)
+        group_size = int(np.floor(submissions * DISCRIMINATION_GROUP_SHARE))
+        if group_size:
+            ranking = np.argsort(totals, kind="stable")
+            lower, upper = ranking[:group_size], ranking[-group_size:]
+            discrimination = (
+                filled[upper].sum(axis=0) / answered[upper].sum(axis=0)
+                - filled[lower].sum(axis=0) / answered[lower].sum(axis=0)
+            )
+        else:
+            discrimination = np.full(questions, np.nan)
+
+        # Correlate each item with the rest score, over the submissions that answered it
+        rest = totals[:, None] - filled
+        weights = answered.astype(float)
+        item_mean = difficulty
+        rest_mean = (rest * weights).sum(axis=0) / answers
+        item_dev = np.where(answered, filled - item_mean, 0.0)
+        rest_dev = np.where(answered, rest - rest_mean, 0.0)
+        covariance = (item_dev * rest_dev).sum(axis=0)
+        spread = np.sqrt((item_dev ** 2).sum(axis=0) * (rest_dev ** 2).sum(axis=0))
+        correlation = covariance / spread
+
+    return {
+        "answers": answers,
+        "difficulty": difficulty,
+        "discrimination": discrimination,
+        "item_rest_correlation": correlation,
+    }
+
+def as_numbers(values: np.ndarray) -> List[float | None]:
+    return [_number(value) for value in values]
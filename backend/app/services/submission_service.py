@@ -1,34 +1,77 @@
 # app/service/submission_service.py
 
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload
 from uuid import UUID
 import asyncio
-from typing import List
+import logging
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List
+
+from app.core.config import settings
 
-from app.models.user import User
 from app.models.exam import Exam
 from app.models.submission import Submission
 from app.models.answer import Answer
+from app.models.question import Question
 from app.models.enrollment import enrollment
 from app.models.schedule import CourseSchedule
 from app.models.course import Course
+from app.schemas.feedback import AIFeedback
 from app.schemas.submission import SubmissionCreate
-from app.services import ai_service
+from app.services import ai_service, analytics_rollup_service, answer_dedup
+from app.services.analytics_rollup_service import RollupScope
+from app.services.grading_cache import grading_cache
+from app.services.llm_resilience import CircuitOpenError, llm_resilience
+from app.services.llm_throttle import llm_throttle
+from app.services.pagination import Page, keyset_page
+from app.services.grading_scheduler import (
+    FEEDBACK_PRIORITY,
+    GradingScheduler,
+    GradingStats,
+)
+
+logger = logging.getLogger(__name__)
 
 # --- Student-Focused Functions ---
 
-def get_submissions_by_student(db: Session, *, student_id: UUID) -> List[Submission]:
+def _filter_submissions(
+    query, *, graded: bool | None, submitted_after: datetime | None, submitted_before: datetime | None
+):
     """
-    Retrieves all submissions made by a specific student.
-    Eagerly loads the exam details for each submission.
-    Orders by most recent first.
+    Narrows a submissions query to graded or ungraded rows and to a submission time range.
     """
-    return (
-        db.query(Submission)
-        .options(joinedload(Submission.exam))
-        .filter(Submission.student_id == student_id)
-        .order_by(Submission.submitted_at.desc())
-        .all()
+    if graded is not None:
+        query = query.filter(Submission.total_marks.is_not(None) if graded else Submission.total_marks.is_(None))
+    if submitted_after is not None:
+        query = query.filter(Submission.submitted_at >= submitted_after)
+    if submitted_before is not None:
+        query = query.filter(Submission.submitted_at < submitted_before)
+    return query
+
+def get_submissions_by_student(
+    db: Session,
+    *,
+    student_id: UUID,
+    graded: bool | None = None,
+    submitted_after: datetime | None = None,
+    submitted_before: datetime | None = None,
+    limit: int | None = None,
+    cursor: str | None = None,
+) -> Page[Submission]:
+    """
+    Retrieves a page of the submissions made by a specific student, most recent
+    first, optionally filtered. Eagerly loads the exam details for each submission.
+    """
+    query = db.query(Submission).options(joinedload(Submission.exam)).filter(Submission.student_id == student_id)
+    query = _filter_submissions(
+        query, graded=graded, submitted_after=submitted_after, submitted_before=submitted_before
+    )
+    return keyset_page(
+        query, keys=[Submission.submitted_at, Submission.id], descending=True, limit=limit, cursor=cursor
     )
 
 def get_submission_by_id_and_student(db: Session, *, submission_id: UUID, student_id: UUID) -> Submission | None:
@@ -47,7 +90,7 @@ def get_submission_by_id_and_student(db: Session, *, submission_id: UUID, studen
         .first()
     )
 
-def create_submission(db: Session, *, student: User, exam_id: UUID, submission_in: SubmissionCreate) -> Submission:
+def create_submission(db: Session, *, student_id: UUID, exam_id: UUID, submission_in: SubmissionCreate) -> Submission:
     """
     Creates a new exam submission and its associated answers in the database.
     """
@@ -70,7 +113,7 @@ def create_submission(db: Session, *, student: User, exam_id: UUID, submission_i
     is_enrolled = (
         db.query(enrollment)
         .filter(
-            enrollment.c.student_id == student.id,
+            enrollment.c.student_id == student_id,
             enrollment.c.course_id == course_id
         )
         .first()
@@ -80,7 +123,7 @@ def create_submission(db: Session, *, student: User, exam_id: UUID, submission_i
 
     existing_submission = (
         db.query(Submission)
-        .filter(Submission.student_id == student.id, Submission.exam_id == exam_id)
+        .filter(Submission.student_id == student_id, Submission.exam_id == exam_id)
         .first()
     )
     if existing_submission:
@@ -90,11 +133,20 @@ def create_submission(db: Session, *, student: User, exam_id: UUID, submission_i
         raise ValueError("The number of answers does not match the number of questions in the exam.")
 
     db_submission = Submission(
-        student_id=student.id,
+        student_id=student_id,
         exam_id=exam_id
     )
     db.add(db_submission)
-    db.flush()
+    try:
+        db.flush()
+    except IntegrityError:
+        # A concurrent request for the same exam got in first (uq_submissions_student_id_exam_id)
+        db.rollback()
+        raise ValueError("You have already submitted this exam.")
+
+    rollup_scope = RollupScope.for_exam(exam)
+    if rollup_scope:
+        analytics_rollup_service.record_submission(db, rollup_scope)
 
     for answer_in in submission_in.answers:
         db_answer = Answer(
@@ -110,97 +162,351 @@ def create_submission(db: Session, *, student: User, exam_id: UUID, submission_i
 
 # --- Teacher-Focused Functions ---
 
-def get_submissions_by_exam_and_teacher(db: Session, *, exam_id: UUID, teacher_id: UUID) -> List[Submission]:
+def get_submissions_by_exam_and_teacher(
+    db: Session,
+    *,
+    exam_id: UUID,
+    teacher_id: UUID,
+    graded: bool | None = None,
+    submitted_after: datetime | None = None,
+    submitted_before: datetime | None = None,
+    limit: int | None = None,
+    cursor: str | None = None,
+) -> Page[Submission]:
     """
-    Retrieves all submissions for a specific exam, but only if that exam
-    belongs to the specified teacher.
+    Retrieves a page of the submissions for a specific exam, most recent first and
+    optionally filtered, but only if that exam belongs to the specified teacher.
     """
-    return (
+    query = (
         db.query(Submission)
         .join(Submission.exam)
         .join(Exam.topic)
         .join(CourseSchedule.course)
         .filter(Submission.exam_id == exam_id, Course.teacher_id == teacher_id)
         .options(joinedload(Submission.student))
-        .order_by(Submission.submitted_at.desc())
-        .all()
+    )
+    query = _filter_submissions(
+        query, graded=graded, submitted_after=submitted_after, submitted_before=submitted_before
+    )
+    return keyset_page(
+        query, keys=[Submission.submitted_at, Submission.id], descending=True, limit=limit, cursor=cursor
     )
 
-async def grade_all_submissions_for_exam(db: Session, exam_id: UUID) -> int:
+def _schedule_answer_grading(
+    scheduler: GradingScheduler,
+    submissions: List[Submission],
+    exam: Exam,
+    questions: Dict[UUID, Question],
+) -> Dict[UUID, "asyncio.Future[AIFeedback]"]:
     """
-    Finds all ungraded submissions for an exam and grades them using the AI service.
+    Starts grading for every group of equivalent answers not graded yet and maps
+    each answer id to its group's result, so a single grade fans out to the whole group. Unless
+    GRADING_BATCH_SIZE is 1, groups of the same question are graded in batches.
     """
-    exam = (
-        db.query(Exam)
-        .options(
-            joinedload(Exam.submissions)
-            .joinedload(Submission.answers)
-            .joinedload(Answer.question)
+    answers = [
+        answer
+        for submission in submissions
+        for answer in submission.answers
+        if answer.grading_status != "graded"
+    ]
+    if settings.GRADING_DEDUP_ENABLED:
+        groups = answer_dedup.group_answers(
+            answers,
+            question_key=lambda a: a.question_id,
+            text_key=lambda a: a.answer_text,
+            similarity_threshold=settings.GRADING_DEDUP_SIMILARITY_THRESHOLD,
         )
-        .filter(Exam.id == exam_id)
-        .first()
-    )
+    else:
+        groups = [[answer] for answer in answers]
 
-    if not exam or not exam.grading_rules:
-        raise ValueError("Exam not found or grading rules have not been set.")
+    tasks: Dict[UUID, "asyncio.Future[AIFeedback]"] = {}
 
-    ungraded_submissions = [s for s in exam.submissions if s.overall_score is None]
+    if settings.GRADING_BATCH_SIZE <= 1:
+        for group in groups:
+            representative = group[0]
+            question = questions[representative.question_id]
+            task = asyncio.ensure_future(scheduler.run(
+                ai_service.grade_single_answer,
+                question_text=question.question_text,
+                answer_text=representative.answer_text,
+                grading_rules=exam.grading_rules,
+                marks=question.marks or 1,
+                exam_id=exam.id,
+            ))
+            for answer in group:
+                tasks[answer.id] = task
+        return tasks
 
-    if not ungraded_submissions:
-        return 0
+    # Batched mode: representatives of the same question share one request per batch
+    groups_by_question: Dict[UUID, List[List[Answer]]] = {}
+    for group in groups:
+        groups_by_question.setdefault(group[0].question_id, []).append(group)
 
-    for submission in ungraded_submissions:
-        grading_tasks = [
-            ai_service.grade_single_answer(
-                question_text=answer.question.question_text,
-                answer_text=answer.answer_text,
+    for question_id, question_groups in groups_by_question.items():
+        question = questions[question_id]
+        for start in range(0, len(question_groups), settings.GRADING_BATCH_SIZE):
+            batch = question_groups[start:start + settings.GRADING_BATCH_SIZE]
+            batch_task = asyncio.ensure_future(scheduler.run(
+                ai_service.grade_answer_batch,
+                question_text=question.question_text,
+                answers={str(i): group[0].answer_text for i, group in enumerate(batch)},
                 grading_rules=exam.grading_rules,
-                marks=answer.question.marks or 1
-            )
-            for answer in submission.answers
-        ]
-        
-        feedback_results = await asyncio.gather(*grading_tasks, return_exceptions=True)
-
-        total_score = 0
-        total_marks = 0
-        graded_answers_summary = []
-        
-        for i, result in enumerate(feedback_results):
-            answer = submission.answers[i]
+                marks=question.marks or 1,
+                exam_id=exam.id,
+            ))
+            for i, group in enumerate(batch):
+                item_task = asyncio.ensure_future(_batch_result(batch_task, str(i)))
+                for answer in group:
+                    tasks[answer.id] = item_task
+    return tasks
+
+async def _batch_result(batch_task: "asyncio.Future[Dict[str, AIFeedback | Exception]]", key: str) -> AIFeedback:
+    result = (await batch_task)[key]
+    if isinstance(result, Exception):
+        raise result
+    return result
+
+def _record_grade(answer: Answer, feedback: AIFeedback) -> None:
+    answer.feedback = feedback.feedback
+    answer.error_type = feedback.error_type
+    answer.awarded_marks = feedback.awarded_marks
+    answer.grading_status = "graded"
+
+def _record_grading_failure(answer: Answer, error: Exception) -> None:
+    logger.error("Error grading answer %s: %s", answer.id, error)
+    answer.feedback = "Error during AI grading."
+    answer.error_type = "system_error"
+    answer.awarded_marks = 0
+    answer.grading_status = "failed"
+
+async def _grade_submission(
+    db: AsyncSession,
+    write_lock: asyncio.Lock,
+    scheduler: GradingScheduler,
+    submission: Submission,
+    questions: Dict[UUID, Question],
+    rollup_scope: RollupScope | None,
+    answer_tasks: Dict[UUID, "asyncio.Future[AIFeedback]"],
+) -> bool:
+    """
+    Collects the grades of one submission's outstanding answers, then generates
+    its overall feedback as soon as the last of them is back, and commits.
+
+    Answers graded by an earlier, interrupted run are reused as they are.
+    Returns False if the AI service's circuit breaker was open for any of its
+    calls; the answers graded so far are committed, the submission stays ungraded
+    and only its remaining answers are retried later. A submission with an answer
+    that could not be graded is committed with that answer marked failed, and also
+    stays ungraded, so the next run retries it.
+
+    All submissions of a run share one AsyncSession, which must never be changed
+    while another coroutine is flushing it: objects are only modified, and the
+    session only committed, while holding `write_lock`.
+    """
+    outstanding = [answer for answer in submission.answers if answer.grading_status != "graded"]
+    feedback_results = await asyncio.gather(
+        *(answer_tasks[answer.id] for answer in outstanding), return_exceptions=True
+    )
+
+    async with write_lock:
+        for answer, result in zip(outstanding, feedback_results):
+            if isinstance(result, AIFeedback):
+                _record_grade(answer, result)
+        if any(isinstance(result, CircuitOpenError) for result in feedback_results):
+            await db.commit()
+            return False
+        for answer, result in zip(outstanding, feedback_results):
             if isinstance(result, Exception):
-                print(f"Error grading answer {answer.id}: {result}")
-                answer.feedback = "Error during AI grading."
-                answer.error_type = "system_error"
-                answer_marks = answer.question.marks or 1
-                awarded_marks = 0
-            else:
-                answer.feedback = result.feedback
-                answer.error_type = result.error_type
-                answer_marks = answer.question.marks or 1
-                awarded_marks = result.awarded_marks
-            total_score += awarded_marks
-            total_marks += answer_marks
-            graded_answers_summary.append({
-                "question": answer.question.question_text,
-                "feedback": answer.feedback,
-                "error_type": answer.error_type,
-                "marks": answer_marks,
-                "earned_marks": awarded_marks
-            })
-            db.add(answer)
-
-        if submission.answers:
-            # Store both earned and total marks in overall_score field as a tuple
-            submission.overall_score = [total_score, total_marks]
-            submission.overall_feedback = await ai_service.generate_overall_feedback(
+                _record_grading_failure(answer, result)
+        failed_answers = sum(1 for answer in submission.answers if answer.grading_status == "failed")
+        if failed_answers:
+            # No marks or overall feedback yet: total_marks stays NULL until every answer is graded
+            await db.commit()
+
+    if failed_answers:
+        _count_submission(scheduler.stats, submission, outstanding, failed_answers)
+        return True
+
+    total_score = 0
+    total_marks = 0
+    graded_answers_summary = []
+
+    for answer in submission.answers:
+        question = questions[answer.question_id]
+        answer_marks = question.marks or 1
+        total_score += answer.awarded_marks or 0
+        total_marks += answer_marks
+        graded_answers_summary.append({
+            "question": question.question_text,
+            "feedback": answer.feedback,
+            "error_type": answer.error_type,
+            "marks": answer_marks,
+            "earned_marks": answer.awarded_marks or 0
+        })
+
+    if submission.answers:
+        overall_score = [total_score, total_marks]
+        try:
+            overall_feedback = await scheduler.run(
+                ai_service.generate_overall_feedback,
                 graded_answers=graded_answers_summary,
-                overall_score=submission.overall_score
+                overall_score=overall_score,
+                priority=FEEDBACK_PRIORITY,
             )
-        else:
-            submission.overall_score = [0, 0]
-            submission.overall_feedback = "No answers were submitted for grading."
-        db.add(submission)
+        except CircuitOpenError:
+            async with write_lock:
+                await db.commit()
+            return False
+    else:
+        overall_score = [0, 0]
+        overall_feedback = "No answers were submitted for grading."
 
-    db.commit()
-    return len(ungraded_submissions)
+    async with write_lock:
+        submission.earned_marks, submission.total_marks = overall_score
+        submission.overall_feedback = overall_feedback
+        if rollup_scope:
+            await analytics_rollup_service.record_graded_submission_async(
+                db, rollup_scope,
+                earned_marks=submission.earned_marks,
+                total_marks=submission.total_marks,
+                error_types=Counter(answer.error_type for answer in submission.answers if answer.error_type),
+            )
+        await db.commit()
+
+    _count_submission(scheduler.stats, submission, outstanding, failed_answers=0)
+    return True
+
+def _count_submission(stats: GradingStats, submission: Submission, outstanding: List[Answer], failed_answers: int) -> None:
+    stats.submissions += 1
+    stats.answers += len(submission.answers)
+    stats.resumed_answers += len(submission.answers) - len(outstanding)
+    if failed_answers:
+        stats.failed_submissions += 1
+        stats.failed_answers += failed_answers
+
+async def grade_all_submissions_for_exam(
+    db: AsyncSession, exam_id: UUID, stats: GradingStats | None = None
+) -> GradingStats:
+    """
+    Finds all ungraded submissions for an exam and grades them using the AI service.
+
+    Equivalent answers to the same question are graded once and the result is
+    copied to each of them. Answers from every ungraded submission share one
+    bounded pool of GRADING_MAX_CONCURRENCY in-flight LLM requests. Progress is recorded on
+    `stats` as the run proceeds, so a caller can report it while grading is underway.
+
+    Ungraded submissions are read from the database GRADING_SUBMISSION_BATCH_SIZE
+    at a time and released once graded, so memory does not grow with class size.
+    All database access is async, so a grading run never blocks the event loop.
+
+    Each submission is committed as soon as it is graded, and each answer records
+    its own grading state, so a run that is interrupted (or given up after waiting
+    GRADING_MAX_PAUSE_SECONDS for the AI service's circuit breaker) loses no work:
+    rerunning it only grades the answers that are still outstanding, including
+    those that failed.
+    """
+    exam = await db.get(Exam, exam_id)
+
+    if not exam or not exam.grading_rules:
+        raise ValueError("Exam not found or grading rules have not been set.")
+
+    scheduler = GradingScheduler(max_in_flight=settings.GRADING_MAX_CONCURRENCY, stats=stats)
+    # Committing after every submission must not expire the objects still being graded
+    expire_on_commit, db.sync_session.expire_on_commit = db.sync_session.expire_on_commit, False
+    try:
+        return await _grade_exam(db, scheduler, exam)
+    finally:
+        db.sync_session.expire_on_commit = expire_on_commit
+
+def _ungraded_submissions_filter(exam_id: UUID):
+    return (Submission.exam_id == exam_id, Submission.total_marks.is_(None))
+
+async def _next_ungraded_batch(db: AsyncSession, exam_id: UUID, skip: set[UUID]) -> List[Submission]:
+    """
+    The oldest ungraded submissions, with their answers. Every submission of the
+    previous batch has been committed by now, so no cursor or offset is needed:
+    the next call sees the ones that are still ungraded, except those in `skip`,
+    which this run left ungraded (failed answers) for the next run to retry.
+    """
+    query = (
+        select(Submission)
+        .where(*_ungraded_submissions_filter(exam_id))
+        .options(selectinload(Submission.answers))
+        .order_by(Submission.submitted_at, Submission.id)
+        .limit(settings.GRADING_SUBMISSION_BATCH_SIZE)
+    )
+    if skip:
+        query = query.where(Submission.id.not_in(skip))
+    result = await db.execute(query)
+    return list(result.scalars())
+
+async def _grade_exam(db: AsyncSession, scheduler: GradingScheduler, exam: Exam) -> GradingStats:
+    questions = {
+        question.id: question
+        for question in (await db.execute(select(Question).where(Question.exam_id == exam.id))).scalars()
+    }
+    scheduler.stats.total_submissions = await db.scalar(
+        select(func.count(Submission.id)).where(*_ungraded_submissions_filter(exam.id))
+    )
+    rollup_scope = await analytics_rollup_service.get_scope_async(db, exam)
+    write_lock = asyncio.Lock()
+
+    paused_seconds = 0.0
+    left_ungraded: set[UUID] = set()
+    gave_up = False
+    while not gave_up:
+        batch = await _next_ungraded_batch(db, exam.id, left_ungraded)
+        # End the read transaction so no connection is held while the batch is with the LLM
+        await db.commit()
+        if not batch:
+            break
+
+        pending = batch
+        first_pass = True
+        while pending:
+            answer_tasks = _schedule_answer_grading(scheduler, pending, exam, questions)
+            if first_pass:
+                scheduler.stats.outstanding_answers += len(answer_tasks)
+                # Answers in one group share a task, so distinct tasks are distinct answers
+                scheduler.stats.unique_answers += len({id(task) for task in answer_tasks.values()})
+                first_pass = False
+            outcomes = await asyncio.gather(*(
+                _grade_submission(db, write_lock, scheduler, submission, questions, rollup_scope, answer_tasks)
+                for submission in pending
+            ))
+            pending = [submission for submission, graded in zip(pending, outcomes) if not graded]
+            if not pending:
+                break
+
+            pause = max(llm_resilience.breaker.seconds_until_probe(), 1.0)
+            if paused_seconds + pause > settings.GRADING_MAX_PAUSE_SECONDS:
+                gave_up = True
+                break
+            logger.warning(
+                "AI service unavailable; pausing grading of exam %s for %.0fs (%d submission(s) pending)",
+                exam.id, pause, len(pending),
+            )
+            scheduler.stats.pauses += 1
+            paused_seconds += pause
+            await asyncio.sleep(pause)
+
+        # Graded submissions (and their answers, by cascade) are no longer needed in the session
+        for submission in batch:
+            if submission.total_marks is None:
+                left_ungraded.add(submission.id)
+            db.expunge(submission)
+
+    if gave_up:
+        scheduler.stats.abandoned_submissions = scheduler.stats.total_submissions - scheduler.stats.submissions
+        logger.warning(
+            "AI service still unavailable; leaving %d submission(s) of exam %s ungraded",
+            scheduler.stats.abandoned_submissions, exam.id,
+        )
+
+    scheduler.stats.finish()
+    logger.info(
+        "Grading run for exam %s finished: %s (cache: %s, throttle: %s, resilience: %s)",
+        exam.id, scheduler.stats.as_dict(), grading_cache.stats(), llm_throttle.stats(),
+        llm_resilience.stats(),
+    )
+    return scheduler.stats
@@ -0,0 +1,118 @@
+# app/services/user_cache.py
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Tuple
+from uuid import UUID
+
+from app.core.config import settings
+from app.models.user import User
+
+@dataclass(frozen=True)
+class CurrentUser:
+    """
+    The authenticated user as the API dependencies hand it to endpoints: a
+    detached snapshot of the users row, safe to share between requests.
+    """
+    id: UUID
+    email: str
+    full_name: str | None
+    role: str
+
+    @classmethod
+    def from_user(cls, user: User) -> "CurrentUser":
+        return cls(id=user.id, email=user.email, full_name=user.full_name, role=user.role)
+
+class UserCache:
+    """
+    In-process TTL cache of authenticated users, so most requests resolve their
+    user without querying the users table.
+
+    Each worker process has its own copy. A change to a user becomes visible
+    after at most `ttl_seconds`, or immediately in this process once invalidated.
+    """
+
+    def __init__(self, *, enabled: bool, ttl_seconds: float, max_size: int):
+        self.enabled = enabled and ttl_seconds > 0 and max_size > 0
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries: "OrderedDict[UUID, Tuple[float, CurrentUser]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.expired = 0
+        self.db_lookups = 0
+        self.role_rejections = 0
+        self.invalidations = 0
+
+    def get(self, user_id: UUID) -> CurrentUser | None:
+        if not self.enabled:
+            return None
+        with self._lock:
+            cached = self._entries.get(user_id)
+            if cached is None:
+                return None
+            expires_at, user = cached
+            if expires_at <= time.monotonic():
+                del self._entries[user_id]
+                self.expired += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return user
+
+    def put(self, user: User) -> CurrentUser:
+        """
+        Snapshots a user just loaded from the database and caches the snapshot.
+        """
+        current_user = CurrentUser.from_user(user)
+        with self._lock:
+            self.db_lookups += 1
+            if self.enabled:
+                self._entries[current_user.id] = (time.monotonic() + self.ttl_seconds, current_user)
+                self._entries.move_to_end(current_user.id)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return current_user
+
+    def record_role_rejection(self) -> None:
+        """
+        Counts a request refused on its token's role claim, without any lookup.
+        """
+        with self._lock:
+            self.role_rejections += 1
+
+    def invalidate(self, user_id: UUID) -> None:
+        """
+        Drops a user from this process's cache. Call after changing or deleting a user.
+        """
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        resolved = self.hits + self.db_lookups
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "expired": self.expired,
+            "db_lookups": self.db_lookups,
+            "role_rejections": self.role_rejections,
+            # Users table queries avoided compared with one lookup per authenticated request
+            "lookups_saved": self.hits + self.role_rejections,
+            "hit_ratio": round(self.hits / resolved, 4) if resolved else 0.0,
+            "entries": len(self._entries),
+            "invalidations": self.invalidations,
+        }
+
+user_cache = UserCache(
+    enabled=settings.AUTH_USER_CACHE_ENABLED,
+    ttl_seconds=settings.AUTH_USER_CACHE_TTL_SECONDS,
+    max_size=settings.AUTH_USER_CACHE_MAX_SIZE,
+)
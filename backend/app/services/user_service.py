@@ -1,9 +1,13 @@
 # app/services/user_service.py
 
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.models.user import User
 from app.schemas.user import UserCreate
 from app.core.security import get_password_hash
+from app.services.password_hasher import password_hasher
+from app.services.user_cache import user_cache
 
 def get_user_by_email(db: Session, email: str) -> User | None:
     """
@@ -24,5 +28,26 @@ def create_user(db: Session, user: UserCreate) -> User:
     )
     db.add(db_user)
     db.commit()
+    user_cache.invalidate(db_user.id)
     db.refresh(db_user)
     return db_user
+
+async def get_user_by_email_async(db: AsyncSession, email: str) -> User | None:
+    return await db.scalar(select(User).where(User.email == email))
+
+async def create_user_async(db: AsyncSession, user: UserCreate) -> User:
+    """
+    create_user for async endpoints: bcrypt runs on the password hasher's pool.
+    Raises PasswordHasherBusy when that pool is saturated.
+    """
+    hashed_password = await password_hasher.hash(user.password)
+    db_user = User(
+        email=user.email,
+        hashed_password=hashed_password,
+        full_name=user.full_name,
+        role=user.role,
+    )
+    db.add(db_user)
+    await db.commit()
+    user_cache.invalidate(db_user.id)
+    return db_user
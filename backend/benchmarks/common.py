@@ -0,0 +1,143 @@
+# benchmarks/common.py
+
+"""
+Helpers shared by the benchmark scripts. Run the scripts from the backend directory:
+
+    python -m benchmarks.<name> --help
+
+`configure_environment` must run before anything under `app` is imported,
+because settings are read once at import time.
+"""
+
+import importlib
+import json
+import os
+import pkgutil
+import platform
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict
+
+DEFAULT_DATABASE_URL = "sqlite:///benchmark.db"
+
+# Required settings that have no default; a benchmark does not need real values.
+_PLACEHOLDER_SETTINGS = {
+    "SECRET_KEY": "benchmark-secret",
+    "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+    "GEMINI_API_KEY": "benchmark",
+    "POSTGRES_USER": "benchmark",
+    "POSTGRES_PASSWORD": "benchmark",
+    "POSTGRES_DB": "benchmark",
+    "POSTGRES_HOST": "localhost",
+    "POSTGRES_PORT": "5432",
+}
+
+def configure_environment(database_url: str, **overrides: Any) -> None:
+    """
+    Points the app at the benchmark database and applies setting overrides.
+    Placeholder values fill in only for required settings that are not set at all.
+    """
+    os.environ["DATABASE_URL"] = database_url
+    for name, value in _PLACEHOLDER_SETTINGS.items():
+        os.environ.setdefault(name, value)
+    for name, value in overrides.items():
+        if value is not None:
+            os.environ[name] = str(value)
+
+def create_schema() -> None:
+    """
+    Creates any missing tables. On Postgres, prefer running `alembic upgrade head` first.
+    """
+    import app.models
+    from app.db.base import Base
+    from app.db.session import engine
+
+    for module in pkgutil.iter_modules(app.models.__path__):
+        importlib.import_module(f"app.models.{module.name}")
+    Base.metadata.create_all(engine)
+
+
+class DatabaseProbe:
+    """
+    Counts statements and measures how long pooled connections are checked out.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.queries = 0
+        self.checkouts = 0
+        self.hold_seconds_total = 0.0
+        self.hold_seconds_max = 0.0
+        self._checked_out_at: Dict[int, float] = {}
+
+    def install(self) -> "DatabaseProbe":
+        from sqlalchemy import event
+
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        event.listen(self.engine.pool, "checkout", self._on_checkout)
+        event.listen(self.engine.pool, "checkin", self._on_checkin)
+        return self
+
+    def remove(self) -> None:
+        from sqlalchemy import event
+
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+        event.remove(self.engine.pool, "checkout", self._on_checkout)
+        event.remove(self.engine.pool, "checkin", self._on_checkin)
+
+    def _on_execute(self, *args) -> None:
+        self.queries += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        self.checkouts += 1
+        self._checked_out_at[id(dbapi_connection)] = time.perf_counter()
+
+    def _on_checkin(self, dbapi_connection, connection_record) -> None:
+        started = self._checked_out_at.pop(id(dbapi_connection), None)
+        if started is not None:
+            held = time.perf_counter() - started
+            self.hold_seconds_total += held
+            self.hold_seconds_max = max(self.hold_seconds_max, held)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "queries": self.queries,
+            "connection_checkouts": self.checkouts,
+            "connection_hold_seconds_total": round(self.hold_seconds_total, 4),
+            "connection_hold_seconds_max": round(self.hold_seconds_max, 4),
+        }
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def environment_info(database_url: str) -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "database": database_url.split(":", 1)[0],
+    }
+
+def emit(result: Dict[str, Any], output: str | None) -> None:
+    """Writes the result as JSON to `output`, or to stdout."""
+    text = json.dumps(result, indent=2, default=str)
+    if output:
+        with open(output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
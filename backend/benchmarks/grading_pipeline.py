@@ -0,0 +1,187 @@
+# benchmarks/grading_pipeline.py
+
+"""
+End-to-end benchmark of `grade_all_submissions_for_exam` against the fake LLM.
+
+Seeds one exam with N students x M questions, grades it, and prints (or writes)
+a JSON report: wall time, answers/sec, peak RSS, DB statement count, connection
+hold time, plus the grading, LLM and fake-provider counters.
+
+    python -m benchmarks.grading_pipeline --students 500 --questions 10 \\
+        --latency lognormal --latency-mean 0.8 --output grading.json
+
+Defaults to a local SQLite file; pass --database-url for Postgres (migrated with
+`alembic upgrade head`). Every run seeds a fresh exam, so a database can be reused.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from datetime import date
+
+from benchmarks import common
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--questions", type=int, default=5)
+    parser.add_argument("--database-url", default=common.DEFAULT_DATABASE_URL)
+    parser.add_argument(
+        "--duplicate-ratio", type=float, default=0.3,
+        help="share of answers drawn from a small pool of common answers per question",
+    )
+    parser.add_argument("--latency", choices=("constant", "uniform", "lognormal"), default="lognormal")
+    parser.add_argument("--latency-mean", type=float, default=0.2)
+    parser.add_argument("--latency-spread", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--provider-max-concurrency", type=int, default=0)
+    parser.add_argument("--max-concurrency", type=int, default=None, help="GRADING_MAX_CONCURRENCY")
+    parser.add_argument("--batch-size", type=int, default=None, help="GRADING_BATCH_SIZE")
+    parser.add_argument("--no-cache", action="store_true", help="disable the grading cache")
+    parser.add_argument("--no-dedup", action="store_true", help="disable answer deduplication")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    return parser.parse_args()
+
+def seed_exam(students: int, questions: int, duplicate_ratio: float, seed: int) -> uuid.UUID:
+    from app.db.session import SessionLocal
+    from app.models.answer import Answer
+    from app.models.course import Course
+    from app.models.enrollment import enrollment
+    from app.models.exam import Exam
+    from app.models.question import Question
+    from app.models.schedule import CourseSchedule
+    from app.models.submission import Submission
+    from app.models.user import User
+
+    rng = random.Random(seed)
+    run = uuid.uuid4().hex[:8]
+    with SessionLocal() as db:
+        teacher = User(id=uuid.uuid4(), email=f"bench-{run}-teacher@example.com", hashed_password="-", role="teacher")
+        course = Course(id=uuid.uuid4(), course_name=f"Benchmark {run}", teacher_id=teacher.id)
+        topic = CourseSchedule(id=uuid.uuid4(), topic_name="Benchmark", end_date=date.today(), course_id=course.id)
+        exam = Exam(
+            id=uuid.uuid4(), title=f"Benchmark {run}", status="published", topic_id=topic.id,
+            grading_rules="Award full marks for a correct, complete explanation.",
+        )
+        question_rows = [
+            Question(id=uuid.uuid4(), exam_id=exam.id, marks=rng.randint(1, 5),
+                     question_text=f"Explain concept {q} and give an example.")
+            for q in range(questions)
+        ]
+        db.add_all([teacher, course, topic, exam, *question_rows])
+        db.flush()
+
+        common_answers = [f"A common answer, variant {v}." for v in range(5)]
+        student_rows, submission_rows, answer_rows, enrollments = [], [], [], []
+        for s in range(students):
+            student = User(id=uuid.uuid4(), email=f"bench-{run}-s{s}@example.com", hashed_password="-", role="student")
+            submission = Submission(id=uuid.uuid4(), student_id=student.id, exam_id=exam.id)
+            student_rows.append(student)
+            submission_rows.append(submission)
+            enrollments.append({"student_id": student.id, "course_id": course.id})
+            for question in question_rows:
+                if rng.random() < duplicate_ratio:
+                    text = rng.choice(common_answers)
+                else:
+                    text = f"Student {s} explains {question.question_text.lower()} in their own words. " * 3
+                answer_rows.append(Answer(
+                    id=uuid.uuid4(), answer_text=text, question_id=question.id, submission_id=submission.id
+                ))
+        db.add_all(student_rows)
+        db.flush()
+        db.execute(enrollment.insert(), enrollments)
+        db.add_all(submission_rows)
+        db.flush()
+        db.add_all(answer_rows)
+        db.commit()
+        return exam.id
+
+async def grade(exam_id: uuid.UUID, fake_config) -> dict:
+    from app.db.session import AsyncSessionLocal, async_engine, pool_stats
+    from app.services import llm_provider, submission_service
+    from app.services.fake_llm import FakeLLM, FakeLLMProvider
+    from app.services.grading_cache import grading_cache
+    from app.services.llm_resilience import llm_resilience
+    from app.services.llm_throttle import llm_throttle
+
+    fake = FakeLLM(fake_config)
+    llm_provider.set_llm_provider(FakeLLMProvider(fake))
+    probe = common.DatabaseProbe(async_engine.sync_engine).install()
+    db = AsyncSessionLocal()
+    started = time.perf_counter()
+    try:
+        stats = await submission_service.grade_all_submissions_for_exam(db=db, exam_id=exam_id)
+    finally:
+        await db.close()
+        wall_seconds = time.perf_counter() - started
+        probe.remove()
+        db_pool = pool_stats()["async"]
+        await llm_provider.close_llm_provider()
+        await async_engine.dispose()
+
+    return {
+        "wall_seconds": round(wall_seconds, 3),
+        "answers_per_second": round(stats.answers / wall_seconds, 2) if wall_seconds else 0.0,
+        "peak_rss_mb": common.peak_rss_mb(),
+        "db": {**probe.as_dict(), "pool": db_pool},
+        "grading": stats.as_dict(),
+        "llm": {
+            "throttle": llm_throttle.stats(),
+            "resilience": llm_resilience.stats(),
+            "cache": grading_cache.stats(),
+            "provider": fake.stats(),
+        },
+    }
+
+def main() -> None:
+    args = parse_args()
+    common.configure_environment(
+        args.database_url,
+        GRADING_MAX_CONCURRENCY=args.max_concurrency,
+        GRADING_BATCH_SIZE=args.batch_size,
+        GRADING_CACHE_ENABLED=False if args.no_cache else None,
+        GRADING_DEDUP_ENABLED=False if args.no_dedup else None,
+        GRADING_WORKER_ENABLED=False,
+    )
+    from app.core.config import settings
+    from app.services.fake_llm import FakeLLMConfig
+
+    common.create_schema()
+    seed_started = time.perf_counter()
+    exam_id = seed_exam(args.students, args.questions, args.duplicate_ratio, args.seed)
+    seed_seconds = time.perf_counter() - seed_started
+
+    fake_config = FakeLLMConfig(
+        latency=args.latency,
+        latency_mean_seconds=args.latency_mean,
+        latency_spread=args.latency_spread,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        max_concurrency=args.provider_max_concurrency,
+        seed=args.seed,
+    )
+    result = asyncio.run(grade(exam_id, fake_config))
+
+    common.emit({
+        "benchmark": "grading_pipeline",
+        "environment": common.environment_info(args.database_url),
+        "config": {
+            "students": args.students,
+            "questions": args.questions,
+            "duplicate_ratio": args.duplicate_ratio,
+            "fake_llm": vars(fake_config),
+            "grading_max_concurrency": settings.GRADING_MAX_CONCURRENCY,
+            "grading_batch_size": settings.GRADING_BATCH_SIZE,
+            "grading_cache_enabled": settings.GRADING_CACHE_ENABLED,
+            "grading_dedup_enabled": settings.GRADING_DEDUP_ENABLED,
+        },
+        "seed_seconds": round(seed_seconds, 3),
+        **result,
+    }, args.output)
+
+if __name__ == "__main__":
+    main()
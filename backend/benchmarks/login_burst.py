@@ -0,0 +1,159 @@
+# benchmarks/login_burst.py
+
+"""
+Load benchmark of a login burst, as at the start of a class-wide exam.
+
+Seeds N students and fires N concurrent POST /api/auth/login requests at the app
+in-process. Meanwhile a probe calls a sync endpoint (GET /) every few
+milliseconds, to show whether bcrypt is starving the threadpool that serves sync
+endpoints. Prints (or writes) a JSON report: login latency percentiles and status
+counts (200, or 503 when the password hasher sheds load), probe latency, and the
+password hasher's counters.
+
+    python -m benchmarks.login_burst --logins 500 --hash-workers 4 --max-pending 64
+
+Stored hashes use --bcrypt-rounds (passlib's default is 12; each extra round
+doubles the cost of a verify). Defaults to a local SQLite file; pass
+--database-url for Postgres (migrated with `alembic upgrade head`). Every run
+seeds fresh users, so a database can be reused.
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from collections import Counter
+from typing import Dict, List
+
+from benchmarks import common
+
+PASSWORD = "benchmark-password"
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=500, help="concurrent logins, one per seeded student")
+    parser.add_argument("--bcrypt-rounds", type=int, default=12)
+    parser.add_argument("--database-url", default=common.DEFAULT_DATABASE_URL)
+    parser.add_argument("--hash-workers", type=int, default=None, help="PASSWORD_HASH_WORKERS")
+    parser.add_argument("--max-pending", type=int, default=None, help="PASSWORD_HASH_MAX_PENDING")
+    parser.add_argument("--queue-timeout", type=float, default=None, help="PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS")
+    parser.add_argument("--probe-interval", type=float, default=0.05, help="seconds between probe requests")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    return parser.parse_args()
+
+def seed_students(count: int, bcrypt_rounds: int) -> List[str]:
+    from passlib.context import CryptContext
+
+    from app.db.session import SessionLocal
+    from app.models.user import User
+
+    # Every student shares one hash: hashing is the cost under test, not the seeding
+    hashed_password = CryptContext(schemes=["bcrypt"], bcrypt__rounds=bcrypt_rounds).hash(PASSWORD)
+    run = uuid.uuid4().hex[:8]
+    emails = [f"burst-{run}-{i}@example.com" for i in range(count)]
+    with SessionLocal() as db:
+        db.add_all([
+            User(email=email, hashed_password=hashed_password, full_name=f"Student {i}", role="student")
+            for i, email in enumerate(emails)
+        ])
+        db.commit()
+    return emails
+
+def percentiles(seconds: List[float]) -> Dict[str, float | None]:
+    values = sorted(seconds)
+
+    def at(share: float) -> float | None:
+        if not values:
+            return None
+        return round(values[min(len(values) - 1, int(share * len(values)))] * 1000, 2)
+
+    return {"count": len(values), "p50": at(0.5), "p95": at(0.95), "p99": at(0.99), "max": at(1.0)}
+
+async def burst(emails: List[str], probe_interval: float) -> dict:
+    import httpx
+
+    from app.db.session import async_engine, pool_stats
+    from app.main import app
+    from app.services.password_hasher import password_hasher
+
+    statuses: Counter = Counter()
+    login_seconds: Dict[int, List[float]] = {}
+    probe_seconds: List[float] = []
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        async def login(email: str) -> None:
+            started = time.perf_counter()
+            response = await client.post("/api/auth/login", data={"username": email, "password": PASSWORD})
+            statuses[response.status_code] += 1
+            login_seconds.setdefault(response.status_code, []).append(time.perf_counter() - started)
+
+        async def probe(done: asyncio.Event) -> None:
+            while not done.is_set():
+                started = time.perf_counter()
+                await client.get("/")
+                probe_seconds.append(time.perf_counter() - started)
+                await asyncio.sleep(probe_interval)
+
+        done = asyncio.Event()
+        probe_task = asyncio.create_task(probe(done))
+        started = time.perf_counter()
+        await asyncio.gather(*(login(email) for email in emails))
+        wall_seconds = time.perf_counter() - started
+        done.set()
+        await probe_task
+
+    db_pool = pool_stats()["async"]
+    hasher = password_hasher.stats()
+    password_hasher.shutdown()
+    await async_engine.dispose()
+
+    succeeded = statuses.get(200, 0)
+    return {
+        "wall_seconds": round(wall_seconds, 3),
+        "logins_per_second": round(succeeded / wall_seconds, 2) if wall_seconds else 0.0,
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        "login_latency_ms": {str(code): percentiles(values) for code, values in sorted(login_seconds.items())},
+        "sync_endpoint_probe_ms": percentiles(probe_seconds),
+        "password_hasher": hasher,
+        "db_pool": db_pool,
+        "peak_rss_mb": common.peak_rss_mb(),
+    }
+
+def main() -> None:
+    args = parse_args()
+    common.configure_environment(
+        args.database_url,
+        PASSWORD_HASH_WORKERS=args.hash_workers,
+        PASSWORD_HASH_MAX_PENDING=args.max_pending,
+        PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS=args.queue_timeout,
+        GRADING_WORKER_ENABLED=False,
+    )
+    from app.core.config import settings
+    from app.services.password_hasher import password_hasher
+
+    common.create_schema()
+    seed_started = time.perf_counter()
+    emails = seed_students(args.logins, args.bcrypt_rounds)
+    seed_seconds = time.perf_counter() - seed_started
+
+    result = asyncio.run(burst(emails, args.probe_interval))
+
+    common.emit({
+        "benchmark": "login_burst",
+        "environment": common.environment_info(args.database_url),
+        "config": {
+            "logins": args.logins,
+            "bcrypt_rounds": args.bcrypt_rounds,
+            "password_hash_workers": password_hasher.workers,
+            "password_hash_max_pending": settings.PASSWORD_HASH_MAX_PENDING,
+            "password_hash_queue_timeout_seconds": settings.PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS,
+            "db_pool_size": settings.DB_POOL_SIZE,
+            "db_max_overflow": settings.DB_MAX_OVERFLOW,
+        },
+        "seed_seconds": round(seed_seconds, 3),
+        **result,
+    }, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+# benchmarks/query_plans.py
+
+"""
+Query plans and timings of the hot lookups, without and with the foreign-key and
+filter indexes (migration 7c4e1a9d2b60).
+
+Seeds courses, topics, exams, enrolled students and their submissions, drops the
+indexes, captures EXPLAIN output and the median time of each query, recreates the
+indexes and does the same again. Prints (or writes) a JSON report.
+
+    python -m benchmarks.query_plans --courses 50 --students 2000 --output plans.json
+
+On SQLite the plan comes from EXPLAIN QUERY PLAN; on Postgres from EXPLAIN ANALYZE.
+The unique (student_id, exam_id) constraint is only toggled on Postgres, since
+SQLite cannot drop a constraint; on SQLite it is present in both phases.
+"""
+
+import argparse
+import random
+import statistics
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+from benchmarks import common
+
+# Indexes added by the migration, dropped for the "before" phase
+INDEX_NAMES = [
+    "ix_submissions_exam_id",
+    "ix_submissions_ungraded",
+    "ix_answers_submission_id",
+    "ix_answers_question_id",
+    "ix_questions_exam_id",
+    "ix_exams_topic_id",
+    "ix_course_schedule_course_id",
+    "ix_course_schedule_end_date",
+    "ix_courses_teacher_id",
+    "ix_enrollment_course_id",
+]
+UNIQUE_CONSTRAINT = "uq_submissions_student_id_exam_id"
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--courses", type=int, default=20)
+    parser.add_argument("--topics-per-course", type=int, default=10)
+    parser.add_argument("--questions-per-exam", type=int, default=5)
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--courses-per-student", type=int, default=3)
+    parser.add_argument("--submission-rate", type=float, default=0.6, help="share of exams each student submits")
+    parser.add_argument("--ungraded-rate", type=float, default=0.1, help="share of submissions left ungraded")
+    parser.add_argument("--repeat", type=int, default=20, help="executions per query and phase")
+    parser.add_argument("--database-url", default=common.DEFAULT_DATABASE_URL)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    return parser.parse_args()
+
+def seed(args: argparse.Namespace) -> dict:
+    """
+    Inserts the dataset with Core bulk inserts and returns sample ids for the queries.
+    """
+    from app.db.session import engine
+    from app.models.answer import Answer
+    from app.models.course import Course
+    from app.models.enrollment import enrollment
+    from app.models.exam import Exam
+    from app.models.question import Question
+    from app.models.schedule import CourseSchedule
+    from app.models.submission import Submission
+    from app.models.user import User
+
+    rng = random.Random(args.seed)
+    run = uuid.uuid4().hex[:8]
+    today = date.today()
+    now = datetime.now(timezone.utc)
+
+    teachers, courses, topics, exams, questions = [], [], [], [], []
+    questions_by_exam = {}
+    for c in range(args.courses):
+        teacher_id, course_id = uuid.uuid4(), uuid.uuid4()
+        teachers.append({"id": teacher_id, "email": f"plans-{run}-t{c}@example.com", "hashed_password": "-", "role": "teacher"})
+        courses.append({"id": course_id, "course_name": f"Course {run} {c}", "teacher_id": teacher_id})
+        for t in range(args.topics_per_course):
+            topic_id, exam_id = uuid.uuid4(), uuid.uuid4()
+            topics.append({
+                "id": topic_id, "topic_name": f"Topic {t}", "course_id": course_id,
+                "end_date": today + timedelta(days=7 * (t - args.topics_per_course // 2)),
+            })
+            exams.append({
+                "id": exam_id, "title": f"Exam {c}.{t}", "status": "published", "topic_id": topic_id,
+                "grading_rules": "Award full marks for a correct answer.", "course_id": course_id,
+            })
+            questions_by_exam[exam_id] = []
+            for q in range(args.questions_per_exam):
+                question_id = uuid.uuid4()
+                questions.append({"id": question_id, "exam_id": exam_id, "question_text": f"Question {q}", "marks": 2})
+                questions_by_exam[exam_id].append(question_id)
+
+    exams_by_course = {}
+    for exam in exams:
+        exams_by_course.setdefault(exam.pop("course_id"), []).append(exam["id"])
+
+    students, enrollments, graded_submissions, ungraded_submissions, answers = [], [], [], [], []
+    course_ids = [course["id"] for course in courses]
+    for s in range(args.students):
+        student_id = uuid.uuid4()
+        students.append({"id": student_id, "email": f"plans-{run}-s{s}@example.com", "hashed_password": "-", "role": "student"})
+        for course_id in rng.sample(course_ids, min(args.courses_per_student, len(course_ids))):
+            enrollments.append({"student_id": student_id, "course_id": course_id})
+            for exam_id in exams_by_course[course_id]:
+                if rng.random() >= args.submission_rate:
+                    continue
+                submission_id = uuid.uuid4()
+                graded = rng.random() >= args.ungraded_rate
+                submission = {
+                    "id": submission_id, "student_id": student_id, "exam_id": exam_id,
+                    "submitted_at": now - timedelta(seconds=rng.randint(0, 90 * 86400)),
+                }
+                if graded:
+                    submission.update(earned_marks=6.0, total_marks=10.0)
+                    graded_submissions.append(submission)
+                else:
+                    ungraded_submissions.append(submission)
+                for question_id in questions_by_exam[exam_id]:
+                    answers.append({
+                        "id": uuid.uuid4(), "submission_id": submission_id, "question_id": question_id,
+                        "answer_text": "An answer.", "awarded_marks": 1.0 if graded else None,
+                        "grading_status": "graded" if graded else "pending",
+                    })
+
+    with engine.begin() as conn:
+        for model, rows in (
+            (User, teachers), (Course, courses), (CourseSchedule, topics), (Exam, exams),
+            (Question, questions), (User, students), (enrollment, enrollments),
+            (Submission, graded_submissions), (Submission, ungraded_submissions), (Answer, answers),
+        ):
+            table = getattr(model, "__table__", model)
+            for start in range(0, len(rows), 5000):
+                conn.execute(table.insert(), rows[start:start + 5000])
+
+    submissions = graded_submissions + ungraded_submissions
+    busiest_exam = max(
+        exams_by_course[course_ids[0]],
+        key=lambda exam_id: sum(1 for row in submissions if row["exam_id"] == exam_id and "total_marks" not in row),
+    )
+    sample_submission = next(row for row in submissions if row["exam_id"] == busiest_exam)
+    return {
+        "rows": {
+            "courses": len(courses), "topics": len(topics), "exams": len(exams), "questions": len(questions),
+            "students": len(students), "enrollments": len(enrollments),
+            "submissions": len(submissions), "answers": len(answers),
+        },
+        "teacher_id": courses[0]["teacher_id"],
+        "course_id": course_ids[0],
+        "exam_id": busiest_exam,
+        "question_id": questions_by_exam[busiest_exam][0],
+        "student_id": sample_submission["student_id"],
+        "submission_ids": [row["id"] for row in submissions[:200]],
+    }
+
+def hot_queries(ids: dict) -> dict:
+    """
+    The lookups behind grading, the student and teacher lists and analytics,
+    written the way the services issue them.
+    """
+    from sqlalchemy import func, select
+
+    from app.models.answer import Answer
+    from app.models.course import Course
+    from app.models.enrollment import enrollment
+    from app.models.exam import Exam
+    from app.models.question import Question
+    from app.models.schedule import CourseSchedule
+    from app.models.submission import Submission
+
+    today = date.today()
+    return {
+        "ungraded_batch": (
+            select(Submission)
+            .where(Submission.exam_id == ids["exam_id"], Submission.total_marks.is_(None))
+            .order_by(Submission.submitted_at, Submission.id)
+            .limit(200)
+        ),
+        "answers_of_submissions": select(Answer).where(Answer.submission_id.in_(ids["submission_ids"])),
+        "exam_questions": select(Question).where(Question.exam_id == ids["exam_id"]),
+        "exam_submissions": select(Submission).where(Submission.exam_id == ids["exam_id"]),
+        "student_submissions": select(Submission).where(Submission.student_id == ids["student_id"]),
+        "existing_submission": select(Submission).where(
+            Submission.student_id == ids["student_id"], Submission.exam_id == ids["exam_id"]
+        ),
+        "question_answers": select(Answer).where(Answer.question_id == ids["question_id"]),
+        "teacher_exams": (
+            select(Exam)
+            .join(CourseSchedule, Exam.topic_id == CourseSchedule.id)
+            .join(Course, CourseSchedule.course_id == Course.id)
+            .where(Course.teacher_id == ids["teacher_id"])
+        ),
+        "course_topics": select(CourseSchedule).where(CourseSchedule.course_id == ids["course_id"]),
+        "upcoming_topics": (
+            select(CourseSchedule.topic_name, CourseSchedule.end_date)
+            .join(Course, CourseSchedule.course_id == Course.id)
+            .join(enrollment, Course.id == enrollment.c.course_id)
+            .where(
+                enrollment.c.student_id == ids["student_id"],
+                CourseSchedule.end_date >= today,
+                CourseSchedule.end_date <= today + timedelta(days=14),
+            )
+            .order_by(CourseSchedule.end_date)
+        ),
+        "course_enrollment_count": (
+            select(func.count()).select_from(enrollment).where(enrollment.c.course_id == ids["course_id"])
+        ),
+    }
+
+def _explain_construct():
+    from sqlalchemy.ext.compiler import compiles
+    from sqlalchemy.sql.expression import ClauseElement, Executable
+
+    class Explain(Executable, ClauseElement):
+        inherit_cache = False
+
+        def __init__(self, statement):
+            self.statement = statement
+
+    @compiles(Explain)
+    def _explain_sqlite(element, compiler, **kw):
+        return "EXPLAIN QUERY PLAN " + compiler.process(element.statement, **kw)
+
+    @compiles(Explain, "postgresql")
+    def _explain_postgresql(element, compiler, **kw):
+        return "EXPLAIN (ANALYZE, BUFFERS, FORMAT TEXT) " + compiler.process(element.statement, **kw)
+
+    return Explain
+
+def measure(conn, queries: dict, repeat: int) -> dict:
+    Explain = _explain_construct()
+    results = {}
+    for name, statement in queries.items():
+        # Read the raw cursor: the compiled statement carries the SELECT's result types
+        rows = conn.execute(Explain(statement)).cursor.fetchall()
+        # SQLite rows are (id, parent, notused, detail); Postgres rows are single text lines
+        plan = [row[-1] for row in rows]
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            conn.execute(statement).all()
+            timings.append((time.perf_counter() - started) * 1000)
+        results[name] = {
+            "plan": plan,
+            "median_ms": round(statistics.median(timings), 3),
+            "max_ms": round(max(timings), 3),
+        }
+    return results
+
+def set_indexes(conn, enabled: bool) -> float:
+    """
+    Drops or (re)creates the migration's indexes; returns the seconds it took.
+    """
+    from sqlalchemy import text
+
+    from app.db.base import Base
+
+    indexes = {index.name: index for table in Base.metadata.tables.values() for index in table.indexes}
+    postgres = conn.dialect.name == "postgresql"
+    started = time.perf_counter()
+    for name in INDEX_NAMES:
+        if enabled:
+            indexes[name].create(conn, checkfirst=True)
+        else:
+            indexes[name].drop(conn, checkfirst=True)
+    if postgres:
+        conn.execute(text(f"ALTER TABLE submissions DROP CONSTRAINT IF EXISTS {UNIQUE_CONSTRAINT}"))
+        if enabled:
+            conn.execute(text(f"ALTER TABLE submissions ADD CONSTRAINT {UNIQUE_CONSTRAINT} UNIQUE (student_id, exam_id)"))
+    elapsed = time.perf_counter() - started
+    # Fresh statistics, so the planner knows about the new data and indexes
+    conn.execute(text("ANALYZE"))
+    return elapsed
+
+def main() -> None:
+    args = parse_args()
+    common.configure_environment(args.database_url)
+
+    common.create_schema()
+    from app.db.session import engine
+
+    with engine.begin() as conn:
+        set_indexes(conn, enabled=False)
+    seed_started = time.perf_counter()
+    ids = seed(args)
+    seed_seconds = time.perf_counter() - seed_started
+    queries = hot_queries(ids)
+
+    with engine.begin() as conn:
+        set_indexes(conn, enabled=False)
+        before = measure(conn, queries, args.repeat)
+    with engine.begin() as conn:
+        index_build_seconds = set_indexes(conn, enabled=True)
+        after = measure(conn, queries, args.repeat)
+
+    common.emit({
+        "benchmark": "query_plans",
+        "environment": common.environment_info(args.database_url),
+        "config": {key: value for key, value in vars(args).items() if key not in ("database_url", "output")},
+        "rows": ids["rows"],
+        "seed_seconds": round(seed_seconds, 3),
+        "index_build_seconds": round(index_build_seconds, 3),
+        "unique_constraint_toggled": engine.dialect.name == "postgresql",
+        "queries": {
+            name: {
+                "before": before[name],
+                "after": after[name],
+                "speedup": round(before[name]["median_ms"] / after[name]["median_ms"], 2)
+                if after[name]["median_ms"] else None,
+            }
+            for name in queries
+        },
+    }, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# tests/conftest.py
+
+import importlib
+import os
+import pkgutil
+import tempfile
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict
+from uuid import UUID
+
+import pytest
+
+# Settings are read once at import time, so the environment is set before anything under `app`
+_database_dir = tempfile.mkdtemp(prefix="shikshak-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_database_dir}/test.db"
+for name, value in {
+    "SECRET_KEY": "test-secret",
+    "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+    "GEMINI_API_KEY": "test",
+    "POSTGRES_USER": "test",
+    "POSTGRES_PASSWORD": "test",
+    "POSTGRES_DB": "test",
+    "POSTGRES_HOST": "localhost",
+    "POSTGRES_PORT": "5432",
+}.items():
+    os.environ.setdefault(name, value)
+os.environ["GRADING_WORKER_ENABLED"] = "false"
+os.environ["METRICS_ENABLED"] = "false"
+# Every response reports its statement count in X-DB-Query-Count
+os.environ["QUERY_STATS_HEADERS"] = "true"
+# Each request then looks its user up exactly once, so statement counts do not depend on test order
+os.environ["AUTH_USER_CACHE_ENABLED"] = "false"
+
+from fastapi.testclient import TestClient
+
+import app.models
+from app.db.base import Base
+from app.db.session import SessionLocal, engine
+from app.main import app as fastapi_app
+from app.models.course import Course
+from app.models.exam import Exam
+from app.models.question import Question
+from app.models.schedule import CourseSchedule
+from app.models.user import User
+from tests.utils import auth_headers
+
+for module in pkgutil.iter_modules(app.models.__path__):
+    importlib.import_module(f"app.models.{module.name}")
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(engine)
+
+@pytest.fixture
+def client(db) -> TestClient:
+    return TestClient(fastapi_app)
+
+@dataclass
+class ExamFixture:
+    exam_id: UUID
+    question_id: UUID
+    owner_headers: Dict[str, str]
+    other_teacher_headers: Dict[str, str]
+
+@pytest.fixture
+def teacher_exam(db) -> ExamFixture:
+    """
+    An exam with two questions, its teacher, and a second teacher who owns nothing.
+    """
+    owner = User(email="owner@example.com", hashed_password="x", full_name="Owner", role="teacher")
+    other = User(email="other@example.com", hashed_password="x", full_name="Other", role="teacher")
+    db.add_all([owner, other])
+    db.flush()
+    course = Course(course_name="Course", teacher_id=owner.id)
+    db.add(course)
+    db.flush()
+    topic = CourseSchedule(topic_name="Topic", end_date=date.today(), course_id=course.id)
+    db.add(topic)
+    db.flush()
+    exam = Exam(title="Exam", status="draft", topic_id=topic.id)
+    db.add(exam)
+    db.flush()
+    questions = [Question(question_text=f"Question {i}", exam_id=exam.id, marks=2) for i in range(2)]
+    db.add_all(questions)
+    db.commit()
+    return ExamFixture(
+        exam_id=exam.id,
+        question_id=questions[0].id,
+        owner_headers=auth_headers(owner),
+        other_teacher_headers=auth_headers(other),
+    )
@@ -0,0 +1,24 @@
+# tests/test_answer_dedup.py
+
+from app.services.answer_dedup import group_answers
+
+FIRST = "photosynthesis converts light energy into chemical energy stored in glucose"
+SECOND = FIRST + " inside the chloroplasts of plant cells"
+THIRD = SECOND + " using water and carbon dioxide while releasing oxygen"
+
+def _group(texts, threshold):
+    items = [("q1", text) for text in texts]
+    groups = group_answers(
+        items, question_key=lambda item: item[0], text_key=lambda item: item[1], similarity_threshold=threshold
+    )
+    return [[text for _, text in group] for group in groups]
+
+def test_exact_duplicates_share_a_group():
+    assert _group([FIRST, "  Photosynthesis converts LIGHT energy into chemical energy stored in glucose"], None) == [
+        [FIRST, "  Photosynthesis converts LIGHT energy into chemical energy stored in glucose"]
+    ]
+
+def test_similarity_does_not_chain():
+    # FIRST~SECOND and SECOND~THIRD clear 0.5, FIRST~THIRD does not
+    assert _group([FIRST, SECOND, THIRD], 0.5) == [[FIRST, SECOND], [THIRD]]
+    assert _group([THIRD, SECOND, FIRST], 0.5) == [[THIRD, SECOND], [FIRST]]
@@ -0,0 +1,135 @@
+# tests/test_grading_retry.py
+
+import asyncio
+from datetime import date
+
+import pytest
+
+from app.db.session import AsyncSessionLocal, async_engine
+from app.models.answer import Answer
+from app.models.course import Course
+from app.models.exam import Exam
+from app.models.grading_job import GradingJob
+from app.models.question import Question
+from app.models.schedule import CourseSchedule
+from app.models.submission import Submission
+from app.models.user import User
+from app.schemas.feedback import AIFeedback
+from app.core.config import settings
+from app.services import ai_service, grading_job_service, submission_service
+from app.services.llm_resilience import CircuitOpenError
+
+FLAKY = "an answer the AI service fails on the first time"
+
+@pytest.fixture
+def exam_with_submissions(db):
+    teacher = User(email="teacher@example.com", hashed_password="x", role="teacher")
+    db.add(teacher)
+    db.flush()
+    course = Course(course_name="Course", teacher_id=teacher.id)
+    db.add(course)
+    db.flush()
+    topic = CourseSchedule(topic_name="Topic", end_date=date.today(), course_id=course.id)
+    db.add(topic)
+    db.flush()
+    exam = Exam(title="Exam", status="published", grading_rules="Be fair.", topic_id=topic.id)
+    db.add(exam)
+    db.flush()
+    question = Question(question_text="Question", exam_id=exam.id, marks=2)
+    db.add(question)
+    db.flush()
+    for i, answer_text in enumerate(["first answer", FLAKY, "third answer"]):
+        student = User(email=f"student{i}@example.com", hashed_password="x", role="student")
+        db.add(student)
+        db.flush()
+        submission = Submission(student_id=student.id, exam_id=exam.id)
+        db.add(submission)
+        db.flush()
+        db.add(Answer(answer_text=answer_text, question_id=question.id, submission_id=submission.id))
+    job = GradingJob(exam_id=exam.id, requested_by_id=teacher.id, status="running")
+    db.add(job)
+    db.commit()
+    return exam.id, job.id
+
+@pytest.fixture
+def fake_ai(monkeypatch):
+    """
+    Grades every answer, except that FLAKY fails while `failing` is set.
+    """
+    state = {"failing": True, "circuit_open": False}
+
+    def grade(answer_text):
+        if state["circuit_open"]:
+            return CircuitOpenError("AI service is unavailable; circuit breaker is open.")
+        if state["failing"] and answer_text == FLAKY:
+            return RuntimeError("AI service error")
+        return AIFeedback(score=5, awarded_marks=2, feedback="Good.", error_type="correct")
+
+    async def grade_answer_batch(question_text, answers, grading_rules, marks, exam_id=None):
+        return {key: grade(answer_text) for key, answer_text in answers.items()}
+
+    async def grade_single_answer(question_text, answer_text, grading_rules, marks, exam_id=None):
+        result = grade(answer_text)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    async def generate_overall_feedback(graded_answers, overall_score):
+        return "Overall feedback."
+
+    monkeypatch.setattr(ai_service, "grade_answer_batch", grade_answer_batch)
+    monkeypatch.setattr(ai_service, "grade_single_answer", grade_single_answer)
+    monkeypatch.setattr(ai_service, "generate_overall_feedback", generate_overall_feedback)
+    return state
+
+def _grade(exam_id):
+    async def run():
+        try:
+            async with AsyncSessionLocal() as db:
+                return await submission_service.grade_all_submissions_for_exam(db=db, exam_id=exam_id)
+        finally:
+            # The next run gets a new event loop; pooled aiosqlite connections cannot follow it
+            await async_engine.dispose()
+    return asyncio.run(run())
+
+def test_failed_answers_are_retried_by_the_next_run(db, exam_with_submissions, fake_ai):
+    exam_id, job_id = exam_with_submissions
+
+    stats = _grade(exam_id)
+    assert (stats.submissions, stats.failed_submissions, stats.failed_answers) == (3, 1, 1)
+
+    # The submission with the failed answer stays ungraded, so it is picked up again
+    db.expire_all()
+    flaky = db.query(Answer).filter(Answer.answer_text == FLAKY).one()
+    assert flaky.grading_status == "failed"
+    assert db.get(Submission, flaky.submission_id).total_marks is None
+    assert db.query(Submission).filter(Submission.total_marks.is_not(None)).count() == 2
+
+    grading_job_service.finish_job(db, job_id=job_id, stats=stats)
+    db.expire_all()
+    assert db.get(GradingJob, job_id).status == "failed"
+
+    fake_ai["failing"] = False
+    stats = _grade(exam_id)
+    assert (stats.total_submissions, stats.submissions, stats.failed_submissions) == (1, 1, 0)
+    assert (stats.outstanding_answers, stats.resumed_answers) == (1, 0)
+
+    db.expire_all()
+    assert {answer.grading_status for answer in db.query(Answer)} == {"graded"}
+    assert db.query(Submission).filter(Submission.total_marks.is_(None)).count() == 0
+    assert db.get(Submission, flaky.submission_id).earned_marks == 2
+
+def test_run_that_gives_up_on_the_ai_service_fails_its_job(db, exam_with_submissions, fake_ai, monkeypatch):
+    exam_id, job_id = exam_with_submissions
+    fake_ai["circuit_open"] = True
+    # Give up at the first pause instead of waiting for the breaker
+    monkeypatch.setattr(settings, "GRADING_MAX_PAUSE_SECONDS", 0)
+
+    stats = _grade(exam_id)
+    assert (stats.total_submissions, stats.submissions, stats.abandoned_submissions) == (3, 0, 3)
+
+    grading_job_service.finish_job(db, job_id=job_id, stats=stats)
+    db.expire_all()
+    job = db.get(GradingJob, job_id)
+    assert job.status == "failed"
+    assert "3 of 3 submission(s) were left ungraded" in job.error
@@ -0,0 +1,27 @@
+# tests/test_teacher_exams.py
+
+import asyncio
+
+from app.db.session import async_engine, pool_stats
+from app.models.exam import Exam
+from app.services import ai_service
+
+def test_generate_exam_releases_its_connection_while_waiting_for_the_ai_service(
+    client, db, teacher_exam, monkeypatch
+):
+    topic_id = db.get(Exam, teacher_exam.exam_id).topic_id
+    checked_out = []
+
+    async def generate_exam_questions(*, course_name, topic_name):
+        checked_out.append(pool_stats()["async"]["checked_out"])
+        return [f"{topic_name} question {i}" for i in range(3)]
+
+    monkeypatch.setattr(ai_service, "generate_exam_questions", generate_exam_questions)
+    try:
+        response = client.post(f"/api/teacher/topics/{topic_id}/generate-exam", headers=teacher_exam.owner_headers)
+    finally:
+        # The pooled connections belong to the client's event loop
+        asyncio.run(async_engine.dispose())
+    assert response.status_code == 200
+    assert [q["question_text"] for q in response.json()["questions"]] == [f"Topic question {i}" for i in range(3)]
+    assert checked_out == [0]
@@ -0,0 +1,79 @@
+# tests/test_teacher_questions.py
+
+"""
+The question endpoints check exam ownership in one joined query. Each request
+also issues one statement to load the authenticated user, so a request refused
+with 403 or 404 issues exactly two.
+"""
+
+import uuid
+
+from tests.utils import query_count
+
+def test_get_exam_questions(client, teacher_exam):
+    url = f"/api/teacher/exams/{teacher_exam.exam_id}/questions"
+
+    response = client.get(url, headers=teacher_exam.owner_headers)
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+    # Questions are loaded with the ownership check, not lazily afterwards
+    assert query_count(response) == 2
+
+    response = client.get(url, headers=teacher_exam.other_teacher_headers)
+    assert response.status_code == 403
+    assert query_count(response) == 2
+
+    response = client.get(f"/api/teacher/exams/{uuid.uuid4()}/questions", headers=teacher_exam.owner_headers)
+    assert response.status_code == 404
+    assert query_count(response) == 2
+
+def test_update_question(client, teacher_exam):
+    url = f"/api/teacher/questions/{teacher_exam.question_id}"
+
+    response = client.put(url, json={"marks": 5}, headers=teacher_exam.other_teacher_headers)
+    assert response.status_code == 403
+    assert query_count(response) == 2
+
+    response = client.put(f"/api/teacher/questions/{uuid.uuid4()}", json={"marks": 5}, headers=teacher_exam.owner_headers)
+    assert response.status_code == 404
+    assert query_count(response) == 2
+
+    response = client.put(url, json={"marks": 5}, headers=teacher_exam.owner_headers)
+    assert response.status_code == 200
+    assert response.json()["marks"] == 5
+    # User, ownership, UPDATE, and the refresh of the updated row
+    assert query_count(response) == 4
+
+def test_add_question(client, teacher_exam):
+    url = f"/api/teacher/exams/{teacher_exam.exam_id}/questions"
+    body = {"question_text": "New question", "marks": 3}
+
+    response = client.post(url, json=body, headers=teacher_exam.other_teacher_headers)
+    assert response.status_code == 403
+    assert query_count(response) == 2
+
+    response = client.post(f"/api/teacher/exams/{uuid.uuid4()}/questions", json=body, headers=teacher_exam.owner_headers)
+    assert response.status_code == 404
+    assert query_count(response) == 2
+
+    response = client.post(url, json=body, headers=teacher_exam.owner_headers)
+    assert response.status_code == 200
+    assert response.json()["question_text"] == "New question"
+    # User, ownership, INSERT, and the refresh of the new row
+    assert query_count(response) == 4
+
+def test_delete_question(client, teacher_exam):
+    url = f"/api/teacher/questions/{teacher_exam.question_id}"
+
+    response = client.delete(url, headers=teacher_exam.other_teacher_headers)
+    assert response.status_code == 403
+    assert query_count(response) == 2
+
+    response = client.delete(url, headers=teacher_exam.owner_headers)
+    assert response.status_code == 200
+    # User, ownership, the question's answers (loaded to unlink them), DELETE
+    assert query_count(response) == 4
+
+    response = client.delete(url, headers=teacher_exam.owner_headers)
+    assert response.status_code == 404
+    assert query_count(response) == 2
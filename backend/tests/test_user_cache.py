@@ -0,0 +1,20 @@
+# tests/test_user_cache.py
+
+import uuid
+
+from app.models.user import User
+from app.services.user_cache import UserCache
+
+def test_invalidated_user_is_looked_up_again():
+    cache = UserCache(enabled=True, ttl_seconds=60, max_size=10)
+    user = User(id=uuid.uuid4(), email="user@example.com", full_name="User", role="teacher")
+    cache.put(user)
+    assert cache.get(user.id).role == "teacher"
+
+    user.role = "student"
+    # The cached snapshot is unaffected by the change until it is invalidated
+    assert cache.get(user.id).role == "teacher"
+    cache.invalidate(user.id)
+    assert cache.get(user.id) is None
+    assert cache.put(user).role == "student"
+    assert cache.stats()["invalidations"] == 1
@@ -0,0 +1,16 @@
+# tests/utils.py
+
+from typing import Dict
+
+from app.core import security
+from app.db.query_stats import QUERY_COUNT_HEADER
+from app.models.user import User
+
+def auth_headers(user: User) -> Dict[str, str]:
+    return {"Authorization": f"Bearer {security.create_access_token(subject=str(user.id), role=user.role)}"}
+
+def query_count(response) -> int:
+    """
+    Statements the request issued, from the header QUERY_STATS_HEADERS enables.
+    """
+    return int(response.headers[QUERY_COUNT_HEADER])
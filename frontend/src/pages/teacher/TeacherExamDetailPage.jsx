@@ -67,6 +67,16 @@ export function TeacherExamDetailPage() {
       try {
           const response = await apiClient.post(`/teacher/exams/${examId}/grade-all`);
           alert(response.data.message);
+          // Grading runs in the background; poll the job until it finishes
+          let job = response.data.job;
+          while (job.status === 'queued' || job.status === 'running') {
+              await new Promise((resolve) => setTimeout(resolve, 3000));
+              const jobRes = await apiClient.get(`/teacher/grading-jobs/${job.id}`);
+              job = jobRes.data;
+          }
+          if (job.status === 'failed') {
+              alert(job.error || 'Grading failed.');
+          }
           fetchData(); // Refresh data to show new scores
       } catch (err) {
           alert(err.response?.data?.detail || 'Grading failed.');